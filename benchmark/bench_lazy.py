@@ -0,0 +1,43 @@
+"""compare Lazy_Paged_Text_Lines with Paged_Text_Lines: construction, operations touching a few rows,
+and re-numbering of all rows, which parses every row either way.
+
+usage: python benchmark/bench_lazy.py [n_lines]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.append(os.path.join(".", "scr"))
+sys.path.append(os.path.join(".", "benchmark"))
+from Lazy_Text_Lines import Lazy_Paged_Text_Lines  # type: ignore
+from Re_Numbering import Re_Numbering  # type: ignore
+from synthetic_toc import generate_toc_text  # type: ignore
+from Text_Lines import Paged_Text_Lines, Texts_Printer  # type: ignore
+
+
+def measure(op: Callable[[], object]) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        start: float = time.perf_counter()
+        op()
+        return time.perf_counter() - start
+
+
+def main(n_lines: int = 10**6) -> None:
+    text: str = generate_toc_text(n_lines, mapping_density=0.01, blank_density=0.02)
+    middle: int = n_lines // 2
+    print(f"{n_lines} lines")
+    for cls in [Paged_Text_Lines, Lazy_Paged_Text_Lines]:
+        construction: float = measure(lambda: cls(text))
+        few_rows: float = measure(lambda: Texts_Printer().print_around(cls(text), middle, 2))
+        re_numbering: float = measure(lambda: Re_Numbering(cls(text), on_disorder="abort").re_numbering())
+        print(
+            f"{cls.__name__:<24} construction {construction:7.3f} s  print_around {few_rows:7.3f} s"
+            f"  re_numbering {re_numbering:7.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,87 @@
+"""measure memory per line and construction time of Paged_Text_Line with __slots__ and the shared NO_PAGE_ORDER,
+against the layout before them, an instance __dict__ per line and a Page_Order per line.
+
+usage: python benchmark/bench_line_memory.py [n_lines]
+"""
+import dataclasses
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+sys.path.append(os.path.join(".", "scr"))
+sys.path.append(os.path.join(".", "benchmark"))
+from synthetic_toc import generate_toc_text  # type: ignore
+from Text_Line import Paged_Text_Line  # type: ignore
+
+
+@dataclasses.dataclass
+class Dict_Page_Order:
+    _set: bool = False
+    before: int = -1
+    after: int = -1
+
+
+class Dict_Paged_Text_Line:
+    """the same attributes as Paged_Text_Line held in an instance __dict__"""
+
+    def __init__(
+        self,
+        idx: int,
+        text: str,
+        page_number: Optional[int],
+        roman_page_number: Optional[str],
+        page_order: Dict_Page_Order,
+    ) -> None:
+        self.idx: int = idx
+        self._text: str = text
+        self._sep: str = " "
+        self.page_number: Optional[int] = page_number
+        self.roman_page_number: Optional[str] = roman_page_number
+        self.page_order: Dict_Page_Order = page_order
+
+
+def build_dict_lines(texts: list[str]) -> list[Dict_Paged_Text_Line]:
+    lines: list[Dict_Paged_Text_Line] = []
+    for idx, text in enumerate(texts):
+        text_part, page_number, roman_page_number, order = Paged_Text_Line.parse_text(text)
+        lines.append(
+            Dict_Paged_Text_Line(
+                idx, text_part, page_number, roman_page_number, Dict_Page_Order(order.set, order.before, order.after)
+            )
+        )
+    return lines
+
+
+def build_slotted_lines(texts: list[str]) -> list[Paged_Text_Line]:
+    return [Paged_Text_Line.from_text(idx, text, validate=False) for idx, text in enumerate(texts)]
+
+
+def measure(build: Callable[[], object]) -> tuple[float, float]:
+    """return seconds and MiB retained by the built object"""
+    gc.collect()
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    obj = build()
+    elapsed: float = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return elapsed, current / 2**20
+
+
+def main(n_lines: int = 10**6) -> None:
+    texts: list[str] = generate_toc_text(n_lines, roman_front=20, blank_density=0.02).splitlines()
+    print(f"{n_lines} lines")
+    for name, build in [
+        ("__dict__ per line", lambda: build_dict_lines(texts)),
+        ("__slots__ + NO_PAGE_ORDER", lambda: build_slotted_lines(texts)),
+    ]:
+        elapsed, retained = measure(build)
+        print(f"{name:<28} {elapsed:7.2f} s  {retained:8.1f} MiB  {retained * 2**20 / n_lines:6.1f} bytes per line")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10**6)
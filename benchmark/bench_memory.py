@@ -0,0 +1,58 @@
+"""compare memory footprint of Paged_Text_Lines and Columnar_Paged_Text_Lines on a large synthetic table of contents,
+and that of re-numbering the whole file with and without memory-mapped input.
+
+usage: python benchmark/bench_memory.py [n_lines]
+"""
+import contextlib
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+sys.path.append(os.path.join(".", "scr"))
+sys.path.append(os.path.join(".", "benchmark"))
+from Columnar_Text_Lines import Columnar_Paged_Text_Lines  # type: ignore
+from main import _re_numbering  # type: ignore
+from synthetic_toc import generate_toc_text  # type: ignore
+from Text_Lines import Paged_Text_Lines  # type: ignore
+
+
+def measure(build: Callable[[], object]) -> tuple[float, float, float]:
+    """return seconds, retained MiB and peak MiB while building the object"""
+    gc.collect()
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    obj = build()
+    elapsed: float = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return elapsed, current / 2**20, peak / 2**20
+
+
+def main(n_lines: int = 10**6) -> None:
+    text: str = generate_toc_text(n_lines, roman_front=20, blank_density=0.02)
+    print(f"{n_lines} lines, {len(text.encode()) / 2**20:.1f} MiB of text")
+    for name, build in [
+        ("Paged_Text_Lines", lambda: Paged_Text_Lines(text)),
+        ("Columnar_Paged_Text_Lines", lambda: Columnar_Paged_Text_Lines(text)),
+    ]:
+        elapsed, current, peak = measure(build)
+        print(f"{name:<28} {elapsed:7.2f} s  retained {current:8.1f} MiB  peak {peak:8.1f} MiB")
+    with tempfile.TemporaryDirectory() as dir, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        file: Path = Path(dir) / "toc.txt"
+        file.write_text(text)
+        del text
+        results: list[str] = []
+        for name, mapped in [("_re_numbering", False), ("_re_numbering mapped", True)]:
+            elapsed, current, peak = measure(lambda: _re_numbering(file, dir, on_disorder="abort", mapped=mapped))
+            results.append(f"{name:<28} {elapsed:7.2f} s  peak {peak:8.1f} MiB")
+    print("\n".join(results))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10**6)
@@ -0,0 +1,75 @@
+"""measure write throughput of Output_Writer for each fsync policy and buffer size, and whether overwriting survives a crash.
+
+the crash test kills a process in the middle of overwriting a file, once with a plain open(path, "w") and once with Output_Writer.
+
+usage: python benchmark/bench_output_writer.py [n_files] [n_lines]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator
+
+sys.path.append(os.path.join(".", "scr"))
+sys.path.append(os.path.join(".", "benchmark"))
+from Output_Writer import Output_Writer  # type: ignore
+from synthetic_toc import generate_toc_text  # type: ignore
+
+
+def write_all(dir: Path, lines: list[str], n_files: int, buffer_size: int, fsync: str) -> float:
+    start: float = time.perf_counter()
+    with Output_Writer(buffer_size=buffer_size, fsync=fsync) as writer:  # type: ignore[arg-type]
+        for i in range(n_files):
+            writer.write_lines(lines, dir / f"toc{i}.txt")
+    return time.perf_counter() - start
+
+
+def slow_lines(lines: list[str]) -> Iterator[str]:
+    for i, line in enumerate(lines):
+        if i == len(lines) // 2:
+            time.sleep(60)
+        yield line
+
+
+def overwrite_plain(path: Path, lines: list[str]) -> None:
+    with open(path, mode="w") as f:
+        for line in slow_lines(lines):
+            f.write(line + "\n")
+            f.flush()
+
+
+def overwrite_atomic(path: Path, lines: list[str]) -> None:
+    Output_Writer().write_lines(slow_lines(lines), path)
+
+
+def survives_crash(dir: Path, lines: list[str], target) -> bool:
+    path: Path = dir / f"{target.__name__}.txt"
+    original: str = "\n".join(lines)
+    path.write_text(original)
+    process = multiprocessing.Process(target=target, args=(path, [line + " 1" for line in lines]))
+    process.start()
+    time.sleep(1)
+    process.kill()
+    process.join()
+    return path.read_text() == original
+
+
+def main(n_files: int = 200, n_lines: int = 2_000) -> None:
+    lines: list[str] = generate_toc_text(n_lines, seed=0).splitlines()
+    size_mb: float = len("\n".join(lines).encode()) * n_files / 2**20
+    print(f"{n_files} files of {n_lines} rows, {size_mb:.1f} MiB in total")
+    print(f"{'fsync':<8}{'buffer':>10}{'seconds':>10}{'MiB/s':>10}{'files/s':>10}")
+    for fsync in ["none", "file", "batch"]:
+        for buffer_size in [4096, 65536, 1 << 20]:
+            with tempfile.TemporaryDirectory() as dir:
+                t: float = write_all(Path(dir), lines, n_files, buffer_size, fsync)
+            print(f"{fsync:<8}{buffer_size:>10}{t:>10.3f}{size_mb / t:>10.1f}{n_files / t:>10.0f}")
+    with tempfile.TemporaryDirectory() as dir:
+        for target in [overwrite_plain, overwrite_atomic]:
+            print(f"original survives a crash with {target.__name__}: {survives_crash(Path(dir), lines, target)}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
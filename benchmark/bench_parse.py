@@ -0,0 +1,42 @@
+"""time parsing page numbers of rows with titles of growing length. time per row staying flat means the title part is never scanned.
+
+usage: python benchmark/bench_parse.py [n_rows]
+"""
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.append(os.path.join(".", "scr"))
+from Text_Line import Paged_Text_Line  # type: ignore
+
+
+def timeit(op: Callable[[], object], repeat: int = 3) -> float:
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        op()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n_rows: int = 20_000) -> None:
+    lengths: list[int] = [10, 100, 1_000, 10_000]
+    tails: list[str] = [" 12", " 3 -> 5", " xiv", ""]
+    print(f"{'parser':<20}" + "".join(f"{n:>12}" for n in lengths) + "   (microseconds per row by title length)")
+    parsers: dict[str, Callable[[str], object]] = {
+        "constructor": lambda text: Paged_Text_Line(text=text),
+        "from_text": lambda text: Paged_Text_Line.from_text(0, text),
+        "parse_text": Paged_Text_Line.parse_text,
+    }
+    for name, parse in parsers.items():
+        per_row: list[float] = []
+        for length in lengths:
+            # titles end with a word so that the tail is found right away, as in real tables of contents
+            rows: list[str] = [("a" * (length - 4)) + " end" + tails[i % len(tails)] for i in range(n_rows)]
+            per_row.append(timeit(lambda: [parse(row) for row in rows]) / n_rows * 1e6)
+        print(f"{name:<20}" + "".join(f"{t:>12.3f}" for t in per_row))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
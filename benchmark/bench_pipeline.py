@@ -0,0 +1,56 @@
+"""compare re-numbering a directory one file at a time with the asyncio pipeline of in_flight files,
+under latency added to every read and write, as on a network file system.
+
+usage: python benchmark/bench_pipeline.py [n_files] [n_lines] [latency_ms]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(".", "scr"))
+sys.path.append(os.path.join(".", "benchmark"))
+import main  # type: ignore
+from Output_Writer import Output_Writer  # type: ignore
+from synthetic_toc import generate_toc_text  # type: ignore
+
+
+@contextlib.contextmanager
+def added_latency(seconds: float):
+    """sleep before every read and write of main, which releases the GIL as blocking I/O does."""
+    read_text, write_lines = main._read_text, Output_Writer.write_lines
+
+    def slow_read_text(file):
+        time.sleep(seconds)
+        return read_text(file)
+
+    def slow_write_lines(self, *args, **kwargs):
+        time.sleep(seconds)
+        return write_lines(self, *args, **kwargs)
+
+    main._read_text, Output_Writer.write_lines = slow_read_text, slow_write_lines
+    try:
+        yield
+    finally:
+        main._read_text, Output_Writer.write_lines = read_text, write_lines
+
+
+def main_(n_files: int = 200, n_lines: int = 2000, latency_ms: int = 20) -> None:
+    with tempfile.TemporaryDirectory() as dir:
+        text: str = generate_toc_text(n_lines, mapping_density=0.01)
+        for i in range(n_files):
+            (Path(dir) / f"toc{i}.txt").write_text(text)
+        print(f"{n_files} files of {n_lines} lines, {latency_ms} ms per read and write")
+        with added_latency(latency_ms / 1000):
+            for in_flight in [0, 1, 4, 16]:
+                start: float = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    main._re_numbering_all(dir, Path(dir) / "out", suffix="_r", on_disorder="abort", in_flight=in_flight)
+                print(f"in_flight={in_flight:<3} {time.perf_counter() - start:7.2f} s")
+
+
+if __name__ == "__main__":
+    main_(*map(int, sys.argv[1:]))
@@ -0,0 +1,55 @@
+"""compare re-numbering small files by spawning the command line tool per file with sending them as jobs to a server.
+
+usage: python benchmark/bench_server.py [n_files] [n_lines]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.append(os.path.join(".", "scr"))
+sys.path.append(os.path.join(".", "benchmark"))
+from Re_Numbering_Server import Re_Numbering_Server, run_jobs  # type: ignore
+from synthetic_toc import generate_toc_text  # type: ignore
+
+
+def main(n_files: int = 50, n_lines: int = 100) -> None:
+    with tempfile.TemporaryDirectory() as dir:
+        files: list[Path] = [Path(dir) / f"toc{i}.txt" for i in range(n_files)]
+        for file in files:
+            file.write_text(generate_toc_text(n_lines, mapping_density=0.05))
+        out: str = os.path.join(dir, "out")
+        print(f"{n_files} files of {n_lines} lines")
+
+        start: float = time.perf_counter()
+        for file in files:
+            subprocess.run(
+                [
+                    sys.executable,
+                    os.path.join(".", "scr", "renumbering.py"),
+                    str(file),
+                    "-d",
+                    out,
+                    "--on-disorder",
+                    "abort",
+                ],
+                check=True,
+            )
+        print(f"{'spawn per file':<20}{(time.perf_counter() - start) / n_files * 1000:8.2f} ms per file")
+
+        jobs = [{"path": str(file), "options": {"dir_out": out}} for file in files]
+        with Re_Numbering_Server(Path(dir) / "s.sock") as server:
+            thread = threading.Thread(target=server.serve)
+            thread.start()
+            start = time.perf_counter()
+            assert all(reply["ok"] for reply in run_jobs(jobs, Path(dir) / "s.sock"))
+            print(f"{'server':<20}{(time.perf_counter() - start) / n_files * 1000:8.2f} ms per file")
+            list(run_jobs([{"op": "shutdown"}], Path(dir) / "s.sock"))
+            thread.join()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""time set operations of Text_Lines at doubling sizes. time per row staying flat means linear scaling.
+
+usage: python benchmark/bench_set_operations.py [max_lines]
+"""
+import os
+import sys
+import time
+from typing import Callable
+
+sys.path.append(os.path.join(".", "scr"))
+from Text_Line import Text_Line  # type: ignore
+from Text_Lines import Text_Lines  # type: ignore
+
+
+def to_textlines(idx: range, text: str) -> Text_Lines:
+    return Text_Lines([Text_Line(idx=i, text=text) for i in idx])
+
+
+def timeit(op: Callable[[], object], repeat: int = 3) -> float:
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        op()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(max_lines: int = 320_000) -> None:
+    sizes: list[int] = []
+    n: int = 10_000
+    while n <= max_lines:
+        sizes.append(n)
+        n *= 2
+    ops: dict[str, Callable[[Text_Lines, Text_Lines, list[int]], object]] = {
+        "add": lambda a, b, rows: a + b,
+        "sub": lambda a, b, rows: a - b,
+        "and": lambda a, b, rows: a & b,
+        "select": lambda a, b, rows: a.select(rows),
+        "exclude": lambda a, b, rows: a.exclude(rows),
+        "overwrite": lambda a, b, rows: a.overwrite(b),
+        "remove_duplication": lambda a, b, rows: (a + b).remove_duplication(),
+    }
+    print(f"{'operation':<20}" + "".join(f"{n:>12}" for n in sizes) + "   (microseconds per row)")
+    data = {
+        n: (to_textlines(range(n), "a"), to_textlines(range(n // 2, n + n // 2), "b"), list(range(0, n, 3)))
+        for n in sizes
+    }
+    for name, op in ops.items():
+        per_row: list[float] = [timeit(lambda: op(*data[n])) / n * 1e6 for n in sizes]
+        print(f"{name:<20}" + "".join(f"{t:>12.3f}" for t in per_row))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 320_000)
@@ -0,0 +1,51 @@
+"""compare loading a text file by parsing every row with loading it through its sidecar index,
+both when the index is built and when it is reused, and the size of the index against the file.
+
+usage: python benchmark/bench_sidecar.py [n_lines]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.append(os.path.join(".", "scr"))
+sys.path.append(os.path.join(".", "benchmark"))
+from Sidecar_Index import Sidecar_Index, get_index_file  # type: ignore
+from synthetic_toc import generate_toc_text  # type: ignore
+from Text_Lines import Paged_Text_Lines  # type: ignore
+
+
+def measure(op: Callable[[], object]) -> float:
+    start: float = time.perf_counter()
+    op()
+    return time.perf_counter() - start
+
+
+def load_all(file: Path) -> None:
+    with Sidecar_Index(file) as index:
+        index.get_lines().lines
+
+
+def main(n_lines: int = 10**6) -> None:
+    with tempfile.TemporaryDirectory() as dir:
+        file: Path = Path(dir) / "toc.txt"
+        file.write_text(generate_toc_text(n_lines, mapping_density=0.01, blank_density=0.02), encoding="utf-8")
+        print(f"{n_lines} lines")
+        parse: float = measure(lambda: Paged_Text_Lines(file.read_text(encoding="utf-8")).lines)
+        build: float = measure(lambda: Sidecar_Index(file).close())
+        reuse: float = measure(lambda: load_all(file))
+        open_only: float = measure(lambda: Sidecar_Index(file).close())
+        os.utime(file)
+        touched: float = measure(lambda: Sidecar_Index(file).close())
+        print(f"{'parse':<28}{parse:7.3f} s")
+        print(f"{'build index':<28}{build:7.3f} s")
+        print(f"{'load all rows by index':<28}{reuse:7.3f} s")
+        print(f"{'open index':<28}{open_only:7.3f} s")
+        print(f"{'open index of touched file':<28}{touched:7.3f} s")
+        print(f"index {get_index_file(file).stat().st_size / file.stat().st_size:.2f} times as large as the file")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,75 @@
+"""measure startup of the command line tool re-numbering a small single file, by python -X importtime,
+against a budget for the time taken by importing the tool. modules only some options need, such as rich, asyncio
+and cProfile, must not be imported at all.
+
+usage: python benchmark/bench_startup.py [runs] [budget_ms]
+
+Bytecode is cached in a temporary directory, as it is in installed environments, whatever PYTHONDONTWRITEBYTECODE is.
+The exit status is 1 if the median import time is over the budget or any of the modules above is imported.
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# modules imported by the interpreter itself or by site, which are not the tool's to pay for
+_STARTUP: frozenset[str] = frozenset(["site", "encodings", "zipimport", "io", "_frozen_importlib_external", "codecs"])
+# modules that a plain run must not import
+_FORBIDDEN: list[str] = ["rich", "asyncio", "cProfile", "pstats", "concurrent.futures", "typing_extensions"]
+_ROW: re.Pattern = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)")
+
+
+def run(args: list[str], env: dict[str, str]) -> tuple[float, str]:
+    start: float = time.perf_counter()
+    done = subprocess.run([sys.executable, *args], env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, done.stderr
+
+
+def parse_importtime(stderr: str) -> tuple[float, dict[str, float], set[str]]:
+    """get seconds taken by importing top-level modules but those of startup, the seconds by each, and all modules imported."""
+    top: dict[str, float] = {}
+    imported: set[str] = set()
+    for match in _ROW.finditer(stderr):
+        cumulative, indent, name = int(match[1]), match[2], match[3]
+        imported.add(name)
+        if len(indent) == 1 and name not in _STARTUP:
+            top[name] = top.get(name, 0.0) + cumulative / 1e6
+    return sum(top.values()), top, imported
+
+
+def main(runs: int = 20, budget_ms: int = 40) -> None:
+    with tempfile.TemporaryDirectory() as dir:
+        env: dict[str, str] = dict(os.environ, PYTHONPYCACHEPREFIX=os.path.join(dir, "pycache"))
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        file: Path = Path(dir) / "toc.txt"
+        file.write_text("preface 1\nchapter 1 3\nchapter 2 9 -> 5\nindex 12\n")
+        args: list[str] = [os.path.join(".", "scr", "renumbering.py"), str(file), "-d", os.path.join(dir, "out")]
+        # the first run writes bytecode
+        run(args, env)
+        bare: list[float] = [run(["-c", "pass"], env)[0] for _ in range(runs)]
+        walls: list[float] = []
+        imports: list[float] = []
+        for _ in range(runs):
+            wall, stderr = run(["-X", "importtime", *args], env)
+            total, top, imported = parse_importtime(stderr)
+            walls.append(wall)
+            imports.append(total)
+    forbidden: list[str] = [name for name in _FORBIDDEN if name in imported]
+    median_import: float = statistics.median(imports)
+    print(f"{'python -c pass':<24}{statistics.median(bare) * 1000:8.1f} ms")
+    print(f"{'renumbering single file':<24}{statistics.median(walls) * 1000:8.1f} ms")
+    print(f"{'imports of the tool':<24}{median_import * 1000:8.1f} ms  (budget {budget_ms} ms)")
+    for name, seconds in sorted(top.items(), key=lambda item: -item[1])[:8]:
+        print(f"    {name:<20}{seconds * 1000:8.1f} ms")
+    if forbidden != []:
+        print(f"imported by a plain run: {', '.join(forbidden)}")
+    if median_import * 1000 > budget_ms or forbidden != []:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,121 @@
+"""benchmark suite on synthetic tables of contents, run by pytest-benchmark (pip install pytest-benchmark).
+It times construction of Paged_Text_Lines, Re_Numbering.re_numbering, set operations of Text_Lines, Texts_Printer.print
+and _re_numbering end to end, for each size in TOC_SIZES and each profile in PROFILES.
+
+usage:
+    python -m pytest benchmark/bench_suite.py --benchmark-autosave
+    python -m pytest benchmark/bench_suite.py --benchmark-compare --benchmark-compare-fail=mean:10%
+    TOC_SIZES=1000,100000 python -m pytest benchmark/bench_suite.py --benchmark-json=bench.json
+
+--benchmark-autosave saves results as JSON under .benchmarks, named after the commit, and --benchmark-compare compares
+the run with the latest saved one. The file is not named test_*.py so that it is collected only when given explicitly.
+"""
+import contextlib
+import functools
+import io
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.append(os.path.join(".", "scr"))
+sys.path.append(os.path.join(".", "benchmark"))
+from main import _re_numbering  # type: ignore
+from Re_Numbering import Re_Numbering  # type: ignore
+from synthetic_toc import generate_toc_text  # type: ignore
+from Text_Lines import Paged_Text_Lines, Texts_Printer  # type: ignore
+
+SIZES: list[int] = [int(n) for n in os.environ.get("TOC_SIZES", "1000,100000,1000000").split(",")]
+# keyword arguments of generate_toc. "sparse" is a plain table of contents, "dense" is one with front matter in roman
+# numbers, many mappings and rows without page number.
+PROFILES: dict[str, dict[str, Any]] = {
+    "sparse": dict(mapping_density=0.01),
+    "dense": dict(mapping_density=0.2, roman_front=20, blank_density=0.05),
+}
+# sizes from which each benchmark runs a fixed number of rounds instead of calibrating them
+LARGE: int = 100_000
+# rows printed by Texts_Printer at most, so that the largest input does not write hundreds of megabytes.
+PRINT_ROWS: int = 100_000
+
+
+@functools.cache
+def get_text(n_lines: int, profile: str) -> str:
+    return generate_toc_text(n_lines, **PROFILES[profile])
+
+
+@functools.cache
+def get_lines(n_lines: int, profile: str) -> Paged_Text_Lines:
+    return Paged_Text_Lines(get_text(n_lines, profile))
+
+
+def run(benchmark, op: Callable[[], object], n_lines: int) -> None:
+    """time op quietly. outputs to stdout, e.g., rows pointed out by the tool, are discarded."""
+
+    def quiet() -> object:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return op()
+
+    benchmark.extra_info["n_lines"] = n_lines
+    if n_lines >= LARGE:
+        benchmark.pedantic(quiet, rounds=3 if n_lines < 10 * LARGE else 1, iterations=1)
+    else:
+        benchmark(quiet)
+
+
+@pytest.fixture(params=SIZES, ids=lambda n: f"n={n}")
+def n_lines(request) -> int:
+    return request.param
+
+
+@pytest.fixture(params=list(PROFILES))
+def profile(request) -> str:
+    return request.param
+
+
+def test_construction(benchmark, n_lines, profile):
+    text: str = get_text(n_lines, profile)
+    run(benchmark, lambda: Paged_Text_Lines(text), n_lines)
+
+
+@pytest.mark.parametrize("kernel", ["loop", "batch"])
+def test_re_numbering(benchmark, n_lines, profile, kernel):
+    lines: Paged_Text_Lines = get_lines(n_lines, profile)
+    run(benchmark, lambda: Re_Numbering(lines, kernel=kernel, on_disorder="abort").re_numbering(), n_lines)
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        lambda a, b: a + b,
+        lambda a, b: a - b,
+        lambda a, b: a & b,
+        lambda a, b: a.overwrite(b),
+    ],
+    ids=["add", "sub", "and", "overwrite"],
+)
+def test_set_operations(benchmark, n_lines, operation):
+    lines: Paged_Text_Lines = get_lines(n_lines, "sparse")
+    # the latter half of rows against every other row
+    a, b = lines[n_lines // 2 :], lines[::2]
+    run(benchmark, lambda: operation(a, b), n_lines)
+
+
+def test_print(benchmark, n_lines):
+    lines: Paged_Text_Lines = get_lines(n_lines, "sparse")
+    run(benchmark, lambda: Texts_Printer().print(lines, end=PRINT_ROWS - 1), min(n_lines, PRINT_ROWS))
+
+
+@pytest.mark.parametrize("mode", ["read", "stream", "mapped"])
+def test_end_to_end(benchmark, tmp_path_factory, n_lines, profile, mode):
+    dir: Path = tmp_path_factory.mktemp("toc")
+    file: Path = dir / "toc.txt"
+    file.write_text(get_text(n_lines, profile))
+    run(
+        benchmark,
+        lambda: _re_numbering(file, dir / "out", on_disorder="abort", stream=mode == "stream", mapped=mode == "mapped"),
+        n_lines,
+    )
@@ -0,0 +1,39 @@
+import random
+from typing import Iterator
+
+
+def generate_toc(
+    n_lines: int,
+    mapping_density: float = 0.01,
+    roman_front: int = 0,
+    blank_density: float = 0.0,
+    seed: int = 0,
+) -> Iterator[str]:
+    """generate rows of a synthetic table of contents.
+    The first roman_front rows are front matter with roman page numbers. The rest have increasing arabic page numbers,
+    where rows with 'old->new' mapping appear at the rate of mapping_density and rows without page number at the rate of blank_density.
+    Mappings only ever move pages forward, so that the re-numbered pages never decrease.
+    """
+    rng = random.Random(seed)
+    romans: list[str] = ["i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x", "xi", "xii", "xiii", "xiv", "xv"]
+    for i in range(min(roman_front, n_lines)):
+        yield f"Preface part {i + 1} {romans[i % len(romans)]}"
+    page: int = 1
+    # new page minus old page, which a mapping sets for the rows after it. it never decreases,
+    # so that re-numbered pages never decrease either.
+    slide: int = 0
+    for i in range(max(n_lines - roman_front, 0)):
+        title: str = f"§{i + 1}. Section on Topic Number {i % 97} of the Book"
+        if rng.random() < blank_density:
+            # a heading with no page number, which must not end with digits
+            yield f"CHAPTER {i // 50 + 1}: Part of the Book"
+        elif rng.random() < mapping_density:
+            slide += rng.randint(0, 5)
+            yield f"{title} {page}->{page + slide}"
+        else:
+            yield f"{title} {page}"
+        page += rng.randint(0, 3)
+
+
+def generate_toc_text(n_lines: int, **kwargs) -> str:
+    return "\n".join(generate_toc(n_lines, **kwargs))
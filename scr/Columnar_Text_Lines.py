@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+import re
+from array import array
+from typing import TYPE_CHECKING, Final, Iterable, Iterator, Optional, overload
+
+from Text_Line import NO_PAGE_ORDER, Page_Order, Paged_Text_Line, Text_Line
+from Text_Lines import Paged_Text_Lines
+
+# Self is only for annotations, so that typing_extensions is not imported at run time
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+# bit flags of each row
+HAS_PAGE: Final[int] = 1
+ORDER_SET: Final[int] = 2
+
+
+class Columnar_Paged_Text_Lines(Paged_Text_Lines):
+    """Paged_Text_Lines that keeps each property of rows in its own column instead of a list of Paged_Text_Line.
+    Integers are held in arrays and texts in a single string buffer, so that a row costs a few machine words instead of three python objects.
+    Paged_Text_Line objects are created only when a row is asked for, e.g., by indexing or iteration.
+    Rows whose numbers do not fit in the arrays or whose separator is not a single space are kept as they are in a sparse dict."""
+
+    def __init__(self, text: str | list[str] | list[Paged_Text_Line] | Paged_Text_Lines = "") -> None:
+        self._clear()
+        if isinstance(text, str):
+            self._extend_parsed(enumerate(text.splitlines()))
+        elif self._is_list_str(text):
+            checker = Text_Line()
+            for s in text:
+                checker._validate_text(s)
+            self._extend_parsed(enumerate(text))
+        elif isinstance(text, Paged_Text_Lines) or self._is_list_T(text):
+            for line in sorted(text):
+                self._append_line(line)
+        else:
+            raise TypeError(f"invalid type: text = {type(text)}")
+        self._pack()
+
+    def _clear(self) -> None:
+        """empty every column"""
+        self._idx: array[int] = array("q")
+        self._page: array[int] = array("q")
+        self._before: array[int] = array("q")
+        self._after: array[int] = array("q")
+        self._flags: array[int] = array("B")
+        # texts are packed into _buffer and row i is _buffer[_offsets[i] : _offsets[i + 1]]
+        self._buffer: str = ""
+        self._offsets: array[int] = array("q", [0])
+        # texts appended but not yet packed
+        self._pending: list[str] = []
+        self._index_map: Optional[dict[int, int]] = None
+        # sparse columns keyed by positional index
+        self._roman: dict[int, str] = {}
+        self._irregular: dict[int, Paged_Text_Line] = {}
+
+    def _append(
+        self,
+        idx: int,
+        text: str,
+        page_number: Optional[int],
+        roman_page_number: Optional[str],
+        page_order: Page_Order,
+    ) -> None:
+        pos: int = len(self._idx)
+        try:
+            self._idx.append(idx)
+            self._page.append(-1 if page_number is None else page_number)
+            self._before.append(page_order.before)
+            self._after.append(page_order.after)
+        except OverflowError:
+            # too large a number for the arrays. roll back and keep it as an object.
+            for column in (self._idx, self._page, self._before, self._after):
+                del column[pos:]
+            self._append_line(
+                Paged_Text_Line.from_parsed(idx, text, page_number, roman_page_number, page_order), irregular=True
+            )
+            return
+        self._flags.append((HAS_PAGE if page_number is not None else 0) | (ORDER_SET if page_order.set else 0))
+        self._pending.append(text)
+        if roman_page_number is not None:
+            self._roman[pos] = roman_page_number
+
+    def _append_line(self, line: Paged_Text_Line, irregular: bool = False) -> None:
+        if not irregular and line.sep == " ":
+            self._append(line.idx, line.text, line.page_number, line.roman_page_number, line.page_order)
+            return
+        # idx is needed for search, the others are placeholders
+        pos: int = len(self._idx)
+        self._idx.append(line.idx)
+        self._page.append(-1)
+        self._before.append(-1)
+        self._after.append(-1)
+        self._flags.append(0)
+        self._pending.append("")
+        self._irregular[pos] = line
+
+    def _pack(self) -> None:
+        """pack pending texts into the buffer. this must be called once after rows are appended."""
+        self._offsets = array("q", itertools.accumulate(map(len, self._pending), initial=0))
+        self._buffer = "".join(self._pending)
+        self._pending = []
+        self._index_map = None
+
+    def _get_text(self, pos: int) -> str:
+        return self._buffer[self._offsets[pos] : self._offsets[pos + 1]]
+
+    def _extend_parsed(self, texts: Iterable[tuple[int, str]]) -> None:
+        for i, s in texts:
+            self._append(i, *Paged_Text_Line.parse_text(s))
+
+    def _get_row(self, pos: int) -> Paged_Text_Line:
+        """create Paged_Text_Line object at the positional index"""
+        if pos in self._irregular:
+            return self._irregular[pos]
+        flags: int = self._flags[pos]
+        return Paged_Text_Line.from_parsed(
+            idx=self._idx[pos],
+            text=self._get_text(pos),
+            page_number=self._page[pos] if flags & HAS_PAGE else None,
+            roman_page_number=self._roman.get(pos),
+            page_order=Page_Order(self._before[pos], self._after[pos]) if flags & ORDER_SET else NO_PAGE_ORDER,
+        )
+
+    def _take(self, positions: Iterable[int], others: Optional[Columnar_Paged_Text_Lines] = None) -> Self:
+        """build a new instance from the rows at the positional indices. negative positions refer to others, as ~pos."""
+        taken: Self = self.get_instance([])
+        for pos in positions:
+            src: Columnar_Paged_Text_Lines = self
+            if pos < 0 and others is not None:
+                src, pos = others, ~pos
+            new_pos: int = len(taken._idx)
+            taken._idx.append(src._idx[pos])
+            taken._page.append(src._page[pos])
+            taken._before.append(src._before[pos])
+            taken._after.append(src._after[pos])
+            taken._flags.append(src._flags[pos])
+            taken._pending.append(src._get_text(pos))
+            if pos in src._roman:
+                taken._roman[new_pos] = src._roman[pos]
+            if pos in src._irregular:
+                taken._irregular[new_pos] = src._irregular[pos]
+        taken._pack()
+        return taken
+
+    def _get_sorted_instance(self, lines: list[Paged_Text_Line]) -> Self:
+        instance: Self = self.get_instance([])
+        for line in lines:
+            instance._append_line(line)
+        instance._pack()
+        return instance
+
+    def _as_columnar(self, other: Paged_Text_Lines | list[Paged_Text_Line]) -> Columnar_Paged_Text_Lines:
+        return other if isinstance(other, Columnar_Paged_Text_Lines) else Columnar_Paged_Text_Lines(other)
+
+    @property
+    def lines(self) -> list[Paged_Text_Line]:
+        """all rows as Paged_Text_Line objects. this creates every object, so avoid it for large inputs.
+        The list is a copy, so changes to it are not seen by self until it is assigned back."""
+        return list(self)
+
+    @lines.setter
+    def lines(self, lines: list[Paged_Text_Line]) -> None:
+        self._clear()
+        for line in sorted(lines):
+            self._append_line(line)
+        self._pack()
+
+    def __add__(self, other: Paged_Text_Lines | list[Paged_Text_Line]) -> Self:
+        """take union of two Text_Lines. rows of self are preferred if both have the same row."""
+        other_ = self._as_columnar(other)
+        positions: list[int] = []
+        last: Optional[int] = None
+        i, j = 0, 0
+        # merge two sorted idx sequences, taking only the first row of each idx
+        while i < len(self) or j < len(other_):
+            pos: int
+            idx: int
+            if j == len(other_) or (i < len(self) and self._idx[i] <= other_._idx[j]):
+                pos, idx = i, self._idx[i]
+                i += 1
+            else:
+                pos, idx = ~j, other_._idx[j]
+                j += 1
+            if idx != last:
+                positions.append(pos)
+                last = idx
+        return self._take(positions, others=other_)
+
+    def __sub__(self, other: Paged_Text_Lines | list[Paged_Text_Line]) -> Self:
+        """self minus other in set difference sense"""
+        excluded: set[int] = set(self._as_columnar(other)._idx)
+        return self._take(pos for pos, idx in enumerate(self._idx) if idx not in excluded)
+
+    @overload
+    def __getitem__(self, key: int) -> Paged_Text_Line:
+        ...
+
+    @overload
+    def __getitem__(self, key: slice) -> Self:
+        ...
+
+    def __getitem__(self, key: int | slice) -> Self | Paged_Text_Line:
+        if isinstance(key, slice):
+            # rows are kept sorted, so a reversed slice is taken in order as get_instance does for the others
+            return self._take(sorted(range(len(self))[key]))
+        if not -len(self) <= key < len(self):
+            raise IndexError("list index out of range")
+        return self._get_row(key % len(self))
+
+    def __iter__(self) -> Iterator[Paged_Text_Line]:
+        return (self._get_row(pos) for pos in range(len(self)))
+
+    def __len__(self) -> int:
+        return len(self._idx)
+
+    def get_instance(self, texts: list[Paged_Text_Line]) -> Self:
+        return Columnar_Paged_Text_Lines(texts)
+
+    def get_index(self) -> list[int]:
+        return self._idx.tolist()
+
+    def get_sorted(self) -> Self:
+        # rows are always kept sorted
+        return self
+
+    def select(self, rows: list[int]) -> Self:
+        """filter self into Self whose row numbers are in rows input."""
+        positions: list[int] = []
+        for row in sorted(set(rows)):
+            pos: int = self.search(row)
+            if pos != -1:
+                positions.append(pos)
+        return self._take(positions)
+
+    def exclude(self, rows: list[int]) -> Self:
+        """filter out self to Self whose rows numbers are not in rows input."""
+        excluded: set[int] = set(rows)
+        return self._take(pos for pos, idx in enumerate(self._idx) if idx not in excluded)
+
+    def overwrite(self, other: Paged_Text_Lines | list[Paged_Text_Line]) -> Self:
+        other_ = self._as_columnar(other)
+        return (self - other_) + other_
+
+    def remove_duplication(self) -> Self:
+        """remove duplicated lines and return the removed lines."""
+        return self._take(pos for pos in range(len(self)) if pos == 0 or self._idx[pos - 1] != self._idx[pos])
+
+    def _get_index_map(self) -> dict[int, int]:
+        """get mapping from row number to the first positional index with it. columns never change once packed."""
+        if self._index_map is None:
+            n: int = len(self._idx)
+            self._index_map = dict(zip(reversed(self._idx), range(n - 1, -1, -1)))
+        return self._index_map
+
+    def search(self, row_idx: int, left: int = 0, right: int = -1) -> int:
+        """search the positional index of self with the asked row. Return the index if found and -1 if not."""
+        if left == 0 and right == -1:
+            return self._get_index_map().get(row_idx, -1)
+        hi: int = len(self) if right == -1 else min(right + 1, len(self))
+        pos: int = bisect.bisect_left(self._idx, row_idx, left, max(hi, left))
+        return pos if pos < hi and self._idx[pos] == row_idx else -1
+
+    def _to_text_at(self, pos: int, combine: bool = True) -> str:
+        if pos in self._irregular:
+            return self._irregular[pos].to_text(combine=combine)
+        text: str = self._get_text(pos)
+        if not combine:
+            return text
+        if self._flags[pos] & HAS_PAGE:
+            return f"{text} {self._page[pos]}"
+        if pos in self._roman:
+            return f"{text} {self._roman[pos]}"
+        return text
+
+    def _find_flags(self, flag: int, is_set: bool = True) -> Iterator[int]:
+        """positional indices of rows with (or without) the flag, found by a regex scan over the flag bytes"""
+        values: bytes = bytes(v for v in range(4) if bool(v & flag) == is_set)
+        return (m.start() for m in re.finditer(b"[" + re.escape(values) + b"]", self._flags.tobytes()))
+
+    def get_page_numbers(self) -> list[Optional[int]]:
+        pages: list[Optional[int]] = self._page.tolist()  # type: ignore[assignment]
+        for pos in self._find_flags(HAS_PAGE, is_set=False):
+            pages[pos] = None
+        for pos, line in self._irregular.items():
+            pages[pos] = line.page_number
+        return pages
+
+    def get_page_orders(self) -> list[tuple[int, Page_Order]]:
+        """get positional indices and page orders of rows with page order set."""
+        orders: list[tuple[int, Page_Order]] = [
+            (pos, Page_Order(self._before[pos], self._after[pos])) for pos in self._find_flags(ORDER_SET)
+        ]
+        orders += [(pos, line.page_order) for pos, line in self._irregular.items() if line.page_order.set]
+        return sorted(orders, key=lambda order: order[0])
+
+    def has_page_order(self) -> bool:
+        return next(self._find_flags(ORDER_SET), None) is not None or any(
+            line.page_order.set for line in self._irregular.values()
+        )
+
+    def with_page_numbers(self, page_numbers: list[Optional[int]]) -> Self:
+        """get a copy of self whose page numbers are replaced and page orders are cleared.
+        Only the columns of page numbers and flags are made anew, and the other columns are shared with self, which never changes once packed."""
+        if len(page_numbers) != len(self):
+            raise ValueError(f"inconsistent number of rows. page_numbers={len(page_numbers)}, original={len(self)}")
+        updated: Self = self.get_instance([])
+        try:
+            updated._page = array("q", [-1 if number is None else number for number in page_numbers])
+        except OverflowError:
+            return super().with_page_numbers(page_numbers)
+        updated._flags = array("B", [0 if number is None else HAS_PAGE for number in page_numbers])
+        updated._before = updated._after = array("q", [-1]) * len(self)
+        updated._idx = self._idx
+        updated._buffer, updated._offsets = self._buffer, self._offsets
+        updated._roman = self._roman
+        updated._irregular = {pos: line.with_page_number(page_numbers[pos]) for pos, line in self._irregular.items()}
+        updated._index_map = self._index_map
+        return updated
+
+    def to_list_str(self, combine: bool = True) -> list[str]:
+        return [self._to_text_at(pos, combine=combine) for pos in range(len(self))]
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterator, Optional, overload
+
+from Text_Line import Paged_Text_Line, Text_Line
+from Text_Lines import Paged_Text_Lines
+
+# Self is only for annotations, so that typing_extensions is not imported at run time
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+
+class Lazy_Paged_Text_Lines(Paged_Text_Lines):
+    """Paged_Text_Lines that keeps the raw rows of a text and parses each row on first access, caching the result.
+    Rows of a text are numbered by their positions, so that the number of rows, row numbers and search need no parsing.
+    Whatever needs all rows, e.g., iteration, set operations or lines, parses the rest at once,
+    and from then on it behaves just as Paged_Text_Lines does."""
+
+    def __init__(self, text: str | list[str] | list[Paged_Text_Line] = "") -> None:
+        # raw rows while some rows may be left unparsed, and None once all rows are parsed into lines
+        self._texts: Optional[list[str]] = None
+        self._parsed: list[Optional[Paged_Text_Line]] = []
+        if isinstance(text, str):
+            self._set_texts(text.splitlines())
+        elif self._is_list_str(text) and len(text) > 0:
+            checker = Text_Line()
+            for s in text:
+                checker._validate_text(s)
+            self._set_texts(list(text))
+        else:
+            super().__init__(text)
+
+    def _set_texts(self, texts: list[str]) -> None:
+        self._index_map = None
+        self._index_version = -1
+        self._texts = texts
+        self._parsed = [None] * len(texts)
+
+    def _get_row(self, pos: int) -> Paged_Text_Line:
+        """get the row at the non-negative positional index, parsing it unless parsed already."""
+        line: Optional[Paged_Text_Line] = self._parsed[pos]
+        if line is None:
+            line = self._parsed[pos] = self._parse_row(pos)
+        return line
+
+    def _parse_row(self, pos: int) -> Paged_Text_Line:
+        texts: list[str] = self._texts  # type: ignore[assignment]
+        return Paged_Text_Line.from_text(pos, texts[pos], validate=False)
+
+    def _parse_all(self) -> None:
+        self.lines = [self._parse_row(pos) if line is None else line for pos, line in enumerate(self._parsed)]
+
+    def is_parsed(self) -> bool:
+        """test if all rows are parsed."""
+        return self._texts is None
+
+    @property
+    def lines(self) -> list[Paged_Text_Line]:  # type: ignore[override]
+        if self._texts is not None:
+            self._parse_all()
+        return self._lines
+
+    @lines.setter
+    def lines(self, lines: list[Paged_Text_Line]) -> None:
+        self._texts = None
+        self._parsed = []
+        Paged_Text_Lines.lines.fset(self, lines)  # type: ignore[attr-defined]
+
+    @overload
+    def __getitem__(self, key: int) -> Paged_Text_Line:
+        ...
+
+    @overload
+    def __getitem__(self, key: slice) -> Self:
+        ...
+
+    def __getitem__(self, key: int | slice) -> Self | Paged_Text_Line:
+        if self._texts is None:
+            return super().__getitem__(key)
+        if isinstance(key, slice):
+            rows: list[Paged_Text_Line] = [self._get_row(pos) for pos in range(len(self._texts))[key]]
+            return self._get_sorted_instance(rows) if key.step is None or key.step > 0 else self.get_instance(rows)
+        if not -len(self._texts) <= key < len(self._texts):
+            raise IndexError("list index out of range")
+        return self._get_row(key % len(self._texts))
+
+    def __iter__(self) -> Iterator[Paged_Text_Line]:
+        # iterating visits every row, mostly, so that all rows are parsed at once, which is faster than one by one
+        return iter(self.lines)
+
+    def __len__(self) -> int:
+        return len(self._lines) if self._texts is None else len(self._texts)
+
+    def get_instance(self, texts: list[Paged_Text_Line]) -> Self:
+        return Lazy_Paged_Text_Lines(texts)
+
+    def get_index(self) -> list[int]:
+        return super().get_index() if self._texts is None else list(range(len(self._texts)))
+
+    def get_sorted(self) -> Self:
+        # rows of a text are sorted from the start
+        return super().get_sorted() if self._texts is None else self
+
+    def _get_index_map(self) -> dict[int, int]:
+        if self._texts is not None:
+            self._parse_all()
+        return super()._get_index_map()
+
+    def search(self, row_idx: int, left: int = 0, right: int = -1) -> int:
+        if self._texts is None:
+            return super().search(row_idx, left, right)
+        last: int = len(self._texts) - 1 if right == -1 else min(right, len(self._texts) - 1)
+        return row_idx if left <= row_idx <= last and row_idx >= 0 else -1
+
+    def has_row(self, row: int) -> bool:
+        return super().has_row(row) if self._texts is None else 0 <= row < len(self._texts)
+
+    def has_page_order(self) -> bool:
+        # a page order needs "->" in the raw row, so that the other rows are never parsed
+        if self._texts is None:
+            return super().has_page_order()
+        return any(self._get_row(pos).page_order.set for pos, s in enumerate(self._texts) if "->" in s)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import codecs
+import locale
+import mmap
+import re
+from array import array
+from pathlib import Path
+from typing import Final, Iterator, Optional
+
+from Text_Line import Paged_Text_Line
+from Text_Lines import Paged_Text_Lines
+
+# ascii characters that patterns of Paged_Text_Line can match: whitespace, digits, "-", ">" and roman letters
+_TAIL_BYTES: Final[frozenset[int]] = frozenset(Paged_Text_Line.tail_chars.encode())
+# line breaks of str.splitlines and universal newlines other than "\n" and "\r\n". files having them are not mapped.
+_IRREGULAR_LINE_BREAK: Final[re.Pattern] = re.compile(b"\r(?!\n)|[\x0b\x0c\x1c\x1d\x1e]|\xc2\x85|\xe2\x80[\xa8\xa9]")
+
+
+class Mapped_Text:
+    """text file mapped into memory. rows are found on bytes, and only the tail of each row that the page parser needs is decoded.
+    The rest of each row, the head, is never decoded and can be written out as bytes, so that the text is never held in memory as str.
+    The file must be encoded in UTF-8, and its rows must be separated by "\\n" or "\\r\\n". see can_map."""
+
+    def __init__(self, file: Path) -> None:
+        self._file = open(file, mode="rb")
+        self.buffer: mmap.mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view: memoryview = memoryview(self.buffer)
+        # row i is buffer[starts[i] : ends[i]], whose tail begins at tails[i]
+        self.starts: array[int] = array("q")
+        self.tails: array[int] = array("q")
+        self.ends: array[int] = array("q")
+        self._find_rows()
+
+    def __enter__(self) -> Mapped_Text:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def close(self) -> None:
+        self._view.release()
+        self.buffer.close()
+        self._file.close()
+
+    @classmethod
+    def can_map(cls, file: Path) -> bool:
+        """test if file can be mapped so that rows are the same as open(file).read().splitlines() gives."""
+        if codecs.lookup(locale.getpreferredencoding(False)).name != "utf-8" or file.stat().st_size == 0:
+            return False
+        with open(file, mode="rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _IRREGULAR_LINE_BREAK.search(buffer) is None
+
+    def _find_rows(self) -> None:
+        buffer: mmap.mmap = self.buffer
+        size: int = len(buffer)
+        start: int = 0
+        while start < size:
+            end: int = buffer.find(b"\n", start)
+            next_start: int = size if end == -1 else end + 1
+            if end == -1:
+                end = size
+            if end > start and buffer[end - 1] == 0x0D:
+                end -= 1
+            self.starts.append(start)
+            self.tails.append(self._find_tail(start, end))
+            self.ends.append(end)
+            start = next_start
+
+    def _find_tail(self, start: int, end: int) -> int:
+        """find where the tail of the row begins, in the same way as Paged_Text_Line.find_tail but on bytes.
+        The tail starts with a character that no pattern of Paged_Text_Line can match, so that parsing the tail gives the same result as parsing the whole row."""
+        buffer: mmap.mmap = self.buffer
+        pos: int = end
+        while pos > start:
+            byte: int = buffer[pos - 1]
+            if byte < 0x80:
+                if byte not in _TAIL_BYTES:
+                    return pos - 1
+                pos -= 1
+                continue
+            # non-ascii character. find its leading byte and check it as str.
+            lead: int = pos - 1
+            while lead > start and 0x80 <= buffer[lead] < 0xC0:
+                lead -= 1
+            char: str = buffer[lead:pos].decode(errors="replace")
+            if not (char.isspace() or char.isdecimal()):
+                return lead
+            pos = lead
+        return start
+
+    def get_head(self, idx: int) -> memoryview:
+        return self._view[self.starts[idx] : self.tails[idx]]
+
+    def get_head_text(self, idx: int) -> str:
+        return bytes(self.get_head(idx)).decode()
+
+    def get_tail_text(self, idx: int) -> str:
+        return self.buffer[self.tails[idx] : self.ends[idx]].decode()
+
+    def get_lines(self) -> Paged_Text_Lines:
+        """parse the tail of each row. text of each line is the tail with page number separated, and the head is left out."""
+        return Paged_Text_Lines(
+            [Paged_Text_Line.from_text(idx, self.get_tail_text(idx), validate=False) for idx in range(len(self))]
+        )
+
+    def iter_bytes(self, lines: Paged_Text_Lines, add_last_space: bool = False) -> Iterator[bytes | memoryview]:
+        """join the head of each row and the tail given by lines, whose rows must correspond to those of self."""
+        last: Optional[str] = None
+        for idx, line in enumerate(lines):
+            if idx != 0:
+                yield b"\n"
+            last = line.to_text()
+            yield self.get_head(idx)
+            yield last.encode()
+        if add_last_space and last is not None and (last != "" or self.tails[-1] != self.starts[-1]):
+            yield b"\n"
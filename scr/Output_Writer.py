@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import io
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import IO, Callable, Iterable, Literal, Optional, TypeAlias
+
+from Run_Stats import count_size
+
+# when to flush outputs to disk. "none" leaves it to OS, "file" fsyncs every output before it replaces the target,
+# "batch" holds outputs in temporary files and flushes them at once before they replace the targets.
+Fsync_Policy: TypeAlias = Literal["none", "file", "batch"]
+# temporary file and the target it replaces
+Pending_Output: TypeAlias = tuple[Path, Path]
+
+
+def get_temp_path(path: Path) -> Path:
+    """temporary file next to the target, so that os.replace never crosses file systems."""
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+
+def fsync_dir(dir: Path) -> None:
+    """flush the directory entry, which makes a rename durable. not supported on some platforms."""
+    try:
+        fd: int = os.open(dir, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def fsync_files(files: Iterable[Path]) -> None:
+    for file in files:
+        with open(file, mode="rb") as f:
+            os.fsync(f.fileno())
+
+
+class Output_Writer:
+    """write outputs atomically. lines are streamed into a temporary file in the same directory,
+    which replaces the target only when all lines are written, so that the target is never left half-written.
+    With fsync="batch", outputs are kept pending until batch_size of them are written or flush is called.
+    Outputs may be written from threads at the same time. bytes written are counted as "bytes_out", see Run_Stats."""
+
+    def __init__(
+        self, buffer_size: int = io.DEFAULT_BUFFER_SIZE, fsync: Fsync_Policy = "none", batch_size: int = 64
+    ) -> None:
+        self.buffer_size: int = buffer_size
+        self.fsync: Fsync_Policy = fsync
+        self.batch_size: int = batch_size
+        self.pending: list[Pending_Output] = []
+        self._lock = threading.RLock()
+
+    def __enter__(self) -> Output_Writer:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write(
+        self,
+        write: Callable[[IO], None],
+        path: Path,
+        mode: str = "w",
+        before_commit: Optional[Callable[[], None]] = None,
+    ) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path: Path = get_temp_path(path)
+        try:
+            with open(temp_path, mode=mode, buffering=self.buffer_size) as tf:
+                write(tf)
+                if self.fsync == "file":
+                    tf.flush()
+                    os.fsync(tf.fileno())
+            if before_commit is not None:
+                before_commit()
+            # counted on the temporary file, since with fsync="batch", the target is not replaced yet
+            count_size("bytes_out", temp_path)
+            if path.exists():
+                shutil.copymode(path, temp_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return self._commit(temp_path, path)
+
+    def _commit(self, temp_path: Path, path: Path) -> Path:
+        if self.fsync == "batch":
+            self.adopt([(temp_path, path)])
+        else:
+            os.replace(temp_path, path)
+            if self.fsync == "file":
+                fsync_dir(path.parent)
+        return path
+
+    def write_lines(
+        self,
+        lines: Iterable[str],
+        path: Path,
+        add_last_space: bool = False,
+        before_commit: Optional[Callable[[], None]] = None,
+    ) -> Path:
+        """write lines joined by newline into path. before_commit is called when all lines are written.
+        If it raises, the temporary file is removed and the target is left untouched."""
+
+        def write(tf: IO) -> None:
+            last: str = ""
+            for i, line in enumerate(lines):
+                if i != 0:
+                    tf.write("\n")
+                tf.write(line)
+                last = line
+            if add_last_space and last != "":
+                tf.write("\n")
+
+        return self._write(write, path, before_commit=before_commit)
+
+    def write_bytes(
+        self, chunks: Iterable[bytes | memoryview], path: Path, before_commit: Optional[Callable[[], None]] = None
+    ) -> Path:
+        """write chunks of bytes as they are into path. see write_lines."""
+
+        def write(tf: IO) -> None:
+            for chunk in chunks:
+                tf.write(chunk)
+
+        return self._write(write, path, mode="wb", before_commit=before_commit)
+
+    def write_text(self, text: str, path: Path) -> Path:
+        return self.write_lines([text], path)
+
+    def copy_file(self, source: Path, path: Path) -> Path:
+        """copy source as it is into path."""
+
+        def write(tf: IO) -> None:
+            with open(source, mode="rb") as f:
+                shutil.copyfileobj(f, tf, self.buffer_size)
+
+        return self._write(write, path, mode="wb")
+
+    def link_file(self, source: Path, path: Path) -> Path:
+        """hard-link path to source, which copies no data. the target is replaced by the link atomically.
+        Where hard links are not supported, e.g., across file systems, source is copied instead."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path: Path = get_temp_path(path)
+        temp_path.unlink(missing_ok=True)
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            return self.copy_file(source, path)
+        return self._commit(temp_path, path)
+
+    def adopt(self, pending: list[Pending_Output]) -> None:
+        """take over pending outputs, e.g., written by another process, and flush them when a batch is full."""
+        with self._lock:
+            self.pending += pending
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        """commit pending outputs. their data are flushed first, then they replace the targets,
+        and then each directory is flushed once however many outputs it has."""
+        with self._lock:
+            pending, self.pending = self.pending, []
+        if pending == []:
+            return
+        fsync_files(temp_path for temp_path, _ in pending)
+        for temp_path, path in pending:
+            os.replace(temp_path, path)
+        for dir in {path.parent for _, path in pending}:
+            fsync_dir(dir)
+
+    def discard(self) -> None:
+        """remove pending outputs without committing them."""
+        with self._lock:
+            pending, self.pending = self.pending, []
+        for temp_path, _ in pending:
+            temp_path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        self.flush()
@@ -1,44 +1,108 @@
 from __future__ import annotations
 
-from typing import Iterable, Optional
+import dataclasses
+import itertools
+import operator
+from typing import Callable, Final, Iterable, Iterator, Literal, Optional, TypeAlias
 
 import click
 
-from Text_Line import Paged_Text_Line
+from Mapped_Text import Mapped_Text
+from Text_Line import Page_Order, Paged_Text_Line
 from Text_Lines import Paged_Text_Lines
 
+# "loop" walks rows one by one, "batch" processes whole columns at once. both give the same result.
+Kernel: TypeAlias = Literal["loop", "batch"]
+# what to do when page numbers are found not increasing.
+# "ask" asks user interactively, "abort" aborts without asking, "warn" shows the rows and continues.
+# "ignore" and "report" continue silently. with "report", the rows are meant to be read from the issues, see Issue.
+Disorder_Policy: TypeAlias = Literal["ask", "abort", "warn", "ignore", "report"]
+# "disorder" is a row whose page number is less than one above after re-numbering, "missing" is a row with no page
+# number, and "mapping" is a mapping row that looks unintended, see Re_Numbering._check_mapping.
+Issue_Kind: TypeAlias = Literal["disorder", "missing", "mapping"]
+# positional index, kind and detail of a row found while re-numbering
+Found_Row: TypeAlias = tuple[int, Issue_Kind, str]
+
+_INIT_PAGE: Final[int] = -(10**5)  # init value small enough
+_get_position: Callable[[Found_Row], int] = operator.itemgetter(0)
+
+
+class Order_Disturbed(click.Abort):
+    """aborted because some rows disturb the order of page numbers. the message holds the rows."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Issue:
+    """row found problematic while re-numbering. line counts from 1, and text is the whole row as output."""
+
+    kind: Issue_Kind
+    line: int
+    page: Optional[int]
+    text: str
+    detail: str = ""
+
 
 class Re_Numbering:
-    def __init__(self, lines: Paged_Text_Lines) -> None:
+    def __init__(self, lines: Paged_Text_Lines, kernel: Kernel = "loop", on_disorder: Disorder_Policy = "ask") -> None:
         self.lines: Paged_Text_Lines = lines
+        self.kernel: Kernel = kernel
+        self.on_disorder: Disorder_Policy = on_disorder
+        # issues found by the last re_numbering, in the order of rows
+        self.issues: list[Issue] = []
+
+    def _get_renumbered_line(self, line: Paged_Text_Line, number: Optional[int]) -> Paged_Text_Line:
+        """get a new line with the page number of input line overwritten by input number. text is not parsed again."""
+        return line.with_page_number(number)
 
     def _update_numbering(self, new_numbers: list[Optional[int]]) -> Paged_Text_Lines:
-        """get new texts with new page number of self.lines overwritten by input numbers."""
-        if len(new_numbers) != len(self.lines):
-            raise ValueError(f"inconsistent number of rows. new_numbers={len(new_numbers)}, original={self.lines}")
-        return Paged_Text_Lines(
-            [
-                Paged_Text_Line(
-                    text=self.lines[i].text,
-                    page_number=number,
-                    roman_page_number=self.lines[i].roman_page_number,
-                    sep=self.lines[i].sep,
-                )
-                for i, number in enumerate(new_numbers)
-            ]
-        )
+        """get new texts with new page number of self.lines overwritten by input numbers. self.lines is left unchanged."""
+        return self.lines.with_page_numbers(new_numbers)
+
+    def _is_order_disturbing(self, line: Paged_Text_Line, last: int) -> tuple[bool, int]:
+        """test if the line breaks increasing order of page numbers, and return the last page number seen after it."""
+        if line.page_number is None:
+            return False, last
+        return line.page_number < last, line.page_number
 
     def _get_order_disturbing_rows(self, lines: Paged_Text_Lines) -> list[Paged_Text_Line]:
         """get rows at which page numbers are not increasing or blank."""
         bad_rows: list[Paged_Text_Line] = []
-        last: int = -(10**5)  # init value small enough
+        last: int = _INIT_PAGE
         for line in lines:
-            if line.page_number is not None:
-                if line.page_number < last:
-                    bad_rows.append(line)
-                last = line.page_number
+            is_bad, last = self._is_order_disturbing(line, last)
+            if is_bad:
+                bad_rows.append(line)
         return bad_rows
 
+    def _get_order_disturbing_rows_batch(self, lines: Paged_Text_Lines) -> list[Paged_Text_Line]:
+        """batch version of _get_order_disturbing_rows. page numbers are compared with their predecessors all at once."""
+        return [lines[i] for i, _, _ in self._find_disorder_batch(lines.get_page_numbers())]
+
+    def _find_disorder_batch(self, numbers: list[Optional[int]]) -> list[Found_Row]:
+        """find positions of page numbers less than their predecessors, compared all at once."""
+        positions: list[int] = []
+        pages: list[int] = []
+        for i, page in enumerate(numbers):
+            if page is not None:
+                positions.append(i)
+                pages.append(page)
+        # pages[k] < pages[k - 1], where the first page is compared with the init value
+        decreasing = map(operator.lt, pages, itertools.chain([_INIT_PAGE], pages))
+        return [
+            (positions[k], "disorder", f"page {pages[k]} is less than {pages[k - 1]} above")
+            for k in itertools.compress(range(len(pages)), decreasing)
+        ]
+
+    def _check_mapping(self, order: Page_Order, slide: int, last_original: int) -> Optional[str]:
+        """tell why the mapping row looks unintended, if so. slide is the one in effect above the row,
+        and last_original is the page number above the row before re-numbering, where a mapping row counts as its old page.
+        """
+        if order.before == order.after and slide == 0:
+            return f"{order.before}->{order.after} changes nothing"
+        if order.before < last_original:
+            return f"old page {order.before} is less than {last_original} above"
+        return None
+
     def _ask_continue(self, msg: Optional[str] = None, with_displaying: Optional[str] = None) -> bool:
         """ask user whether to continue, and abort if the answer is no. this method is intended to be called when some problematic rows are found in the preceding process."""
         if with_displaying is not None:
@@ -46,32 +110,176 @@ class Re_Numbering:
         _msg: str = "Some pages seem badly numbered. continue?" if msg is None else msg
         return click.confirm(text=_msg)
 
+    def _get_row_text(self, line: Paged_Text_Line) -> str:
+        return line.to_text()
+
     def _get_contents_of_rows(self, non_numbered: Iterable[Paged_Text_Line]) -> str:
-        return "\n".join([line.to_text() for line in non_numbered])
+        return "\n".join([self._get_row_text(line) for line in non_numbered])
+
+    def _get_new_number(self, line: Paged_Text_Line, slide: int) -> tuple[Optional[int], int]:
+        """get new number of the line together with the slide effective from the line on."""
+        if line.page_order.set:
+            return line.page_order.after, line.page_order.after - line.page_order.before
+        elif line.page_number is not None:
+            return line.page_number + slide, slide
+        return None, slide
 
     def _get_new_numbers(self) -> list[Optional[int]]:
-        """analyze self rows and return new numbers by which existing numbers should be overwritten. this method also record blank-numbered pages."""
+        """analyze self rows and return new numbers by which existing numbers should be overwritten."""
+        return self._scan()[0]
+
+    def _scan(self) -> tuple[list[Optional[int]], list[Found_Row]]:
+        """get new numbers as _get_new_numbers does, together with rows to be reported found in the same pass."""
         slide: int = 0
+        last: int = _INIT_PAGE
+        last_original: int = _INIT_PAGE
         new_numbers: list[Optional[int]] = []
-        for line in self.lines:
-            if line.page_order.set:
-                new_numbers.append(line.page_order.after)
-                slide = line.page_order.after - line.page_order.before
-            elif line.page_number is not None:
-                new_numbers.append(line.page_number + slide)
-            else:
-                new_numbers.append(None)
+        found: list[Found_Row] = []
+        for i, line in enumerate(self.lines):
+            order: Page_Order = line.page_order
+            if order.set and (detail := self._check_mapping(order, slide, last_original)) is not None:
+                found.append((i, "mapping", detail))
+            number, slide = self._get_new_number(line, slide)
+            new_numbers.append(number)
+            if number is None:
+                found.append((i, "missing", ""))
+                continue
+            if number < last:
+                found.append((i, "disorder", f"page {number} is less than {last} above"))
+            last = number
+            # page number before re-numbering, which is the old page for a mapping row
+            last_original = number - slide
+        return new_numbers, found
+
+    def _scan_batch(self) -> tuple[list[Optional[int]], list[Found_Row]]:
+        """batch version of _scan. rows to be reported are found column by column, except mapping rows visited one by one."""
+        orders: list[tuple[int, Page_Order]] = self.lines.get_page_orders()
+        new_numbers: list[Optional[int]] = self._get_new_numbers_batch(orders)
+        found: list[Found_Row] = []
+        slide: int = 0
+        for pos, order in orders:
+            # the nearest row above with page number, whose slide is that of the last mapping
+            last_original: int = _INIT_PAGE
+            for above in range(pos - 1, -1, -1):
+                if (number := new_numbers[above]) is not None:
+                    last_original = number - slide
+                    break
+            detail: Optional[str] = self._check_mapping(order, slide, last_original)
+            if detail is not None:
+                found.append((pos, "mapping", detail))
+            slide = order.after - order.before
+        found += [
+            (i, "missing", "")
+            for i in itertools.compress(range(len(new_numbers)), map(operator.is_, new_numbers, itertools.repeat(None)))
+        ]
+        found += self._find_disorder_batch(new_numbers)
+        # sort merges the sorted runs, and it is stable so that a mapping row comes first at the same row as _scan does
+        found.sort(key=_get_position)
+        return new_numbers, found
+
+    def _get_new_numbers_batch(self, orders: Optional[list[tuple[int, Page_Order]]] = None) -> list[Optional[int]]:
+        """batch version of _get_new_numbers. each mapping row fixes the slide of the segment up to the next mapping row,
+        so the slide is forward-filled segment by segment instead of carried row by row. segments with no slide, such as
+        the rows before the first mapping or after a trivial mapping x -> x, are left as they are.
+        orders are those of self.lines, given if already at hand."""
+        new_numbers: list[Optional[int]] = self.lines.get_page_numbers()
+        orders = self.lines.get_page_orders() if orders is None else orders
+        ends: list[int] = [pos for pos, _ in orders[1:]] + [len(new_numbers)]
+        for (pos, order), end in zip(orders, ends):
+            new_numbers[pos] = order.after
+            slide: int = order.after - order.before
+            if slide != 0:
+                new_numbers[pos + 1 : end] = [None if p is None else p + slide for p in new_numbers[pos + 1 : end]]
         return new_numbers
 
-    def _ensure_no_unintended_order_disturber(self, lines: Paged_Text_Lines) -> None:
-        """check rows are properly ordered. if not, ask user whether to continue."""
-        bad_rows: list[Paged_Text_Line] = self._get_order_disturbing_rows(lines)
-        if bad_rows != [] and not self._ask_continue(with_displaying=self._get_contents_of_rows(bad_rows)):
+    def _confirm_order_disturbers(self, bad_rows: list[Paged_Text_Line]) -> None:
+        """deal with rows disturbing the order according to self.on_disorder. by default, ask user whether to continue and abort if the answer is no."""
+        if bad_rows == [] or self.on_disorder in ("ignore", "report"):
+            return
+        contents: str = self._get_contents_of_rows(bad_rows)
+        if self.on_disorder == "abort":
+            raise Order_Disturbed(f"some pages seem badly numbered.\n{contents}")
+        elif self.on_disorder == "warn":
+            print(f"Some pages seem badly numbered.\n{contents}")
+        elif not self._ask_continue(with_displaying=contents):
             raise click.Abort()
 
+    def _get_issue(self, line: Paged_Text_Line, kind: Issue_Kind, detail: str) -> Issue:
+        return Issue(kind, line.idx + 1, line.page_number, self._get_row_text(line), detail)
+
     def re_numbering(self) -> Paged_Text_Lines:
-        """get re-numbered rows. if some problem are found during the process, then it interactively ask user whether to continue. if user chooses to stop, no change will be made to the original text."""
-        new_numbers: list[Optional[int]] = self._get_new_numbers()
+        """get re-numbered rows. rows disturbing the order, rows with no page number and unintended mappings are found
+        in the same pass and kept in self.issues. rows disturbing the order are dealt with according to self.on_disorder,
+        see _confirm_order_disturbers. if user chooses to stop, no change will be made to the original text."""
+        new_numbers, found = self._scan_batch() if self.kernel == "batch" else self._scan()
         updated = self._update_numbering(new_numbers=new_numbers)
-        self._ensure_no_unintended_order_disturber(updated)
+        self.issues = [self._get_issue(updated[pos], kind, detail) for pos, kind, detail in found]
+        self._confirm_order_disturbers([updated[pos] for pos, kind, _ in found if kind == "disorder"])
         return updated
+
+
+class Re_Numbering_Stream(Re_Numbering):
+    """re-numbering rows one at a time.
+    Rows are parsed, re-numbered and checked lazily, so that memory stays flat no matter how many rows the input has.
+    Issues are collected only if collect_issues is True, since rows with no page number can be as many as the rows."""
+
+    def __init__(
+        self, texts: Iterable[str], on_disorder: Disorder_Policy = "ask", collect_issues: bool = False
+    ) -> None:
+        super().__init__(Paged_Text_Lines(), on_disorder=on_disorder)
+        self.texts: Iterable[str] = texts
+        self.collect_issues: bool = collect_issues
+        self.bad_rows: list[Paged_Text_Line] = []
+
+    def _iter_lines(self) -> Iterator[Paged_Text_Line]:
+        """split input texts into rows in the same way as str.splitlines does for the whole text."""
+        idx: int = 0
+        for chunk in self.texts:
+            for text in chunk.splitlines() or [chunk]:
+                yield Paged_Text_Line.from_text(idx, text, validate=False)
+                idx += 1
+
+    def re_numbering_stream(self) -> Iterator[Paged_Text_Line]:
+        """yield re-numbered rows one by one. order disturbing rows are collected into self.bad_rows along the way, see ensure_no_unintended_order_disturber.
+        With collect_issues, issues are collected into self.issues in the same way as re_numbering does."""
+        slide: int = 0
+        last: int = _INIT_PAGE
+        last_original: int = _INIT_PAGE
+        self.bad_rows = []
+        self.issues = []
+        for line in self._iter_lines():
+            order: Page_Order = line.page_order
+            mapping: Optional[str] = self._check_mapping(order, slide, last_original) if order.set else None
+            number, slide = self._get_new_number(line, slide)
+            updated: Paged_Text_Line = self._get_renumbered_line(line, number)
+            if mapping is not None and self.collect_issues:
+                self.issues.append(self._get_issue(updated, "mapping", mapping))
+            if number is None:
+                if self.collect_issues:
+                    self.issues.append(self._get_issue(updated, "missing", ""))
+            else:
+                if number < last:
+                    self.bad_rows.append(updated)
+                    if self.collect_issues:
+                        self.issues.append(
+                            self._get_issue(updated, "disorder", f"page {number} is less than {last} above")
+                        )
+                last = number
+                last_original = number - slide
+            yield updated
+
+    def ensure_no_unintended_order_disturber(self) -> None:
+        """ask user whether to continue if the rows yielded so far are not properly ordered. this is intended to be called after the stream is exhausted."""
+        self._confirm_order_disturbers(self.bad_rows)
+
+
+class Re_Numbering_Mapped(Re_Numbering):
+    """re-numbering rows of a mapped file. only the tails of rows are parsed and re-numbered, see Mapped_Text.
+    Heads of rows are decoded only to show problematic rows."""
+
+    def __init__(self, text: Mapped_Text, kernel: Kernel = "loop", on_disorder: Disorder_Policy = "ask") -> None:
+        super().__init__(text.get_lines(), kernel=kernel, on_disorder=on_disorder)
+        self.text: Mapped_Text = text
+
+    def _get_row_text(self, line: Paged_Text_Line) -> str:
+        return self.text.get_head_text(line.idx) + line.to_text()
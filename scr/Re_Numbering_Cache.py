@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Final, Optional, TypedDict
+
+# bump this when the layout of the cache file changes
+CACHE_FORMAT: Final[int] = 1
+CACHE_FILE_NAME: Final[str] = ".renumbering_cache.json"
+
+
+class Cache_Entry(TypedDict):
+    input_hash: str
+    options_hash: str
+    output: str
+    output_hash: str
+    # size and mtime of the output when it was hashed, to avoid hashing it again if untouched
+    output_stat: list[int]
+    # number of the run that used the entry last. the least recently used entries are evicted first.
+    used: int
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file, mode="rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@functools.cache
+def get_tool_hash() -> str:
+    """hash of the source code of this tool. any change to it, such as a new version, invalidates the whole cache."""
+    digest = hashlib.sha256(str(CACHE_FORMAT).encode())
+    for source in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def get_options_hash(options: dict[str, Any]) -> str:
+    return hash_bytes(json.dumps(options, sort_keys=True, default=str).encode())
+
+
+def _get_stat(file: Path) -> list[int]:
+    stat = os.stat(file)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class Re_Numbering_Cache:
+    """persistent cache of re-numbered files, kept as a JSON sidecar file.
+    Each input file is mapped to the hash of its content and of the options, and the path and hash of its output.
+    A file is skipped if all of them are the same as the last run and the output is left as it was written."""
+
+    def __init__(self, path: Path, options: dict[str, Any], max_entries: int = 10000) -> None:
+        self.path: Path = path
+        self.options_hash: str = get_options_hash(options)
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.run: int = 0
+        self._entries: dict[str, Cache_Entry] = {}
+        # hash of input files looked up but not recorded yet
+        self._input_hashes: dict[str, str] = {}
+        self._load()
+
+    @classmethod
+    def in_dir(cls, dir: Path, options: dict[str, Any], max_entries: int = 10000) -> Re_Numbering_Cache:
+        return cls(dir / CACHE_FILE_NAME, options, max_entries=max_entries)
+
+    def _load(self) -> None:
+        """load the cache file. the file is ignored if broken or written by another version of the tool."""
+        try:
+            with open(self.path) as f:
+                data: dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT or data.get("tool") != get_tool_hash():
+            return
+        self.run = int(data.get("run", 0)) + 1
+        self._entries = data.get("entries", {})
+
+    def _get_key(self, file: Path) -> str:
+        return str(file.resolve())
+
+    def _is_output_intact(self, entry: Cache_Entry, file_out: Path) -> bool:
+        try:
+            stat: list[int] = _get_stat(file_out)
+        except OSError:
+            return False
+        if stat == entry["output_stat"]:
+            return True
+        if hash_file(file_out) != entry["output_hash"]:
+            return False
+        entry["output_stat"] = stat
+        return True
+
+    def lookup(self, file: Path, file_out: Path) -> bool:
+        """test if file is re-numbered into file_out with the same options and content, and count hits and misses."""
+        key: str = self._get_key(file)
+        input_hash: str = hash_file(file)
+        entry: Optional[Cache_Entry] = self._entries.get(key)
+        if (
+            entry is not None
+            and entry["input_hash"] == input_hash
+            and entry["options_hash"] == self.options_hash
+            and entry["output"] == str(file_out.resolve())
+            and self._is_output_intact(entry, file_out)
+        ):
+            entry["used"] = self.run
+            self.hits += 1
+            return True
+        self._input_hashes[key] = input_hash
+        self.misses += 1
+        return False
+
+    def record(self, file: Path, file_out: Path) -> None:
+        """record that file is re-numbered into file_out. file must be looked up beforehand.
+        If file_out is file itself, the output is recorded as the input, so that the next run hits."""
+        key: str = self._get_key(file)
+        input_hash: Optional[str] = self._input_hashes.pop(key, None)
+        if input_hash is None:
+            raise KeyError(f"{file} is recorded without lookup.")
+        output_hash: str = hash_file(file_out)
+        self._entries[key] = Cache_Entry(
+            input_hash=output_hash if str(file_out.resolve()) == key else input_hash,
+            options_hash=self.options_hash,
+            output=str(file_out.resolve()),
+            output_hash=output_hash,
+            output_stat=_get_stat(file_out),
+            used=self.run,
+        )
+
+    def _evict(self) -> None:
+        """drop entries of files that no longer exist, and then the least recently used ones beyond max_entries."""
+        for key in [key for key, entry in self._entries.items() if entry["used"] != self.run]:
+            if not os.path.exists(key):
+                del self._entries[key]
+        if len(self._entries) > self.max_entries:
+            kept = sorted(self._entries.items(), key=lambda item: item[1]["used"], reverse=True)[: self.max_entries]
+            self._entries = dict(kept)
+
+    def save(self) -> None:
+        """write the cache file atomically, so that an interrupted run leaves the last one intact."""
+        self._evict()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path: Path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, mode="w") as f:
+                json.dump(
+                    {"format": CACHE_FORMAT, "tool": get_tool_hash(), "run": self.run, "entries": self._entries}, f
+                )
+            os.replace(temp_path, self.path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    def summary(self) -> str:
+        return f"cache: {self.hits} hits, {self.misses} misses."
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+from pathlib import Path
+from typing import IO, Any, Optional
+
+from Re_Numbering import Issue
+
+# suffixes of report files written as NDJSON, one issue per row. the others are written as a JSON document.
+NDJSON_SUFFIXES: list[str] = [".ndjson", ".jsonl"]
+
+
+class Re_Numbering_Report:
+    """issues found while re-numbering files, see Issue.
+    With ndjson, each issue is written to it as a JSON object with the file as soon as the file is added, and nothing is kept
+    but the counts. otherwise issues are kept to be saved as one JSON document."""
+
+    def __init__(self, ndjson: Optional[IO[str]] = None) -> None:
+        self.ndjson: Optional[IO[str]] = ndjson
+        self.files: dict[str, list[Issue]] = {}
+        self.counts: dict[str, int] = {"disorder": 0, "missing": 0, "mapping": 0}
+
+    def add(self, file: Path, issues: list[Issue]) -> None:
+        for issue in issues:
+            self.counts[issue.kind] += 1
+        if self.ndjson is None:
+            self.files[str(file)] = self.files.get(str(file), []) + issues
+            return
+        for issue in issues:
+            self.ndjson.write(json.dumps(dict(file=str(file), **dataclasses.asdict(issue)), ensure_ascii=False) + "\n")
+        self.ndjson.flush()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "counts": dict(self.counts),
+            "files": [
+                {"file": file, "issues": [dataclasses.asdict(issue) for issue in issues]}
+                for file, issues in self.files.items()
+            ],
+        }
+
+    def save(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2))
+
+    def summary(self) -> str:
+        return f"report: {self.counts['disorder']} disorder, {self.counts['missing']} missing, {self.counts['mapping']} mapping."
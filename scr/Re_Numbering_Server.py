@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator, Optional, TypeAlias
+
+# a job is {"path": file} or {"text": text}, with "options" of JOB_OPTIONS and "id", which is echoed back.
+# {"op": "ping"} and {"op": "shutdown"} are also jobs. see run_job.
+Job: TypeAlias = dict[str, Any]
+# reply to a job, as JSON object with "ok", "error", "output" and "issues", and "saved_file" or "text"
+Reply: TypeAlias = dict[str, Any]
+
+# options of jobs and their defaults, see _re_numbering.
+# jobs cannot ask user, so that on_disorder="ask" is taken as "abort".
+JOB_OPTIONS: dict[str, Any] = dict(
+    dir_out=None,
+    prefix="",
+    suffix="_renumbered",
+    join_with="",
+    overwrite=False,
+    missing_page_number=False,
+    add_last_space=False,
+    on_disorder="abort",
+    stream=False,
+    mapped=False,
+)
+# user id that sockets and their directory must be owned by, or None where there are no user ids
+_UID: Optional[int] = os.getuid() if hasattr(os, "getuid") else None
+# socket that servers listen on and clients connect to unless told otherwise.
+# it is in the runtime directory of the user, or in a directory of the user's own in the temporary directory,
+# so that other users can neither take the path first nor connect to it.
+DEFAULT_SOCKET: Path = Path(
+    os.environ.get("RENUMBERING_SOCKET")
+    or os.path.join(
+        os.environ.get("XDG_RUNTIME_DIR") or os.path.join(tempfile.gettempdir(), f"renumbering-{_UID or 0}"),
+        "renumbering.sock",
+    )
+)
+# path that issues of a text job are reported with
+_TEXT_FILE: Path = Path("<text>")
+
+
+def run_job(job: Job) -> Reply:
+    """run a job in this process, and reply with the result, issues found and what was printed.
+    Errors of the job, including bad jobs, are replied instead of raised. main is imported on the first job, see warm_up."""
+    reply: Reply = {"id": job.get("id"), "ok": False, "error": None, "output": "", "issues": []}
+    try:
+        return _run_job(job, reply)
+    except Exception as e:
+        return dict(reply, ok=False, error=str(e) or e.__class__.__name__)
+
+
+def _check_job(job: Job) -> Optional[str]:
+    """get why the job is bad, or None if it is good."""
+    op: Any = job.get("op", "renumber")
+    options: Any = job.get("options", {})
+    if op != "renumber":
+        return f"unknown op: {op}."
+    if not isinstance(options, dict):
+        return "options must be an object."
+    unknown: list[str] = sorted(set(options) - set(JOB_OPTIONS))
+    if unknown != []:
+        return f"unknown options: {unknown}."
+    if ("path" in job) == ("text" in job):
+        return "either path or text must be given."
+    if not isinstance(job.get("path", job.get("text")), str):
+        return "path or text must be a string."
+    return None
+
+
+def _run_job(job: Job, reply: Reply) -> Reply:
+    if job.get("op") in ["ping", "shutdown"]:
+        return dict(reply, ok=True, pid=os.getpid())
+    bad: Optional[str] = _check_job(job)
+    if bad is not None:
+        return dict(reply, error=f"bad job: {bad}")
+    from main import _re_numbering_job, _re_numbering_text
+    from Re_Numbering_Report import Re_Numbering_Report
+
+    options: dict[str, Any] = dict(JOB_OPTIONS, **job.get("options", {}), support=[".txt", ".yaml", "yml"])
+    if options["on_disorder"] == "ask":
+        options["on_disorder"] = "abort"
+    if "path" in job:
+        result = _re_numbering_job(Path(job["path"]), options, report=True)
+        return dict(
+            reply,
+            ok=result.ok,
+            error=result.error,
+            output=result.output,
+            saved_file=None if result.saved_file is None else str(result.saved_file),
+            issues=[dataclasses.asdict(issue) for issue in result.issues],
+        )
+    out = io.StringIO()
+    report = Re_Numbering_Report()
+    try:
+        with contextlib.redirect_stdout(out):
+            reply["text"] = _re_numbering_text(
+                job["text"],
+                _TEXT_FILE,
+                missing_page_number=options["missing_page_number"],
+                add_last_space=options["add_last_space"],
+                on_disorder=options["on_disorder"],
+                report=report,
+            )
+        reply["ok"] = True
+    except Exception as e:
+        reply["error"] = str(e) or e.__class__.__name__
+    reply["output"] = out.getvalue()
+    reply["issues"] = [dataclasses.asdict(issue) for issue in report.files.get(str(_TEXT_FILE), [])]
+    return reply
+
+
+def warm_up() -> None:
+    """import and run the parser and Re_Numbering once, so that the first job is as fast as the rest."""
+    run_job({"text": "warm 1\nup 2 -> 3\n", "options": dict(missing_page_number=True)})
+
+
+def serve_stream(inp: IO[str], out: IO[str]) -> bool:
+    """serve jobs read from inp, one JSON object per row, writing a reply per row to out in the same order.
+    Returns True if a shutdown job is served, and False if inp ends."""
+    for row in inp:
+        if row.strip() == "":
+            continue
+        try:
+            job: Job = json.loads(row)
+        except json.JSONDecodeError as e:
+            job, reply = {}, {"id": None, "ok": False, "error": f"bad JSON: {e}"}
+        else:
+            reply = (
+                run_job(job) if isinstance(job, dict) else {"id": None, "ok": False, "error": "job is not an object."}
+            )
+        out.write(json.dumps(reply, ensure_ascii=False) + "\n")
+        out.flush()
+        if isinstance(job, dict) and job.get("op") == "shutdown":
+            return True
+    return False
+
+
+class _Job_Handler(socketserver.StreamRequestHandler):
+    server: Re_Numbering_Server
+
+    def handle(self) -> None:
+        with (
+            self.connection.makefile("r", encoding="utf-8", newline="\n") as inp,
+            self.connection.makefile("w", encoding="utf-8", newline="\n") as out,
+        ):
+            if serve_stream(inp, out):
+                self.server.stopped = True
+
+
+class Re_Numbering_Server(socketserver.UnixStreamServer):
+    """server of jobs over a Unix socket. each connection is a stream of jobs, see serve_stream,
+    and connections are served one at a time, so that jobs never run at the same time.
+    A socket file left by a server no longer running is replaced, and the socket file is removed when the server is closed."""
+
+    def __init__(self, path: Path = DEFAULT_SOCKET) -> None:
+        self.path: Path = Path(path)
+        self.stopped: bool = False
+        if self.path == DEFAULT_SOCKET and not self.path.parent.exists():
+            self.path.parent.mkdir(mode=0o700, parents=True)
+        _check_private(self.path.parent)
+        if self.path.exists():
+            _check_owner(self.path)
+            if is_serving(self.path):
+                raise OSError(f"a server is already listening on {self.path}.")
+            self.path.unlink()
+        super().__init__(str(self.path), _Job_Handler)
+
+    def serve(self) -> None:
+        """serve connections until a shutdown job comes."""
+        warm_up()
+        while not self.stopped:
+            self.handle_request()
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.path.unlink(missing_ok=True)
+
+
+def _check_owner(path: Path) -> None:
+    """raise PermissionError unless path is owned by the current user."""
+    if _UID is not None and os.lstat(path).st_uid != _UID:
+        raise PermissionError(f"{path} is owned by another user.")
+
+
+def _check_private(dir: Path) -> None:
+    """raise PermissionError if other users can replace sockets in the directory. that is, unless it is sticky
+    as the temporary directory is, it must be owned by the current user and writable by no other user."""
+    mode: int = os.stat(dir).st_mode
+    if _UID is None or mode & stat.S_ISVTX != 0:
+        return
+    _check_owner(dir)
+    if mode & 0o022 != 0:
+        raise PermissionError(f"{dir} is writable by other users.")
+
+
+def is_serving(path: Path = DEFAULT_SOCKET) -> bool:
+    try:
+        with connect(path):
+            return True
+    except OSError:
+        return False
+
+
+def connect(path: Path = DEFAULT_SOCKET) -> socket.socket:
+    """connect to the server on the socket. raises OSError if there is none, it is owned by another user,
+    or Unix sockets are not supported."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("Unix sockets are not supported.")
+    _check_owner(path)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(str(path))
+    except OSError:
+        client.close()
+        raise
+    return client
+
+
+def send_jobs(client: socket.socket, jobs: Iterable[Job]) -> Iterator[Reply]:
+    """send jobs to the server one by one, and yield replies in the same order."""
+    with client, client.makefile(mode="rw", encoding="utf-8") as f:
+        for job in jobs:
+            f.write(json.dumps(job, ensure_ascii=False) + "\n")
+            f.flush()
+            row: str = f.readline()
+            if row == "":
+                raise ConnectionError("the server closed the connection.")
+            yield json.loads(row)
+
+
+def run_jobs(jobs: Iterable[Job], path: Optional[Path] = DEFAULT_SOCKET) -> Iterator[Reply]:
+    """run jobs by the server on the socket if it is running, and in this process otherwise, or if path is None."""
+    try:
+        client: Optional[socket.socket] = None if path is None else connect(path)
+    except OSError:
+        client = None
+    return map(run_job, jobs) if client is None else send_jobs(client, jobs)
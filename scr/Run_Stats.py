@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Final, Optional, TypeAlias
+
+# cProfile and pstats are imported only when profiled, since every run imports this module
+if TYPE_CHECKING:
+    import cProfile
+
+# called with the name of a stage and the seconds it took, every time the stage ends
+Stage_Hook: TypeAlias = Callable[[str, float], None]
+
+_NO_STAGE: Final[ContextManager[None]] = contextlib.nullcontext()
+# stats collecting now. None unless some Run_Stats is entered.
+_current: Optional[Run_Stats] = None
+
+
+def get_current() -> Optional[Run_Stats]:
+    return _current
+
+
+def stage(name: str) -> ContextManager[None]:
+    """time the block as the stage of the name, if stats are collected. otherwise it does nothing."""
+    return _NO_STAGE if _current is None else _Stage(_current, name)
+
+
+def count(name: str, n: int = 1) -> None:
+    if _current is not None:
+        _current.count(name, n)
+
+
+def count_size(name: str, file: Path) -> None:
+    """count size of the file in bytes. the file is not even looked up unless stats are collected."""
+    if _current is not None:
+        _current.count(name, os.path.getsize(file))
+
+
+class _Stage:
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats: Run_Stats, name: str) -> None:
+        self.stats: Run_Stats = stats
+        self.name: str = name
+        self.start: float = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+
+
+class Run_Stats:
+    """per-stage timers and counters of a run, collected while it is entered as context manager.
+    Stages may nest, e.g., "sort" inside "parse", and the time of the outer includes that of the inner.
+    Stages and counters may be added from threads, and stages running in parallel add up to more than the wall time.
+    With profile, functions are also profiled by cProfile. hooks are called every time a stage ends."""
+
+    def __init__(self, profile: bool = False, hooks: list[Stage_Hook] = []) -> None:
+        self.seconds: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self.counters: dict[str, int] = {}
+        self.wall_seconds: float = 0.0
+        self.hooks: list[Stage_Hook] = list(hooks)
+        self.profiler: Optional[cProfile.Profile] = None
+        if profile:
+            from cProfile import Profile
+
+            self.profiler = Profile()
+        self._start: float = 0.0
+        self._outer: Optional[Run_Stats] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> Run_Stats:
+        global _current
+        self._outer, _current = _current, self
+        self._start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        global _current
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.wall_seconds += time.perf_counter() - self._start
+        _current, self._outer = self._outer, None
+
+    def add_hook(self, hook: Stage_Hook) -> None:
+        self.hooks.append(hook)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + 1
+        for hook in self.hooks:
+            hook(name, seconds)
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "wall_seconds": self.wall_seconds,
+            "stages": {name: {"seconds": self.seconds[name], "calls": self.calls[name]} for name in self.seconds},
+            "counters": dict(self.counters),
+        }
+
+    def merge(self, stats: dict[str, Any]) -> None:
+        """add stages and counters given by to_dict, e.g., of a worker process. its wall time is not added."""
+        for name, s in stats["stages"].items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + s["seconds"]
+            self.calls[name] = self.calls.get(name, 0) + s["calls"]
+        for name, n in stats["counters"].items():
+            self.count(name, n)
+
+    def save_json(self, path: Path) -> None:
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+
+    def format(self, top: int = 20) -> str:
+        """format stages and counters as a table, followed by top functions by cumulative time if profiled."""
+        rows: list[str] = [f"{'stage':<12}{'seconds':>12}{'calls':>10}"]
+        rows += [f"{name:<12}{self.seconds[name]:>12.4f}{self.calls[name]:>10}" for name in self.seconds]
+        rows.append(f"{'wall':<12}{self.wall_seconds:>12.4f}")
+        rows += [f"{name:<12}{n:>12}" for name, n in self.counters.items()]
+        if self.profiler is not None:
+            import pstats
+
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+            rows.append(out.getvalue())
+        return "\n".join(rows)
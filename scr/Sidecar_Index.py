@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Final, Optional, Sequence
+
+from Lazy_Text_Lines import Lazy_Paged_Text_Lines
+from Mapped_Text import Mapped_Text
+from Output_Writer import Output_Writer
+from Re_Numbering_Cache import get_tool_hash, hash_file
+from Text_Line import NO_PAGE_ORDER, Page_Order, Paged_Text_Line
+from Text_Lines import Paged_Text_Lines
+
+# bump this when the layout of index files changes
+INDEX_FORMAT: Final[int] = 1
+INDEX_SUFFIX: Final[str] = ".rnidx"
+_MAGIC: Final[bytes] = b"RNUMIDX\x00"
+# magic, format, n_rows, size and mtime of the source, hash of the source and hash of the tool, see get_tool_hash.
+# 168 bytes, so that the columns after it are aligned to 8 bytes.
+_HEADER: Final[struct.Struct] = struct.Struct("<8sqqqq64s64s")
+# where the mtime of the source is in the header
+_MTIME_OFFSET: Final[int] = 32
+# int64 columns, each n_rows long, in this order after the header, followed by a uint8 column of flags.
+# row i is source[starts[i] : ends[i]] in bytes, and its text part is its first text_ends[i] characters.
+_COLUMNS: Final[list[str]] = ["starts", "ends", "text_ends", "pages", "befores", "afters"]
+# bit flags of each row
+HAS_PAGE: Final[int] = 1
+ORDER_SET: Final[int] = 2
+HAS_ROMAN: Final[int] = 4
+
+
+def get_index_file(file: Path) -> Path:
+    return file.with_name(file.name + INDEX_SUFFIX)
+
+
+class Sidecar_Index:
+    """parse results of a text file, kept in a binary file next to it, see INDEX_SUFFIX.
+    The index holds the place of each row in the file, where its text part ends, its page number and its page order,
+    so that rows can be built with no regex by decoding them from the memory-mapped file.
+    The index file itself is memory-mapped, and it is rebuilt whenever the file or the tool has changed since.
+    Only files that Mapped_Text can map are indexed, see Mapped_Text.can_map."""
+
+    def __init__(self, file: Path, index_file: Optional[Path] = None) -> None:
+        """open the index of file, building it if missing or stale. if it cannot be saved, it is kept in memory."""
+        self.file: Path = Path(file)
+        self.index_file: Path = get_index_file(self.file) if index_file is None else Path(index_file)
+        self.rebuilt: bool = False
+        self._index: Optional[mmap.mmap] = None
+        data: Optional[memoryview] = self._open_index(get_tool_hash())
+        if data is None:
+            # a valid index is of the same file as it was built from, which needs no checking again
+            if not Mapped_Text.can_map(self.file):
+                raise ValueError(f"{self.file} cannot be indexed. see Mapped_Text.can_map.")
+            data = memoryview(self._build(get_tool_hash()))
+            self.rebuilt = True
+        self._source = open(self.file, mode="rb")
+        self.source: mmap.mmap = mmap.mmap(self._source.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data: memoryview = data
+        n_rows: int = _HEADER.unpack_from(data)[2]
+        pos: int = _HEADER.size
+        self.columns: dict[str, memoryview] = {}
+        for name in _COLUMNS:
+            self.columns[name] = data[pos : pos + 8 * n_rows].cast("q")
+            pos += 8 * n_rows
+        self.flags: memoryview = data[pos : pos + n_rows]
+
+    def __enter__(self) -> Sidecar_Index:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def close(self) -> None:
+        for column in self.columns.values():
+            column.release()
+        self.flags.release()
+        self._data.release()
+        if self._index is not None:
+            self._index.close()
+        self.source.close()
+        self._source.close()
+
+    def _open_index(self, tool_hash: str) -> Optional[memoryview]:
+        """map the index file if it is valid for the file, and None otherwise.
+        The file is hashed only if its size is the same but its mtime is not, e.g., when it is copied or touched."""
+        try:
+            with open(self.index_file, mode="rb") as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(index) >= _HEADER.size:
+            magic, format, n_rows, size, mtime_ns, source_hash, index_tool_hash = _HEADER.unpack_from(index)
+            stat = os.stat(self.file)
+            if (
+                magic == _MAGIC
+                and format == INDEX_FORMAT
+                and index_tool_hash.decode() == tool_hash
+                and len(index) == _HEADER.size + (8 * len(_COLUMNS) + 1) * n_rows
+                and size == stat.st_size
+                and (mtime_ns == stat.st_mtime_ns or source_hash.decode() == hash_file(self.file))
+            ):
+                if mtime_ns != stat.st_mtime_ns:
+                    self._touch_index(stat.st_mtime_ns)
+                self._index = index
+                return memoryview(index)
+        index.close()
+        return None
+
+    def _touch_index(self, mtime_ns: int) -> None:
+        """record the new mtime of the file, whose content is the same, so that it is not hashed again."""
+        try:
+            with open(self.index_file, mode="r+b") as f:
+                f.seek(_MTIME_OFFSET)
+                f.write(struct.pack("<q", mtime_ns))
+        except OSError:
+            pass
+
+    def _build(self, tool_hash: str) -> bytes:
+        """parse every row of the file and save the index. the index is returned whether it is saved or not."""
+        stat = os.stat(self.file)
+        with Mapped_Text(self.file) as text:
+            starts, ends = text.starts, text.ends
+            # rows of a mappable file are the same as those found by Mapped_Text, see Mapped_Text.can_map
+            parsed = [Paged_Text_Line.parse_tail(row) for row in text.buffer[:].decode().splitlines()]
+        columns: dict[str, array[int]] = {
+            "starts": starts,
+            "ends": ends,
+            "text_ends": array("q", [text_end for text_end, _, _, _ in parsed]),
+            "pages": array("q", [-1 if page_number is None else page_number for _, page_number, _, _ in parsed]),
+            "befores": array("q", [page_order.before for _, _, _, page_order in parsed]),
+            "afters": array("q", [page_order.after for _, _, _, page_order in parsed]),
+        }
+        flags: array[int] = array(
+            "B",
+            [
+                (HAS_PAGE if page_number is not None else 0)
+                | (ORDER_SET if page_order.set else 0)
+                | (HAS_ROMAN if roman_page_number is not None else 0)
+                for _, page_number, roman_page_number, page_order in parsed
+            ],
+        )
+        header: bytes = _HEADER.pack(
+            _MAGIC,
+            INDEX_FORMAT,
+            len(flags),
+            stat.st_size,
+            stat.st_mtime_ns,
+            hash_file(self.file).encode(),
+            tool_hash.encode(),
+        )
+        data: bytes = b"".join([header, *(columns[name].tobytes() for name in _COLUMNS), flags.tobytes()])
+        try:
+            Output_Writer().write_bytes([data], self.index_file)
+        except OSError:
+            pass
+        return data
+
+    def get_row_text(self, pos: int) -> str:
+        return self.source[self.columns["starts"][pos] : self.columns["ends"][pos]].decode()
+
+    def get_line(self, pos: int) -> Paged_Text_Line:
+        """build the row at the positional index from the index, with no parsing."""
+        row: str = self.get_row_text(pos)
+        text_end: int = self.columns["text_ends"][pos]
+        flags: int = self.flags[pos]
+        return Paged_Text_Line.from_parsed(
+            pos,
+            row,
+            self.columns["pages"][pos] if flags & HAS_PAGE else None,
+            row[text_end:].strip() if flags & HAS_ROMAN else None,
+            Page_Order(self.columns["befores"][pos], self.columns["afters"][pos])
+            if flags & ORDER_SET
+            else NO_PAGE_ORDER,
+            text_end=text_end,
+        )
+
+    def get_all_lines(self) -> list[Paged_Text_Line]:
+        """build all rows from the index at once, which is faster than building them one by one, see get_line."""
+        rows: list[str] = self.source[:].decode().splitlines()
+        flags: list[int] = self.flags.tolist()
+        pages: list[int] = self.columns["pages"].tolist()
+        befores: list[int] = self.columns["befores"].tolist()
+        afters: list[int] = self.columns["afters"].tolist()
+        return [
+            Paged_Text_Line.from_parsed(
+                pos,
+                row,
+                pages[pos] if flags[pos] & HAS_PAGE else None,
+                row[text_end:].strip() if flags[pos] & HAS_ROMAN else None,
+                Page_Order(befores[pos], afters[pos]) if flags[pos] & ORDER_SET else NO_PAGE_ORDER,
+                text_end=text_end,
+            )
+            for pos, (row, text_end) in enumerate(zip(rows, self.columns["text_ends"].tolist()))
+        ]
+
+    def has_page_order(self) -> bool:
+        return any(flags & ORDER_SET for flags in self.flags)
+
+    def get_lines(self) -> Indexed_Paged_Text_Lines:
+        return Indexed_Paged_Text_Lines(self)
+
+
+class _Row_Texts(Sequence[str]):
+    """rows of an indexed file, decoded on access"""
+
+    def __init__(self, index: Sidecar_Index) -> None:
+        self._index: Sidecar_Index = index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, pos):  # type: ignore[override]
+        if isinstance(pos, slice):
+            return [self._index.get_row_text(i) for i in range(len(self))[pos]]
+        return self._index.get_row_text(range(len(self))[pos])
+
+
+class Indexed_Paged_Text_Lines(Lazy_Paged_Text_Lines):
+    """Lazy_Paged_Text_Lines whose rows are built from Sidecar_Index instead of parsed, see Sidecar_Index.get_line.
+    The index is kept open while some rows are left unbuilt."""
+
+    def __init__(self, index: Sidecar_Index) -> None:
+        super().__init__()
+        self.index: Sidecar_Index = index
+        self._set_texts(_Row_Texts(index))  # type: ignore[arg-type]
+
+    def _parse_row(self, pos: int) -> Paged_Text_Line:
+        return self.index.get_line(pos)
+
+    def _parse_all(self) -> None:
+        if any(line is not None for line in self._parsed):
+            super()._parse_all()
+        else:
+            self.lines = self.index.get_all_lines()
+
+    def has_page_order(self) -> bool:
+        return super().has_page_order() if self.is_parsed() else self.index.has_page_order()
+
+
+def load_lines(file: str | Path) -> Paged_Text_Lines:
+    """load the file as Paged_Text_Lines through its sidecar index, built or rebuilt as needed.
+    All rows are built before the index is closed, so that nothing is left open. to build rows on demand,
+    open Sidecar_Index and use get_lines in its context. files that cannot be indexed are read and parsed as usual."""
+    try:
+        with Sidecar_Index(Path(file)) as index:
+            return Paged_Text_Lines(index.get_all_lines())
+    except ValueError:
+        with open(file) as f:
+            return Paged_Text_Lines(f.read())
@@ -3,12 +3,16 @@ from __future__ import annotations
 import dataclasses
 import re
 from re import Match, Pattern
-from typing import Final, Optional
+from typing import TYPE_CHECKING, Final, Optional, TypeAlias
 
-from typing_extensions import Self
+# Self is only for annotations, so that typing_extensions is not imported at run time
+if TYPE_CHECKING:
+    from typing_extensions import Self
 
 
 class Text_Line:
+    __slots__ = ("idx", "_text", "_sep")
+
     def __init__(self, idx: int = -1, text: str = "", sep: str = " ") -> None:
         self._validate_text(text)
         self.idx: int = idx
@@ -63,23 +67,34 @@ class Text_Line:
         return True
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True, slots=True)
 class Page_Order:
+    """page order is immutable, so that one instance can be shared by many lines, see NO_PAGE_ORDER."""
+
     _set: bool = False
     before: int = -1
     after: int = -1
 
     def __init__(self, before: Optional[int] = None, after: Optional[int] = None) -> None:
-        self.before: int = -1 if before is None else before
-        self.after: int = -1 if after is None else after
-        self._set: bool = before is not None and after is not None
+        object.__setattr__(self, "before", -1 if before is None else before)
+        object.__setattr__(self, "after", -1 if after is None else after)
+        object.__setattr__(self, "_set", before is not None and after is not None)
 
     @property
     def set(self) -> bool:
         return self._set
 
 
+# shared by all lines with no page order
+NO_PAGE_ORDER: Final[Page_Order] = Page_Order()
+
+
+# text without page, arabic page number, roman page number, page order
+Parsed_Text: TypeAlias = tuple[str, Optional[int], Optional[str], Page_Order]
+
+
 class Paged_Text_Line(Text_Line):
+    __slots__ = ("_text_end", "page_number", "roman_page_number", "page_order")
 
     page_key: Final[str] = "page"
     roman_page_key: Final[str] = "roman_page"
@@ -89,6 +104,12 @@ class Paged_Text_Line(Text_Line):
     pat_page_order: Final[Pattern] = re.compile(
         f"\\s(?P<{page_key_order[0]}>\\-?\\d+)\\s*?->\\s*?(?P<{page_key_order[1]}>\\d+)$"
     )
+    # pat_page_order or pat_page in one pass. pat_page_order never matches on the left of pat_page, so the leftmost match tells which one the text has.
+    pat_page_or_order: Final[Pattern] = re.compile(f"{pat_page_order.pattern}|{pat_page.pattern}")
+    _arabic_digits: Final[str] = "0123456789"
+    _roman_letters: Final[str] = "ixvIXV"
+    # ascii characters that the patterns above can match. non-ascii spaces and digits are dealt with separately.
+    tail_chars: Final[str] = "".join(c for c in map(chr, range(128)) if c.isspace()) + "0123456789->ixvIXV"
 
     def __init__(
         self,
@@ -105,6 +126,8 @@ class Paged_Text_Line(Text_Line):
             self.idx: int = text_line.idx
             self._text: str = text_line.text
             self._sep: str = text_line.sep
+        # text is self._text[: self._text_end]
+        self._text_end: int = len(self._text)
         # init page number property
         self.page_number: Optional[int] = page_number
         self.roman_page_number: Optional[str] = roman_page_number
@@ -112,15 +135,128 @@ class Paged_Text_Line(Text_Line):
         self.page_number = self._get_page_number() if page_number is None else page_number
         self.roman_page_number = self._get_roman_page_number() if not self.is_page_set() else roman_page_number
         self.page_order: Page_Order = self._get_page_order(text)
-        self._text = self._get_text_without_page()
+        self._text_end = len(self._get_text_without_page())
+
+    @property
+    def text(self) -> str:
+        # a slice of the whole string is the string itself, so no copy is made unless page number is cut off
+        return self._text[: self._text_end]
+
+    @text.setter
+    def text(self, text: str) -> None:
+        self._text = text
+        self._text_end = len(text)
+
+    @classmethod
+    def find_tail(cls, text: str) -> int:
+        """find the position from which the patterns of page numbers need to search text.
+        The character there is the last one that none of the patterns can match, so that no match reaches on its left.
+        This scans text from the right only as far as such a character, and the position is 0 if there is no such one."""
+        pos: int = len(text.rstrip(cls.tail_chars))
+        while pos > 0 and (text[pos - 1].isspace() or text[pos - 1].isdecimal()):
+            # non-ascii space or digit. rare enough to afford a copy.
+            pos = len(text[: pos - 1].rstrip(cls.tail_chars))
+        return max(pos - 1, 0)
+
+    @classmethod
+    def parse_tail(cls, text: str) -> tuple[int, Optional[int], Optional[str], Page_Order]:
+        """same as parse_text but gives the length of text without page in place of the text itself, which is its prefix."""
+        last: str = text[-1:]
+        match: Optional[Match]
+        if last == "" or not (last.isdecimal() or last in cls._roman_letters):
+            return len(text), None, None, NO_PAGE_ORDER
+        tail: int = cls.find_tail(text)
+        if last in cls._arabic_digits:
+            match = cls.pat_page_or_order.search(text, tail)
+            if match is not None:
+                after: Optional[str] = match.group(cls.page_key_order[1])
+                if after is None:
+                    return (
+                        len(text[tail : match.start(cls.page_key)].rstrip()) + tail,
+                        int(match.group(cls.page_key)),
+                        None,
+                        NO_PAGE_ORDER,
+                    )
+                if after.isascii():
+                    return (
+                        len(text[tail : match.start(cls.page_key_order[0])].rstrip()) + tail,
+                        int(after),
+                        None,
+                        Page_Order(before=int(match.group(cls.page_key_order[0])), after=int(after)),
+                    )
+        elif last in cls._roman_letters:
+            match = cls.pat_roman_page.search(text, tail)
+            if match is None:
+                return len(text), None, None, NO_PAGE_ORDER
+            return (
+                len(text[tail : match.start(cls.roman_page_key)].rstrip()) + tail,
+                None,
+                match.group(cls.roman_page_key),
+                NO_PAGE_ORDER,
+            )
+        # non-ascii digits. leave them to the constructor, which is slower but rare.
+        line = cls(text=text)
+        return len(line.text), line.page_number, line.roman_page_number, line.page_order
+
+    @classmethod
+    def parse_text(cls, text: str) -> Parsed_Text:
+        """separate page number, roman page number and page order from text with at most one regex search.
+        Only the tail of text is scanned, see find_tail, so that the cost does not depend on the length of the title part.
+        The result is the same as the constructor gives, provided that text has no newline character."""
+        text_end, page_number, roman_page_number, page_order = cls.parse_tail(text)
+        return text[:text_end], page_number, roman_page_number, page_order
+
+    @classmethod
+    def from_text(cls, idx: int, text: str, sep: str = " ", validate: bool = True) -> Self:
+        """faster equivalent of Paged_Text_Line(idx=idx, text=text, sep=sep). validation can be skipped if text is known to be free of newline characters.
+        The text part is kept as a prefix of text, not as a new string."""
+        text_end, page_number, roman_page_number, page_order = cls.parse_tail(text)
+        line: Self = cls.from_parsed(idx, text, page_number, roman_page_number, page_order, sep=sep, text_end=text_end)
+        if validate:
+            line._validate_text(text)
+        return line
+
+    @classmethod
+    def from_parsed(
+        cls,
+        idx: int,
+        text: str,
+        page_number: Optional[int],
+        roman_page_number: Optional[str],
+        page_order: Page_Order,
+        sep: str = " ",
+        text_end: Optional[int] = None,
+    ) -> Self:
+        """build an instance from already separated components, with no parsing at all. if text_end is given, text[:text_end] is the text part."""
+        line: Self = cls.__new__(cls)
+        line.idx = idx
+        line._text = text
+        line._text_end = len(text) if text_end is None else text_end
+        line._sep = sep
+        line.page_number = page_number
+        line.roman_page_number = roman_page_number
+        line.page_order = page_order
+        return line
+
+    def with_page_number(self, page_number: Optional[int]) -> Self:
+        """get a copy of self whose page number is replaced and page order is cleared. text is shared with self and never parsed again."""
+        return self.from_parsed(
+            self.idx,
+            self._text,
+            page_number,
+            self.roman_page_number,
+            NO_PAGE_ORDER,
+            sep=self.sep,
+            text_end=self._text_end,
+        )
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}: idx={self.idx}, text={self.text}, page_number={self.page_number}, roman_page_number={self.roman_page_number}, page_order_before={self.page_order.before}, page_order_after={self.page_order.after}"
 
     def _get_page_order(self, text: str) -> Page_Order:
-        match: Optional[Match] = re.search(self.pat_page_order, text)
+        match: Optional[Match] = self.pat_page_order.search(text, self.find_tail(text))
         return (
-            Page_Order()
+            NO_PAGE_ORDER
             if match is None
             else Page_Order(
                 before=int(match.group(self.page_key_order[0])), after=int(match.group(self.page_key_order[1]))
@@ -161,7 +297,7 @@ class Paged_Text_Line(Text_Line):
 
     def _get_page_number(self) -> int | None:
         """get arabic page number if it exists"""
-        match: Optional[Match] = re.search(self.pat_page, self.text)
+        match: Optional[Match] = self.pat_page.search(self.text, self.find_tail(self.text))
         return int(match.group(self.page_key)) if match else None
 
     def get_page_string(self) -> str:
@@ -173,7 +309,7 @@ class Paged_Text_Line(Text_Line):
 
     def _get_roman_page_number(self) -> str | None:
         """get roman page number. at the time of writing, this method is designed to be called only if no arabic page number is found."""
-        match: Optional[Match] = re.search(self.pat_roman_page, self.text)
+        match: Optional[Match] = self.pat_roman_page.search(self.text, self.find_tail(self.text))
         return match.group(self.roman_page_key) if match else None
 
     def is_page_set(self) -> bool:
@@ -196,7 +332,7 @@ class Paged_Text_Line(Text_Line):
             is_arabic_page: bool = self.page_number is not None
             pat = self.pat_page if is_arabic_page else self.pat_roman_page
             key = self.page_key if is_arabic_page else self.roman_page_key
-        match: Optional[Match] = re.search(pat, self.text)
+        match: Optional[Match] = pat.search(self.text, self.find_tail(self.text))
         # matches might be empty. it happens, for instance, when page number is directly named in constructor.
         if match is not None:
             text_end: int = match.start(key)
@@ -2,30 +2,134 @@ from __future__ import annotations
 
 import abc
 import itertools
-from typing import Any, Generic, Iterator, Optional, TypeGuard, TypeVar, overload
+import operator
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    Optional,
+    SupportsIndex,
+    TypeAlias,
+    TypeGuard,
+    TypeVar,
+    overload,
+)
+
+from Run_Stats import stage
+from Text_Line import Page_Order, Paged_Text_Line, Text_Line
+
+# Self is only for annotations, so that typing_extensions is not imported at run time
+if TYPE_CHECKING:
+    from typing_extensions import Self
 
-import rich
-from typing_extensions import Self
+T = TypeVar("T", Text_Line, Paged_Text_Line)
+# element of _Observed_List, which may be any
+E = TypeVar("E")
 
-from Text_Line import Paged_Text_Line, Text_Line
+_get_idx: Callable[[Text_Line], int] = operator.attrgetter("idx")
 
-T = TypeVar("T", Text_Line, Paged_Text_Line)
+
+class _Observed_List(list[E]):
+    """list that counts its in-place mutations, so that whatever is derived from its contents can tell when it goes stale."""
+
+    version: int = 0
+
+    @overload
+    def __setitem__(self, key: SupportsIndex, value: E) -> None:
+        ...
+
+    @overload
+    def __setitem__(self, key: slice, value: Iterable[E]) -> None:
+        ...
+
+    def __setitem__(self, key: SupportsIndex | slice, value: Any) -> None:
+        self.version += 1
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: SupportsIndex | slice) -> None:
+        self.version += 1
+        super().__delitem__(key)
+
+    # incompatible with __add__ just as that of list, whose stub ignores it the same way
+    def __iadd__(self, value: Iterable[E]) -> Self:  # type: ignore[override, misc]
+        self.version += 1
+        return super().__iadd__(value)
+
+    def __imul__(self, value: SupportsIndex) -> Self:
+        self.version += 1
+        return super().__imul__(value)
+
+    def append(self, item: E) -> None:
+        self.version += 1
+        super().append(item)
+
+    def extend(self, items: Iterable[E]) -> None:
+        self.version += 1
+        super().extend(items)
+
+    def insert(self, index: SupportsIndex, item: E) -> None:
+        self.version += 1
+        super().insert(index, item)
+
+    def pop(self, index: SupportsIndex = -1) -> E:
+        self.version += 1
+        return super().pop(index)
+
+    def remove(self, item: E) -> None:
+        self.version += 1
+        super().remove(item)
+
+    def clear(self) -> None:
+        self.version += 1
+        super().clear()
+
+    def sort(self, *, key: Optional[Callable[[E], Any]] = None, reverse: bool = False) -> None:
+        self.version += 1
+        super().sort(key=key, reverse=reverse)
+
+    def reverse(self) -> None:
+        self.version += 1
+        super().reverse()
 
 
 class _Text_Lines(Generic[T], metaclass=abc.ABCMeta):
     """abstract base class for text lines"""
 
     def __init__(self, texts: list[T] | T) -> None:
-        self.lines: list[T] = sorted(texts) if isinstance(texts, list) else [texts]
+        self._index_map: Optional[dict[int, int]] = None
+        self._index_version: int = -1
+        if isinstance(texts, list):
+            lines: _Observed_List[T] = _Observed_List(texts)
+            with stage("sort"):
+                lines.sort(key=_get_idx)
+            self.lines = lines
+        else:
+            self.lines = _Observed_List([texts])
+
+    @property
+    def lines(self) -> list[T]:
+        return self._lines
+
+    @lines.setter
+    def lines(self, lines: list[T]) -> None:
+        # lists made for self are adopted as they are, and only the others are copied
+        self._lines: _Observed_List[T] = lines if isinstance(lines, _Observed_List) else _Observed_List(lines)
+        self._index_map = None
 
     def __add__(self, other: Self | list[T]) -> Self:
-        """take union of two Text_Lines"""
-        return self.get_instance(list(itertools.chain(self, other))).remove_duplication()
+        """take union of two Text_Lines. rows of self are preferred if both have the same row."""
+        # both are sorted, so sort merges two runs in linear time. it is stable, so rows of self come first.
+        return self._get_sorted_instance(
+            _Observed_List(self._iter_unique(sorted(itertools.chain(self, self._as_sorted(other)), key=_get_idx)))
+        )
 
     def __sub__(self, other: Self | list[T]) -> Self:
         """self minus other in set difference sense"""
-        other_: Self = self.get_instance(other) if isinstance(other, list) else other
-        return self.get_instance([s for s in self if not other_.has_row(s.idx)])
+        excluded: set[int] = {s.idx for s in other}
+        return self._get_sorted_instance(_Observed_List(s for s in self if s.idx not in excluded))
 
     def __and__(self, other: Self | list[T]) -> Self:
         """take intersection of two Text_Lines"""
@@ -42,7 +146,11 @@ class _Text_Lines(Generic[T], metaclass=abc.ABCMeta):
 
     def __getitem__(self, key: int | slice) -> Self | T:
         value: list[T] | T = self.lines.__getitem__(key)
-        return self.get_instance(value) if isinstance(value, list) else value
+        if not isinstance(value, list):
+            return value
+        # slice of sorted lines is sorted unless the step is negative
+        is_sorted: bool = isinstance(key, slice) and (key.step is None or key.step > 0)
+        return self._get_sorted_instance(value) if is_sorted else self.get_instance(value)
 
     def __iter__(self) -> Iterator[T]:
         return self.lines.__iter__()
@@ -84,35 +192,65 @@ class _Text_Lines(Generic[T], metaclass=abc.ABCMeta):
     def to_text(self) -> str:
         return "\n".join(self.to_list_str())
 
-    def __to_sorted_unique(self, x: list[int]) -> list[int]:
-        ret: list[int] = []
-        for v in sorted(x):
-            if ret == [] or v != ret[-1]:
-                ret.append(v)
-        return ret
+    def _get_sorted_instance(self, lines: list[T]) -> Self:
+        """get instance from lines already sorted by row number, skipping the sort in constructor."""
+        instance: Self = self.get_instance([])
+        instance.lines = lines
+        return instance
+
+    def _as_sorted(self, other: Self | list[T]) -> Iterable[T]:
+        return sorted(other, key=_get_idx) if isinstance(other, list) else other
+
+    def _iter_unique(self, lines: Iterable[T]) -> Iterator[T]:
+        """take the first line of each row number from lines sorted by row number."""
+        last: Optional[int] = None
+        for line in lines:
+            if line.idx != last:
+                yield line
+                last = line.idx
 
     def select(self, rows: list[int]) -> Self:
         """filter self into Self whose row numbers are in rows input."""
-        return self.get_instance([self.get_line(i) for i in self.__to_sorted_unique(rows) if self.has_row(i)])
+        selected: set[int] = set(rows)
+        return self._get_sorted_instance(_Observed_List(self._iter_unique(s for s in self if s.idx in selected)))
 
     def exclude(self, rows: list[int]) -> Self:
         """filter out self to Self whose rows numbers are not in rows input."""
-        return self - self.select(rows)
+        excluded: set[int] = set(rows)
+        return self._get_sorted_instance(_Observed_List(s for s in self if s.idx not in excluded))
 
     def overwrite(self, other: Self | list[T]) -> Self:
-        return (self - other) + other
+        """same as (self - other) + other, in a single merge."""
+        other_: Iterable[T] = self._as_sorted(other)
+        excluded: set[int] = {s.idx for s in other_}
+        kept: Iterator[T] = (s for s in self if s.idx not in excluded)
+        return self._get_sorted_instance(
+            _Observed_List(self._iter_unique(sorted(itertools.chain(kept, other_), key=_get_idx)))
+        )
 
     def remove_duplication(self) -> Self:
         """remove duplicated lines and return the removed lines."""
-        idx_unique: list[int] = self.__to_sorted_unique(self.get_index())
-        return self.select(idx_unique)
+        return self._get_sorted_instance(_Observed_List(self._iter_unique(self)))
 
     def get_sorted(self) -> Self:
-        self.lines.sort()
+        self.lines.sort(key=_get_idx)
         return self
 
+    def _get_index_map(self) -> dict[int, int]:
+        """get mapping from row number to the first positional index with it.
+        The map is built on first use and kept until lines are replaced or changed in place."""
+        if self._index_map is None or self._index_version != self._lines.version:
+            n: int = len(self._lines)
+            # later items win, so iterate backward to keep the first position of each row
+            self._index_map = dict(zip(map(_get_idx, reversed(self._lines)), range(n - 1, -1, -1)))
+            self._index_version = self._lines.version
+        return self._index_map
+
     def search(self, row_idx: int, left: int = 0, right: int = -1) -> int:
-        """binary search the positional index of self with the asked row. Return the index if found and -1 if not."""
+        """search the positional index of self with the asked row. Return the index if found and -1 if not.
+        Searching the whole lines is a lookup of the index map, and searching a part of them is a binary search."""
+        if left == 0 and right == -1:
+            return self._get_index_map().get(row_idx, -1)
         N: int = len(self)
         le: int = left
         r: int = N - 1 if right == -1 else min(right, N)
@@ -128,20 +266,21 @@ class _Text_Lines(Generic[T], metaclass=abc.ABCMeta):
 
     def has_row(self, row: int) -> bool:
         """if Text_Lines object has the asked row"""
-        return self.search(row) != -1
+        return row in self._get_index_map()
 
     def get_line(self, row: int) -> T:
         """get Text_Line object with the row number in self"""
-        if not self.has_row(row):
+        idx: int = self.search(row)
+        if idx == -1:
             raise ValueError(f"row={row} not found.")
-        return self[self.search(row)]
+        return self[idx]
 
     def get_line_next_to(self, line: T, move: int = 1) -> T:
         """get Text line object in self that is away from input 'line' with just 'move' amount in terms of positional index in list."""
-        if not self.has_row(line.idx):
-            raise ValueError(f"{self} does not contain {line}.")
         idx: int = self.search(line.idx)
-        if not self.has_row_at(line=line, move=move):
+        if idx == -1:
+            raise ValueError(f"{self} does not contain {line}.")
+        if not 0 <= idx + move < len(self):
             raise IndexError(
                 f"{self} of length {len(self)} contains {line} at {idx}, but impossible to make a {move} move from there."
             )
@@ -149,13 +288,15 @@ class _Text_Lines(Generic[T], metaclass=abc.ABCMeta):
 
     def has_row_at(self, line: T, move: int = 1) -> bool:
         """test if self has an element at moved position from where line is placed."""
-        return self.has_row(line.idx) != -1 and 0 <= (self.search(line.idx) + move) < len(self)
+        idx: int = self.search(line.idx)
+        return idx != -1 and 0 <= idx + move < len(self)
 
     def get_rows_around(self, line: T, radius: int) -> Self:
-        moves: list[int] = [i for i in range(-abs(radius), abs(radius) + 1) if i != 0]
-        return self.get_instance(
-            [self.get_line_next_to(line=line, move=move) for move in moves if self.has_row_at(line, move)]
-        )
+        idx: int = self.search(line.idx)
+        if idx == -1:
+            raise ValueError(f"{self} does not contain {line}.")
+        around: range = range(max(idx - abs(radius), 0), min(idx + abs(radius) + 1, len(self)))
+        return self._get_sorted_instance(_Observed_List(self[i] for i in around if i != idx))
 
     def get_row_idx(self, idx: int) -> int:
         return self[idx].idx
@@ -195,13 +336,37 @@ class Paged_Text_Lines(_Text_Lines[Paged_Text_Line]):
             raise TypeError(f"invalid type: text = {type(text)}")
 
     def _to_list_T(self, text: str | list[str]) -> list[Paged_Text_Line]:
-        # text is str or list[str]
-        texts: list[str] = text.splitlines() if isinstance(text, str) else text
-        return [Paged_Text_Line(i, s) for i, s in enumerate(texts)]
+        # text is str or list[str]. rows split by splitlines need no newline validation.
+        if isinstance(text, str):
+            return [Paged_Text_Line.from_text(i, s, validate=False) for i, s in enumerate(text.splitlines())]
+        return [Paged_Text_Line.from_text(i, s) for i, s in enumerate(text)]
 
     def get_instance(self, texts: list[Paged_Text_Line]) -> Self:
         return Paged_Text_Lines(texts)
 
+    def get_page_numbers(self) -> list[Optional[int]]:
+        return [line.page_number for line in self]
+
+    def get_page_orders(self) -> list[tuple[int, Page_Order]]:
+        """get positional indices and page orders of rows with page order set."""
+        return [(i, line.page_order) for i, line in enumerate(self) if line.page_order.set]
+
+    def has_page_order(self) -> bool:
+        """test if any row has page order, i.e., maps an old page number to a new one."""
+        return any(line.page_order.set for line in self)
+
+    def with_page_numbers(self, page_numbers: list[Optional[int]]) -> Self:
+        """get a copy of self whose page numbers are replaced row by row and page orders are cleared.
+        Rows left as they are are shared with self, and the others share their texts with the rows of self."""
+        if len(page_numbers) != len(self):
+            raise ValueError(f"inconsistent number of rows. page_numbers={len(page_numbers)}, original={len(self)}")
+        return self._get_sorted_instance(
+            _Observed_List(
+                line if number == line.page_number and not line.page_order.set else line.with_page_number(number)
+                for line, number in zip(self, page_numbers)
+            )
+        )
+
     def to_list_str(self, combine: bool = True) -> list[str]:
         return [s.to_text(combine=combine) for s in self]
 
@@ -209,9 +374,19 @@ class Paged_Text_Lines(_Text_Lines[Paged_Text_Line]):
         return "\n".join(self.to_list_str(combine=combine))
 
 
+# part of a printed row and its style of rich, such as a color. "" is no style.
+Styled: TypeAlias = tuple[str, str]
+
+
 class Texts_Printer:
-    def __init__(self, color_set: list[str] = ["magenta", "cyan"]) -> None:
+    """print text lines. rows are rendered window of them at a time, in a single call for each window,
+    so that memory stays bounded however many rows are printed.
+    On a terminal, a window is rendered by rich as one Text, where texts of rows are never taken as markup.
+    Otherwise rows are written as plain text with no style."""
+
+    def __init__(self, color_set: list[str] = ["magenta", "cyan"], window: int = 1000) -> None:
         self._color_set: list[str] = ["magenta", "cyan"] if color_set is None else color_set
+        self.window: int = window
 
     def generate_color_block(self, color: Optional[str] = None) -> tuple[str, str]:
         c = self._color_set[0] if color is None else color
@@ -255,30 +430,33 @@ class Texts_Printer:
 
         colors = colors if colors != [] else [(0, self._color_set[0]), (1, self._color_set[-1])]
         sep: str = " | "
+        # positions in [N, idx, text] to be printed, based on with_** conditions
+        picked: list[int] = (
+            [0, 1, 2] if with_N and with_page_idx else [0, 2] if with_N else [1, 2] if with_page_idx else [2]
+        )
 
-        def filter_texts(texts: list[str]) -> list[str]:
-            """pick appropriate elements based on with_** conditions, assuming that input list comes with the form [N, idx, text]"""
-            if with_N and with_page_idx:
-                return texts
-            elif not with_N and not with_page_idx:
-                return [texts[-1]]
-            return [texts[0], texts[-1]] if with_N else [texts[1], texts[-1]]
+        def join(texts: list[Styled]) -> list[Styled]:
+            joined: list[Styled] = []
+            for pos in picked:
+                joined += [texts[pos], (sep, "")]
+            return joined[:-1]
+
+        def get_rows() -> Iterator[list[Styled]]:
+            # create def header if necessary
+            if with_def:
+                styles: dict[int, str] = {}
+                for i, c in colors:
+                    styles.setdefault(i, c)
+                yield join([(elem, styles.get(i, "")) for i, elem in enumerate(["N", "Row", "Text"])])
+            # main part
+            end_: int = min(end + 1, len(lines)) if end > 0 else len(lines)
+            for i in range(max(start, 0), end_):
+                line = lines[i]
+                yield join([(str(i - start), ""), (str(line.idx), ""), (line.to_text(), "")])
 
         if with_blank_line:
             self.insert_blank_line()
-
-        # create and print def header if necessary
-        if with_def:
-            elems: list[str] = ["N", "Row", "Text"]
-            colored_elems: list[str] = self.get_colored(elems, colors)
-            rich.print(sep.join(filter_texts(colored_elems)))
-
-        # print main part
-        end_: int = min(end + 1, len(lines)) if end > 0 else len(lines)
-        for i in range(max(start, 0), end_):
-            elems: list[str] = [f"{i-start}", f"{lines[i].idx}", f"{lines[i].to_text()}"]
-            rich.print(sep.join(filter_texts(elems)))
-
+        self.print_rows(get_rows())
         if with_blank_line:
             self.insert_blank_line()
 
@@ -295,17 +473,28 @@ class Texts_Printer:
         i_center: int = lines.search(row)
         if i_center == -1:
             return
-        include: list[int] = [
-            i + i_center for i in range(-N_around, N_around + 1) if i + i_center in range(0, len(lines))
-        ]
-        color_pos: list[int] = [i + i_center for i in coloring_at if i + i_center in include]
+        include: range = range(max(i_center - N_around, 0), min(i_center + N_around + 1, len(lines)))
+        color_pos: set[int] = {i + i_center for i in coloring_at}
         if with_blank_line:
             self.insert_blank_line()
-        for i in include:
-            out: str = self.coloring(lines[i].to_text(), color) if i in color_pos else lines[i].to_text()
-            rich.print(out)
+        self.print_rows([(lines[i].to_text(), color if i in color_pos else "")] for i in include)
         if with_blank_line:
             self.insert_blank_line()
 
+    def print_rows(self, rows: Iterable[list[Styled]]) -> None:
+        """print rows, each of which is made of styled parts, rendering window rows at a time."""
+        # rich is imported only when something is printed, since every run imports this module
+        import rich
+        from rich.text import Text
+
+        console = rich.get_console()
+        it: Iterator[list[Styled]] = iter(rows)
+        while (chunk := list(itertools.islice(it, self.window))) != []:
+            if console.is_terminal:
+                # the terminal wraps long rows by itself, which saves rich from measuring every row
+                console.print(Text("\n").join(Text.assemble(*row) for row in chunk), soft_wrap=True)
+            else:
+                console.file.write("".join("".join(text for text, _ in row) + "\n" for row in chunk))
+
     def insert_blank_line(self) -> None:
         print("")
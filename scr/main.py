@@ -1,44 +1,195 @@
+from __future__ import annotations
+
+import collections
+import contextlib
+import dataclasses
+import fnmatch
+import functools
+import io
+import itertools
+import locale
+import mmap
+import os
+import sys
 from pathlib import Path
-from typing import Optional, TypeAlias
+from typing import IO, TYPE_CHECKING, Any, Callable, Iterable, Iterator, Literal, Optional, TypeAlias
 
-from rich import print
+from Mapped_Text import Mapped_Text
+from Output_Writer import Fsync_Policy, Output_Writer, Pending_Output
+from Re_Numbering import Disorder_Policy, Issue, Re_Numbering, Re_Numbering_Mapped, Re_Numbering_Stream
+from Re_Numbering_Report import Re_Numbering_Report
+from Run_Stats import Run_Stats, count, count_size, get_current, stage
+from Text_Line import Paged_Text_Line
+from Text_Lines import Paged_Text_Lines, Texts_Printer
 
-from Re_Numbering import Re_Numbering
-from Text_Lines import Paged_Text_Lines
+# modules needed only by some options are imported where they are used, so that a plain run starts fast.
+# see benchmark/bench_startup.py
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
-Save_Result: TypeAlias = tuple[Path, bool]
+    from Re_Numbering_Cache import Re_Numbering_Cache
 
+# what to do with files having no page order, "old -> new", whose page numbers re-numbering leaves unchanged.
+# "process" re-numbers them as usual, "copy" and "link" copy or hard-link them to the output as they are,
+# and "skip" writes nothing.
+Unmapped_Policy: TypeAlias = Literal["process", "copy", "link", "skip"]
 
-def save_text(
-    text: str,
+
+@dataclasses.dataclass
+class Re_Numbering_Result:
+    file: Path
+    saved_file: Optional[Path] = None
+    error: Optional[str] = None
+    # what was printed while processing the file, e.g., rows with no page number
+    output: str = ""
+    # skipped since the file is not changed since the last run
+    cached: bool = False
+    # outputs written by a worker process and to be committed by the parent process
+    pending: list[Pending_Output] = dataclasses.field(default_factory=list)
+    # stats collected by a worker process, see Run_Stats.to_dict
+    stats: Optional[dict[str, Any]] = None
+    # issues found by a worker process, to be reported by the parent process
+    issues: list[Issue] = dataclasses.field(default_factory=list)
+    # not re-numbered since the file has no page order, see Unmapped_Policy
+    unmapped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def print(*objects: Any, **kwargs: Any) -> None:
+    """rich.print. rich is imported on first use, so that runs printing nothing, such as re-numbering a single file,
+    never pay for importing it."""
+    import rich
+
+    rich.print(*objects, **kwargs)
+
+
+def save_text(text: str, dir_out: Path, name_out: str, writer: Optional[Output_Writer] = None) -> Path:
+    """write text atomically. see Output_Writer."""
+    return (Output_Writer() if writer is None else writer).write_text(text, dir_out / name_out)
+
+
+def save_lines(
+    lines: Iterable[str],
     dir_out: Path,
     name_out: str,
-) -> Save_Result:
-    if not dir_out.exists():
-        dir_out.mkdir(parents=True)
-    text_path: Path = dir_out / name_out
-    with open(text_path, mode="w") as tf:
-        tf.write(text)
-    return text_path, text_path.exists()
+    add_last_space: bool = False,
+    before_commit: Optional[Callable[[], None]] = None,
+    writer: Optional[Output_Writer] = None,
+) -> Path:
+    """write lines one by one atomically. before_commit is called when all lines are written. if it raises, the output is left untouched."""
+    return (Output_Writer() if writer is None else writer).write_lines(
+        lines, dir_out / name_out, add_last_space=add_last_space, before_commit=before_commit
+    )
 
 
 def get_new_file_name(file: Path, prefix: str = "", suffix: str = "", join_with: str = "") -> str:
     return f"{join_with.join([prefix,file.stem,suffix])}{file.suffix}"
 
 
-def point_out_missing_page_number(lines: Paged_Text_Lines):
-    missing: list[str] = [
-        f"{str(i+1).zfill(3)} | {line.to_text()}" for i, line in enumerate(lines) if line.page_number is None
-    ]
-    if missing != []:
-        out: str = "\n".join(missing)
-        print(out)
+def get_file_out(
+    file: Path,
+    dir_out: Optional[str | Path],
+    prefix: str = "",
+    suffix: str = "",
+    join_with: str = "",
+    overwrite: bool = False,
+) -> Path:
+    """get the path where the re-numbered file is saved."""
+    if overwrite:
+        return file
+    return (file.parent if dir_out is None else Path(dir_out)) / get_new_file_name(
+        file=file, prefix=prefix, suffix=suffix, join_with=join_with
+    )
+
+
+def open_cache(dir: Path, add_last_space: bool = False, on_disorder: Disorder_Policy = "ask") -> Re_Numbering_Cache:
+    """open the cache in the directory, keyed by the options that change outputs. paths of outputs are checked per file."""
+    from Re_Numbering_Cache import Re_Numbering_Cache
+
+    return Re_Numbering_Cache.in_dir(dir, options=dict(add_last_space=add_last_space, on_disorder=on_disorder))
+
+
+def format_missing_page_number(issue: Issue) -> str:
+    return f"{str(issue.line).zfill(3)} | {issue.text}"
+
+
+def point_out_missing_page_number(issues: list[Issue]) -> None:
+    """print rows with no page number, picked from issues found while re-numbering so that rows are not scanned again."""
+    print_missing_page_number([format_missing_page_number(issue) for issue in issues if issue.kind == "missing"])
+
+
+def print_missing_page_number(missing: list[str]) -> None:
+    Texts_Printer().print_rows([(row, "")] for row in missing)
 
 
 def add_trailing_space(text: str) -> str:
     return text + "\n" if text.split(sep="\n")[-1] != "" else text
 
 
+def has_page_order(file: Path) -> bool:
+    """test if some row of the file has a page order, "old -> new", without parsing the whole file.
+    Bytes of the file are searched for "->", and only the rows having it are decoded and parsed to confirm."""
+    if file.stat().st_size == 0:
+        return False
+    encoding: str = locale.getpreferredencoding(False)
+    with open(file, mode="rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        pos: int = buffer.find(b"->")
+        while pos != -1:
+            start: int = buffer.rfind(b"\n", 0, pos) + 1
+            end: int = buffer.find(b"\n", pos)
+            end = len(buffer) if end == -1 else end
+            rows: list[str] = buffer[start:end].decode(encoding, errors="replace").splitlines()
+            if any(Paged_Text_Line.from_text(0, row, validate=False).page_order.set for row in rows):
+                return True
+            pos = buffer.find(b"->", end)
+    return False
+
+
+def ends_with_newline(file: Path) -> bool:
+    with open(file, mode="rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) in (b"\n", b"\r")
+
+
+def _pass_unmapped(
+    file: Path, options: dict[str, Any], unmapped: Unmapped_Policy, writer: Output_Writer
+) -> Optional[Re_Numbering_Result]:
+    """pass over the file without re-numbering it if it has no page order, by unmapped. options are those of _re_numbering.
+    Files are copied or linked as they are, so that their line breaks are kept, unless a blank line is to be added.
+    Returns None if the file is to be re-numbered, which includes files that _re_numbering rejects."""
+    if unmapped == "process" or not file.is_file() or file.suffix not in options["support"]:
+        return None
+    with stage("prescan"):
+        if has_page_order(file) or (options["add_last_space"] and not ends_with_newline(file)):
+            return None
+    count("unmapped")
+    file_out: Path = get_file_out(
+        file, options["dir_out"], options["prefix"], options["suffix"], options["join_with"], options["overwrite"]
+    )
+    if unmapped == "skip":
+        return Re_Numbering_Result(file=file, unmapped=True)
+    # with overwrite, or when linked by the last run, the output is the file itself
+    if not (file_out.exists() and file_out.samefile(file)):
+        with stage("write"):
+            (writer.copy_file if unmapped == "copy" else writer.link_file)(file, file_out)
+    return Re_Numbering_Result(file=file, saved_file=file_out, unmapped=True)
+
+
+@contextlib.contextmanager
+def report_issues(report: Optional[Re_Numbering_Report], file: Path, re_numberer: Re_Numbering) -> Iterator[None]:
+    """add issues that re_numberer finds in the block to report, even when the block aborts on disorder."""
+    try:
+        yield
+    finally:
+        if report is not None:
+            report.add(file, re_numberer.issues)
+
+
 def _re_numbering(
     file: str | Path,
     dir_out: Optional[str | Path],
@@ -49,32 +200,627 @@ def _re_numbering(
     missing_page_number: bool = False,
     add_last_space: bool = False,
     support: list[str] = [".txt", ".yaml", "yml"],
+    stream: bool = False,
+    on_disorder: Disorder_Policy = "ask",
+    writer: Optional[Output_Writer] = None,
+    mapped: bool = False,
+    report: Optional[Re_Numbering_Report] = None,
 ) -> Path:
+    """re-number the file and save it. with stream, see _re_numbering_stream, and with mapped, see _re_numbering_mapped.
+    Issues found while re-numbering are added to report, see Issue."""
+    file = _check_file(file, support)
+    if stream:
+        return _re_numbering_stream(
+            file=file,
+            dir_out=dir_out,
+            prefix=prefix,
+            suffix=suffix,
+            join_with=join_with,
+            overwrite=overwrite,
+            missing_page_number=missing_page_number,
+            add_last_space=add_last_space,
+            on_disorder=on_disorder,
+            writer=writer,
+            report=report,
+        )
+    if mapped and Mapped_Text.can_map(file):
+        return _re_numbering_mapped(
+            file=file,
+            dir_out=dir_out,
+            prefix=prefix,
+            suffix=suffix,
+            join_with=join_with,
+            overwrite=overwrite,
+            missing_page_number=missing_page_number,
+            add_last_space=add_last_space,
+            on_disorder=on_disorder,
+            writer=writer,
+            report=report,
+        )
+    text_out: str = _re_numbering_text(
+        _read_text(file),
+        file,
+        missing_page_number=missing_page_number,
+        add_last_space=add_last_space,
+        on_disorder=on_disorder,
+        report=report,
+    )
+    return _save_re_numbered(text_out, file, dir_out, prefix, suffix, join_with, overwrite, writer)
+
+
+def _check_file(file: str | Path, support: list[str]) -> Path:
     file = Path(file)
     if not file.is_file():
         raise ValueError(f"{file} is not a file.")
     if file.suffix not in support:
         raise ValueError(f"{file} is not a supported extension.")
-    with open(str(file)) as f:
-        text: str = f.read()
-        re_numberer = Re_Numbering(Paged_Text_Lines(text))
+    count("files")
+    count_size("bytes_in", file)
+    return file
+
+
+def _read_text(file: Path) -> str:
+    with open(str(file)) as f, stage("read"):
+        return f.read()
+
+
+def _re_numbering_text(
+    text: str,
+    file: Path,
+    missing_page_number: bool = False,
+    add_last_space: bool = False,
+    on_disorder: Disorder_Policy = "ask",
+    report: Optional[Re_Numbering_Report] = None,
+) -> str:
+    """re-number the text read from the file, and return the text to be saved. issues are added to report as those of the file."""
+    with stage("parse"):
+        lines: Paged_Text_Lines = Paged_Text_Lines(text)
+    re_numberer = Re_Numbering(lines, on_disorder=on_disorder)
+    with stage("renumber"), report_issues(report, file, re_numberer):
         lines_out: Paged_Text_Lines = re_numberer.re_numbering()
-        if missing_page_number:
-            point_out_missing_page_number(lines_out)
-        # text_out: str = lines_out.to_text()
-        text_out: str = add_trailing_space(lines_out.to_text()) if add_last_space else lines_out.to_text()
-        # save
-        dir_out = file.parent if dir_out is None else Path(dir_out)
-        saved_file, success = save_text(
+    count("lines", len(lines_out))
+    if missing_page_number:
+        point_out_missing_page_number(re_numberer.issues)
+    with stage("format"):
+        return add_trailing_space(lines_out.to_text()) if add_last_space else lines_out.to_text()
+
+
+def _save_re_numbered(
+    text_out: str,
+    file: Path,
+    dir_out: Optional[str | Path],
+    prefix: str = "",
+    suffix: str = "",
+    join_with: str = "",
+    overwrite: bool = False,
+    writer: Optional[Output_Writer] = None,
+) -> Path:
+    with stage("write"):
+        saved_file: Path = save_text(
             text=text_out,
-            dir_out=file.parent if overwrite else dir_out,
+            dir_out=file.parent if overwrite or dir_out is None else Path(dir_out),
             name_out=file.name
             if overwrite
             else get_new_file_name(file=file, prefix=prefix, suffix=suffix, join_with=join_with),
+            writer=writer,
+        )
+    return saved_file
+
+
+def _re_numbering_stream(
+    file: Path,
+    dir_out: Optional[str | Path],
+    prefix: str = "",
+    suffix: str = "",
+    join_with: str = "",
+    overwrite: bool = False,
+    missing_page_number: bool = False,
+    add_last_space: bool = False,
+    on_disorder: Disorder_Policy = "ask",
+    writer: Optional[Output_Writer] = None,
+    report: Optional[Re_Numbering_Report] = None,
+) -> Path:
+    """stream version of _re_numbering. rows are read, re-numbered and written one at a time."""
+
+    def to_texts(lines: Iterable[Paged_Text_Line]) -> Iterable[str]:
+        n_lines: int = 0
+        for line in lines:
+            yield line.to_text()
+            n_lines += 1
+        count("lines", n_lines)
+
+    # rows are read, parsed, re-numbered and written together, so that they are timed as one stage
+    with open(str(file)) as f, stage("stream"):
+        re_numberer = Re_Numbering_Stream(
+            f, on_disorder=on_disorder, collect_issues=missing_page_number or report is not None
+        )
+        dir_out = file.parent if dir_out is None else Path(dir_out)
+        with report_issues(report, file, re_numberer):
+            saved_file: Path = save_lines(
+                lines=to_texts(re_numberer.re_numbering_stream()),
+                dir_out=file.parent if overwrite else dir_out,
+                name_out=file.name
+                if overwrite
+                else get_new_file_name(file=file, prefix=prefix, suffix=suffix, join_with=join_with),
+                add_last_space=add_last_space,
+                before_commit=re_numberer.ensure_no_unintended_order_disturber,
+                writer=writer,
+            )
+    if missing_page_number:
+        point_out_missing_page_number(re_numberer.issues)
+    return saved_file
+
+
+def _re_numbering_pipe(
+    inp: IO[str],
+    out: IO[str],
+    missing_page_number: bool = False,
+    add_last_space: bool = False,
+    on_disorder: Disorder_Policy = "ask",
+    report: Optional[Re_Numbering_Report] = None,
+    chunk_size: int = 1024,
+) -> Re_Numbering_Result:
+    """filter version of _re_numbering_stream. rows read from inp are re-numbered and written to out, chunk_size rows at a time,
+    so that memory stays bounded and nothing touches the disk. whatever else is printed, e.g., rows with no page number, goes to stderr.
+    Rows are written as soon as they are re-numbered, so that rows disturbing the order of page numbers are written anyway,
+    and with on_disorder="abort", or "ask", which cannot ask user while inp is the input, they make the result fail at the end.
+    Errors are returned in the result instead of raised, as _re_numbering_job does. issues are reported as those of the file "-"."""
+    result = Re_Numbering_Result(file=Path("-"))
+    re_numberer = Re_Numbering_Stream(
+        inp,
+        on_disorder="abort" if on_disorder == "ask" else on_disorder,
+        collect_issues=missing_page_number or report is not None,
+    )
+    try:
+        with contextlib.redirect_stdout(sys.stderr), stage("stream"), report_issues(report, result.file, re_numberer):
+            count("files")
+            rows: Iterator[str] = (line.to_text() for line in re_numberer.re_numbering_stream())
+            n_lines: int = 0
+            last: str = ""
+            while (chunk := list(itertools.islice(rows, chunk_size))) != []:
+                out.write(("\n" if n_lines > 0 else "") + "\n".join(chunk))
+                n_lines += len(chunk)
+                last = chunk[-1]
+            if add_last_space and last != "":
+                out.write("\n")
+            out.flush()
+            count("lines", n_lines)
+            re_numberer.ensure_no_unintended_order_disturber()
+            if missing_page_number:
+                point_out_missing_page_number(re_numberer.issues)
+    except Exception as e:
+        result.error = str(e) or e.__class__.__name__
+    return result
+
+
+def _re_numbering_mapped(
+    file: Path,
+    dir_out: Optional[str | Path],
+    prefix: str = "",
+    suffix: str = "",
+    join_with: str = "",
+    overwrite: bool = False,
+    missing_page_number: bool = False,
+    add_last_space: bool = False,
+    on_disorder: Disorder_Policy = "ask",
+    writer: Optional[Output_Writer] = None,
+    report: Optional[Re_Numbering_Report] = None,
+) -> Path:
+    """memory-mapped version of _re_numbering. only the tails of rows that may hold page numbers are decoded and parsed,
+    and the rest of rows are copied to the output as bytes. the file must be mappable, see Mapped_Text.can_map."""
+    with stage("map"):
+        text = Mapped_Text(file)
+    with text:
+        with stage("parse"):
+            re_numberer = Re_Numbering_Mapped(text, on_disorder=on_disorder)
+        with stage("renumber"), report_issues(report, file, re_numberer):
+            lines_out: Paged_Text_Lines = re_numberer.re_numbering()
+        count("lines", len(lines_out))
+        if missing_page_number:
+            point_out_missing_page_number(re_numberer.issues)
+        with stage("write"):
+            saved_file: Path = (Output_Writer() if writer is None else writer).write_bytes(
+                text.iter_bytes(lines_out, add_last_space=add_last_space),
+                get_file_out(file, dir_out, prefix, suffix, join_with, overwrite),
+            )
+    return saved_file
+
+
+def get_dir_out_mirrored(file: Path, dir_out: Optional[str | Path], base_dir: Optional[Path]) -> Optional[str | Path]:
+    """get output directory of the file that mirrors its place under base_dir, so that files of the same name in different directories do not collide.
+    Files not under base_dir, e.g., those listed in a manifest by absolute paths, are put in dir_out itself."""
+    if dir_out is None or base_dir is None:
+        return dir_out
+    parent, base = Path(os.path.normpath(file.parent)), Path(os.path.normpath(base_dir))
+    return Path(dir_out) / parent.relative_to(base) if parent.is_relative_to(base) else dir_out
+
+
+def _re_numbering_job(
+    file: Path,
+    options: dict[str, Any],
+    base_dir: Optional[Path] = None,
+    buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+    fsync: Fsync_Policy = "none",
+    stats: bool = False,
+    report: bool = False,
+    unmapped: Unmapped_Policy = "process",
+) -> Re_Numbering_Result:
+    """run _re_numbering for a worker process. what is printed is captured and errors are returned instead of raised, so that they are reported in order by the parent process.
+    With fsync="batch", the output is left pending and committed by the parent process. with stats, stats of the job are returned to be merged by the parent process,
+    and with report, issues found in the file are returned to be reported by the parent process. files having no page order are passed over by unmapped."""
+    out = io.StringIO()
+    options = dict(options, dir_out=get_dir_out_mirrored(file, options["dir_out"], base_dir))
+    writer = Output_Writer(buffer_size=buffer_size, fsync=fsync, batch_size=sys.maxsize)
+    job_stats = Run_Stats()
+    job_report = Re_Numbering_Report()
+    result = Re_Numbering_Result(file=file)
+    try:
+        with contextlib.redirect_stdout(out), job_stats if stats else contextlib.nullcontext():
+            passed: Optional[Re_Numbering_Result] = _pass_unmapped(file, options, unmapped, writer)
+            if passed is None:
+                result.saved_file = _re_numbering(
+                    file=file, writer=writer, report=job_report if report else None, **options
+                )
+            else:
+                result.saved_file, result.unmapped = passed.saved_file, True
+        result.pending = writer.pending
+    except Exception as e:
+        writer.discard()
+        result.error = str(e) or e.__class__.__name__
+    result.output = out.getvalue()
+    result.stats = job_stats.to_dict() if stats else None
+    result.issues = job_report.files.get(str(file), [])
+    return result
+
+
+def print_result(result: Re_Numbering_Result) -> None:
+    from rich.markup import escape
+
+    if result.output != "":
+        print(escape(result.output), end="")
+    if result.cached:
+        print(f"[cyan]cached[/] {escape(str(result.file))} -> {escape(str(result.saved_file))}")
+    elif result.unmapped and result.saved_file is None:
+        print(f"[blue]skipped[/] {escape(str(result.file))}: no page order")
+    elif result.unmapped:
+        print(f"[blue]unmapped[/] {escape(str(result.file))} -> {escape(str(result.saved_file))}")
+    elif result.ok:
+        print(f"[green]done[/] {escape(str(result.file))} -> {escape(str(result.saved_file))}")
+    else:
+        print(f"[red]failed[/] {escape(str(result.file))}: {escape(str(result.error))}")
+
+
+def print_summary(results: list[Re_Numbering_Result]) -> None:
+    n_failed: int = len([result for result in results if not result.ok])
+    n_cached: int = len([result for result in results if result.cached])
+    n_unmapped: int = len([result for result in results if result.unmapped])
+    print(
+        f"{len(results)} files: {len(results) - n_failed - n_cached - n_unmapped} re-numbered, {n_cached} cached, "
+        f"{n_unmapped} with no page order, {n_failed} failed."
+    )
+
+
+def is_candidate(rel_path: str, support: Iterable[str], include: list[str] = [], exclude: list[str] = []) -> bool:
+    """test if the file is to be re-numbered by its extension and glob patterns.
+    A pattern matches either the path relative to the top directory or the file name.
+    Files must match some of include, if any, and none of exclude."""
+    name: str = os.path.basename(rel_path)
+
+    def matches(pattern: str) -> bool:
+        return fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(name, pattern)
+
+    return (
+        os.path.splitext(name)[1] in support
+        and (include == [] or any(matches(pattern) for pattern in include))
+        and not any(matches(pattern) for pattern in exclude)
+    )
+
+
+def iter_candidates(
+    dir: Path,
+    support: list[str],
+    recursive: bool = False,
+    include: list[str] = [],
+    exclude: list[str] = [],
+    skip_dirs: list[Path] = [],
+) -> Iterator[Path]:
+    """yield files to be re-numbered under dir lazily, listing each directory only once with os.scandir whatever the number of extensions.
+    Entries of a directory are sorted by name, and subdirectories are visited after the files of the directory.
+    Directories in skip_dirs, such as an output directory, are not visited."""
+    support_set: frozenset[str] = frozenset(support)
+    skip: set[str] = {os.path.realpath(d) for d in skip_dirs}
+    stack: list[tuple[str, str]] = [(str(dir), "")]
+    while stack != []:
+        path, rel = stack.pop()
+        with os.scandir(path) as it:
+            entries: list[os.DirEntry] = sorted(it, key=lambda entry: entry.name)
+        for entry in entries:
+            if entry.is_file() and is_candidate(f"{rel}{entry.name}", support_set, include, exclude):
+                yield Path(entry.path)
+        if recursive:
+            subdirs = [entry for entry in entries if entry.is_dir() and os.path.realpath(entry.path) not in skip]
+            stack.extend((entry.path, f"{rel}{entry.name}/") for entry in reversed(subdirs))
+
+
+def iter_manifest(
+    manifest: Path, support: list[str], include: list[str] = [], exclude: list[str] = []
+) -> Iterator[Path]:
+    """yield files listed in the manifest lazily, one path per row. blank rows and rows starting with '#' are ignored.
+    Relative paths are resolved against the directory of the manifest."""
+    support_set: frozenset[str] = frozenset(support)
+    with open(manifest) as f:
+        for row in f:
+            row = row.strip()
+            if row == "" or row.startswith("#"):
+                continue
+            file: Path = Path(row) if os.path.isabs(row) else manifest.parent / row
+            if is_candidate(row, support_set, include, exclude):
+                yield file
+
+
+def _iter_results_bounded(
+    executor: Executor,
+    fn: Callable[[Path], Re_Numbering_Result],
+    files: Iterable[Path],
+    window: int,
+    lookup: Optional[Callable[[Path], Optional[Re_Numbering_Result]]] = None,
+) -> Iterator[Re_Numbering_Result]:
+    """submit jobs for files as they come with at most window of them in flight, and yield the results in the order of files.
+    Files for which lookup gives a result are not submitted, and the result is yielded in place."""
+    from concurrent.futures import Future
+
+    pending: collections.deque[Future[Re_Numbering_Result]] = collections.deque()
+    for file in files:
+        found: Optional[Re_Numbering_Result] = None if lookup is None else lookup(file)
+        if found is None:
+            pending.append(executor.submit(fn, file))
+        else:
+            done: Future[Re_Numbering_Result] = Future()
+            pending.append(done)
+            done.set_result(found)
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _re_numbering_pipelined(
+    files: Iterable[Path],
+    options: dict[str, Any],
+    in_flight: int,
+    writer: Output_Writer,
+    results: list[Re_Numbering_Result],
+    base_dir: Optional[Path] = None,
+    pass_over: Callable[[Path, dict[str, Any]], Optional[Re_Numbering_Result]] = lambda file, options: None,
+    report: Optional[Re_Numbering_Report] = None,
+) -> None:
+    """re-number files in a pipeline run by asyncio, where the next files are read by threads, the current file is re-numbered
+    and the previous files are written, all at the same time. At most in_flight files are read ahead and at most in_flight
+    are waiting to be written, which caps memory. options are those of _re_numbering without stream and mapped.
+    Outputs are written by threads too. pass_over, which may look up the cache, is called by a single thread in the order of files,
+    since the cache is not thread-safe. results are appended in the order of files as soon as each file is done,
+    and errors of a file are reported as its result, as with jobs > 1."""
+    import asyncio
+
+    asyncio.run(_run_pipeline(files, options, in_flight, writer, results, base_dir, pass_over, report))
+
+
+async def _run_pipeline(
+    files: Iterable[Path],
+    options: dict[str, Any],
+    in_flight: int,
+    writer: Output_Writer,
+    results: list[Re_Numbering_Result],
+    base_dir: Optional[Path],
+    pass_over: Callable[[Path, dict[str, Any]], Optional[Re_Numbering_Result]],
+    report: Optional[Re_Numbering_Report],
+) -> None:
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    loop = asyncio.get_running_loop()
+    # None marks the end of files
+    read_queue: asyncio.Queue[Optional[tuple[Path, dict[str, Any], asyncio.Task]]] = asyncio.Queue(maxsize=in_flight)
+    write_queue: asyncio.Queue[Optional[tuple[Re_Numbering_Result, Optional[asyncio.Future[Path]]]]] = asyncio.Queue(
+        maxsize=in_flight
+    )
+
+    with (
+        ThreadPoolExecutor(max_workers=in_flight) as readers,
+        ThreadPoolExecutor(max_workers=in_flight) as writers,
+        ThreadPoolExecutor(max_workers=1) as passes,
+    ):
+
+        def read(file: Path) -> str:
+            return _read_text(_check_file(file, options["support"]))
+
+        async def prepare(file: Path, file_options: dict[str, Any]) -> Re_Numbering_Result | str:
+            found: Optional[Re_Numbering_Result] = await loop.run_in_executor(passes, pass_over, file, file_options)
+            return found if found is not None else await loop.run_in_executor(readers, read, file)
+
+        async def read_ahead() -> None:
+            for file in files:
+                file_options: dict[str, Any] = dict(
+                    options, dir_out=get_dir_out_mirrored(file, options["dir_out"], base_dir)
+                )
+                await read_queue.put((file, file_options, asyncio.create_task(prepare(file, file_options))))
+            await read_queue.put(None)
+
+        async def re_number() -> None:
+            while (item := await read_queue.get()) is not None:
+                file, file_options, prepared = item
+                result = Re_Numbering_Result(file=file)
+                saving: Optional[asyncio.Future[Path]] = None
+                try:
+                    text: Re_Numbering_Result | str = await prepared
+                    if isinstance(text, Re_Numbering_Result):
+                        result = text
+                    else:
+                        text_out: str = _re_numbering_text(
+                            text,
+                            file,
+                            missing_page_number=file_options["missing_page_number"],
+                            add_last_space=file_options["add_last_space"],
+                            on_disorder=file_options["on_disorder"],
+                            report=report,
+                        )
+                        saving = loop.run_in_executor(
+                            writers,
+                            functools.partial(
+                                _save_re_numbered,
+                                text_out,
+                                file,
+                                file_options["dir_out"],
+                                file_options["prefix"],
+                                file_options["suffix"],
+                                file_options["join_with"],
+                                file_options["overwrite"],
+                                writer,
+                            ),
+                        )
+                except Exception as e:
+                    result.error = str(e) or e.__class__.__name__
+                await write_queue.put((result, saving))
+            await write_queue.put(None)
+
+        async def write_behind() -> None:
+            while (item := await write_queue.get()) is not None:
+                result, saving = item
+                if saving is not None:
+                    try:
+                        result.saved_file = await saving
+                    except Exception as e:
+                        result.error = str(e) or e.__class__.__name__
+                print_result(result)
+                results.append(result)
+
+        await asyncio.gather(read_ahead(), re_number(), write_behind())
+
+
+def _re_numbering_files(
+    files: Iterable[Path],
+    dir_out: Optional[str | Path],
+    prefix: str = "",
+    suffix: str = "",
+    join_with: str = "",
+    overwrite: bool = False,
+    missing_page_number: bool = False,
+    add_last_space: bool = False,
+    support: list[str] = [".txt"],
+    stream: bool = False,
+    on_disorder: Disorder_Policy = "ask",
+    jobs: int = 1,
+    base_dir: Optional[Path] = None,
+    cache: Optional[Re_Numbering_Cache] = None,
+    buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+    fsync: Fsync_Policy = "none",
+    mapped: bool = False,
+    report: Optional[Re_Numbering_Report] = None,
+    unmapped: Unmapped_Policy = "process",
+    in_flight: int = 0,
+) -> list[Re_Numbering_Result]:
+    """re-number files, which are consumed lazily. if jobs > 1, files are processed in parallel by that many processes,
+    where user cannot be asked and on_disorder="ask" falls back to "abort". results are reported in the order of files.
+    If base_dir is given, outputs under dir_out mirror the places of files under base_dir.
+    A file whose output is that of an earlier file fails, instead of overwriting it.
+    If cache is given, files not changed since the last run are skipped. it is not used with missing_page_number or report,
+    which need each file to be parsed.
+    Outputs are written atomically with buffer_size and fsync. see Output_Writer.
+    While Run_Stats is entered, stats of worker processes are merged into it. issues found in files are added to report.
+    Files having no page order are passed over by unmapped, except with missing_page_number or report, see _pass_unmapped.
+    If in_flight > 0 and jobs <= 1, files are pipelined so that reading, re-numbering and writing overlap,
+    with on_disorder="ask" falling back to "abort" as with jobs > 1. see _re_numbering_pipelined. it is not used with stream or mapped."""
+    options: dict[str, Any] = dict(
+        dir_out=dir_out,
+        prefix=prefix,
+        suffix=suffix,
+        join_with=join_with,
+        overwrite=overwrite,
+        missing_page_number=missing_page_number,
+        add_last_space=add_last_space,
+        support=support,
+        stream=stream,
+        on_disorder=on_disorder,
+        mapped=mapped,
+    )
+    if missing_page_number or report is not None:
+        cache = None
+        unmapped = "process"
+
+    # outputs of the files so far, so that a file whose output is that of an earlier file fails instead of overwriting it,
+    # e.g., files of the same name listed in a manifest outside its directory.
+    claimed: set[Path] = set()
+
+    def lookup(file: Path) -> Optional[Re_Numbering_Result]:
+        file_out: Path = get_file_out(
+            file, get_dir_out_mirrored(file, dir_out, base_dir), prefix, suffix, join_with, overwrite
         )
-        if not success:
-            raise Exception(f"failed to save {str(saved_file)}.")
-        return saved_file
+        if file_out in claimed:
+            return Re_Numbering_Result(file=file, error=f"{file_out} is the output of an earlier file.")
+        claimed.add(file_out)
+        if cache is None:
+            return None
+        with stage("cache"):
+            hit: bool = cache.lookup(file, file_out)
+        return Re_Numbering_Result(file=file, saved_file=file_out, cached=True) if hit else None
+
+    def pass_over(file: Path, file_options: dict[str, Any]) -> Optional[Re_Numbering_Result]:
+        found: Optional[Re_Numbering_Result] = lookup(file)
+        return _pass_unmapped(file, file_options, unmapped, writer) if found is None else found
+
+    results: list[Re_Numbering_Result] = []
+    writer = Output_Writer(buffer_size=buffer_size, fsync=fsync)
+    try:
+        if jobs <= 1 and in_flight > 0 and not stream and not mapped:
+            options["on_disorder"] = "abort" if on_disorder == "ask" else on_disorder
+            _re_numbering_pipelined(files, options, in_flight, writer, results, base_dir, pass_over, report)
+            print_summary(results)
+            return results
+        if jobs <= 1:
+            for file in files:
+                file_options: dict[str, Any] = dict(options, dir_out=get_dir_out_mirrored(file, dir_out, base_dir))
+                found: Optional[Re_Numbering_Result] = pass_over(file, file_options)
+                if found is None:
+                    saved_file: Path = _re_numbering(file=file, writer=writer, report=report, **file_options)
+                    found = Re_Numbering_Result(file=file, saved_file=saved_file)
+                elif not found.ok:
+                    print_result(found)
+                results.append(found)
+            return results
+        options["on_disorder"] = "abort" if on_disorder == "ask" else on_disorder
+        stats: Optional[Run_Stats] = get_current()
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            job = functools.partial(
+                _re_numbering_job,
+                options=options,
+                base_dir=base_dir,
+                buffer_size=buffer_size,
+                fsync=fsync,
+                stats=stats is not None,
+                report=report is not None,
+                unmapped=unmapped,
+            )
+            for result in _iter_results_bounded(executor, job, files, window=2 * jobs, lookup=lookup):
+                writer.adopt(result.pending)
+                if stats is not None and result.stats is not None:
+                    stats.merge(result.stats)
+                if report is not None:
+                    report.add(result.file, result.issues)
+                print_result(result)
+                results.append(result)
+        print_summary(results)
+        return results
+    finally:
+        # outputs are recorded after they are committed
+        with stage("flush"):
+            writer.close()
+        if cache is not None:
+            for result in results:
+                if result.ok and not result.cached and result.saved_file is not None:
+                    cache.record(result.file, result.saved_file)
+            cache.save()
 
 
 def _re_numbering_all(
@@ -87,20 +833,51 @@ def _re_numbering_all(
     missing_page_number: bool = False,
     add_last_space: bool = False,
     support: list[str] = [".txt"],
-) -> None:
+    stream: bool = False,
+    on_disorder: Disorder_Policy = "ask",
+    jobs: int = 1,
+    recursive: bool = False,
+    include: list[str] = [],
+    exclude: list[str] = [],
+    cache: Optional[Re_Numbering_Cache] = None,
+    buffer_size: int = io.DEFAULT_BUFFER_SIZE,
+    fsync: Fsync_Policy = "none",
+    mapped: bool = False,
+    report: Optional[Re_Numbering_Report] = None,
+    unmapped: Unmapped_Policy = "process",
+    in_flight: int = 0,
+) -> list[Re_Numbering_Result]:
+    """re-number all files in the directory, or in the directory tree if recursive. see _re_numbering_files."""
     dir = Path(dir)
     if not dir.is_dir():
         raise ValueError(f"{dir} is not a directory.")
-    for extension in support:
-        for file in dir.glob(f"*{extension}"):
-            _re_numbering(
-                file=file,
-                dir_out=dir_out,
-                prefix=prefix,
-                suffix=suffix,
-                join_with=join_with,
-                overwrite=overwrite,
-                missing_page_number=missing_page_number,
-                add_last_space=add_last_space,
-                support=support,
-            )
+    files: Iterator[Path] = iter_candidates(
+        dir,
+        support=support,
+        recursive=recursive,
+        include=include,
+        exclude=exclude,
+        skip_dirs=[] if dir_out is None or overwrite else [Path(dir_out)],
+    )
+    return _re_numbering_files(
+        files=files,
+        dir_out=dir_out,
+        prefix=prefix,
+        suffix=suffix,
+        join_with=join_with,
+        overwrite=overwrite,
+        missing_page_number=missing_page_number,
+        add_last_space=add_last_space,
+        support=support,
+        stream=stream,
+        on_disorder=on_disorder,
+        jobs=jobs,
+        base_dir=dir if recursive else None,
+        cache=cache,
+        buffer_size=buffer_size,
+        fsync=fsync,
+        mapped=mapped,
+        report=report,
+        unmapped=unmapped,
+        in_flight=in_flight,
+    )
@@ -1,15 +1,33 @@
+import contextlib
+import io
+import sys
 from pathlib import Path
 
 import click
 
-from main import _re_numbering, _re_numbering_all
+from main import (
+    Re_Numbering_Result,
+    Unmapped_Policy,
+    _re_numbering_all,
+    _re_numbering_files,
+    _re_numbering_pipe,
+    iter_manifest,
+    open_cache,
+    print,
+)
+from Output_Writer import Fsync_Policy
+from Re_Numbering import Disorder_Policy
+from Re_Numbering_Report import NDJSON_SUFFIXES, Re_Numbering_Report
+from Run_Stats import Run_Stats
 
 # this file is for turning main.py into command line tool by click package.
 # just decorating core functions in main.py
 
 
-@click.command(help="re-numbering digit number located at the end of each row in a text file.")
-@click.argument("path", type=click.Path(exists=True))
+@click.command(
+    help="re-numbering digit number located at the end of each row in a text file. with PATH '-', rows are read from stdin and written to stdout as they are re-numbered, and everything else is printed to stderr. options for output files are ignored then."
+)
+@click.argument("path", type=click.Path(exists=True, allow_dash=True))
 @click.option(
     "-d",
     "--dirout",
@@ -50,32 +68,252 @@ from main import _re_numbering, _re_numbering_all
 @click.option(
     "-b", "--blank", type=bool, is_flag=True, help="add blank line at the end of the text if there is not the one."
 )
+@click.option(
+    "--stream",
+    type=bool,
+    is_flag=True,
+    help="read, re-number and write rows one at a time. memory use stays flat no matter how large the input is.",
+)
+@click.option(
+    "-J",
+    "--jobs",
+    default=1,
+    type=click.IntRange(min=1),
+    help="number of processes re-numbering files in parallel when PATH is a directory. the default is 1. with more than 1, rows disturbing the order of page numbers make the file fail instead of asking whether to continue.",
+)
+@click.option(
+    "--pipeline",
+    default=0,
+    type=click.IntRange(min=0),
+    help="number of files read ahead and waiting to be written when PATH is a directory or a manifest, so that reading, re-numbering and writing files overlap, which helps on slow file systems. rows disturbing the order of page numbers make the file fail as with --jobs. not used with --jobs, --stream or --mmap. the default is 0, one file at a time.",
+)
+@click.option(
+    "-r",
+    "--recursive",
+    type=bool,
+    is_flag=True,
+    help="also re-number files in subdirectories when PATH is a directory.",
+)
+@click.option(
+    "--include",
+    multiple=True,
+    type=str,
+    help="glob pattern of file paths, relative to PATH, to be re-numbered. can be given more than once. the default takes all files.",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    type=str,
+    help="glob pattern of file paths, relative to PATH, not to be re-numbered. can be given more than once.",
+)
+@click.option(
+    "-M",
+    "--manifest",
+    type=bool,
+    is_flag=True,
+    help="treat PATH as a text file listing files to be re-numbered, one path per row. relative paths are resolved against the directory of PATH, and outputs in --dirout mirror their places under it.",
+)
+@click.option(
+    "--cache",
+    type=bool,
+    is_flag=True,
+    help="skip files whose content and options are the same as the last run with this option. the cache is kept in the output directory.",
+)
+@click.option(
+    "--buffer-size",
+    default=io.DEFAULT_BUFFER_SIZE,
+    type=click.IntRange(min=1),
+    help=f"size in bytes of the buffer for writing outputs. the default is {io.DEFAULT_BUFFER_SIZE}.",
+)
+@click.option(
+    "--fsync",
+    default="none",
+    type=click.Choice(["none", "file", "batch"]),
+    help="when to flush outputs to disk. 'none' leaves it to OS, 'file' flushes every output, and 'batch' flushes outputs together in batches, which is cheaper for many files. the default is 'none'.",
+)
+@click.option(
+    "--mmap",
+    type=bool,
+    is_flag=True,
+    help="map input files into memory and decode only the ends of rows where page numbers are, which saves memory for huge files. files not in UTF-8 or with unusual line breaks are read as usual.",
+)
+@click.option(
+    "--on-disorder",
+    default="ask",
+    type=click.Choice(["ask", "abort", "warn", "ignore", "report"]),
+    help="what to do when page numbers decrease after re-numbering. 'ask' asks whether to continue, 'abort' fails the file, 'warn' shows the rows and continues, 'ignore' continues silently, and 'report' continues and reports the rows with the other issues, see --report. the default is 'ask'.",
+)
+@click.option(
+    "--report",
+    type=click.Path(dir_okay=False),
+    help="save rows with decreasing page numbers, rows with no page number and unintended mappings into the file, as NDJSON if it ends with .ndjson or .jsonl and as JSON otherwise. with --on-disorder=report and no file, they are printed as NDJSON. files are never skipped by --cache with this option.",
+)
+@click.option(
+    "--unmapped",
+    default="process",
+    type=click.Choice(["process", "copy", "link", "skip"]),
+    help="what to do with files having no 'old -> new' row, found by a quick search of bytes. 'process' re-numbers them as usual, 'copy' copies them to the output as they are, 'link' hard-links them there, falling back to copy, and 'skip' writes nothing. such files are not checked for decreasing page numbers. ignored with --missing or --report. the default is 'process'.",
+)
+@click.option(
+    "--profile",
+    type=bool,
+    is_flag=True,
+    help="show time taken by each stage, such as parsing, re-numbering and writing, together with functions taking the most time by cProfile.",
+)
+@click.option(
+    "--stats-json",
+    type=click.Path(dir_okay=False),
+    help="save time taken by each stage and numbers of files, lines and bytes processed into the JSON file.",
+)
 def renumbering(
-    path: str | Path, dirout: str | None, pre: str, suf: str, join: str, overwrite: bool, missing: bool, blank: bool
+    path: str | Path,
+    dirout: str | None,
+    pre: str,
+    suf: str,
+    join: str,
+    overwrite: bool,
+    missing: bool,
+    blank: bool,
+    stream: bool,
+    jobs: int,
+    pipeline: int,
+    recursive: bool,
+    include: tuple[str, ...],
+    exclude: tuple[str, ...],
+    manifest: bool,
+    cache: bool,
+    buffer_size: int,
+    fsync: Fsync_Policy,
+    mmap: bool,
+    on_disorder: Disorder_Policy,
+    report: str | None,
+    unmapped: Unmapped_Policy,
+    profile: bool,
+    stats_json: str | None,
 ) -> None:
-    path = Path(path)
-    if path.is_file():
-        _re_numbering(
-            file=path,
-            dir_out=dirout,
-            prefix=pre,
-            suffix=suf,
-            join_with=join,
-            overwrite=overwrite,
-            missing_page_number=missing,
-            add_last_space=blank,
+    pipe: bool = str(path) == "-"
+    # with "-", stdout is for rows, so that messages go to stderr.
+    # so do they when the NDJSON report of --on-disorder=report is printed, so that stdout is for the report.
+    report_to_stdout: bool = on_disorder == "report" and report is None and not pipe
+    info = sys.stderr if pipe or report_to_stdout else sys.stdout
+    ndjson_out = sys.stderr if pipe else sys.stdout
+    with contextlib.redirect_stdout(sys.stderr) if report_to_stdout else contextlib.nullcontext():
+        path = Path(path)
+        dir_cache: Path = (
+            Path(dirout) if dirout is not None and not overwrite else path if path.is_dir() else path.parent
         )
-    elif path.is_dir():
-        _re_numbering_all(
-            dir=path,
-            dir_out=dirout,
-            prefix=pre,
-            suffix=suf,
-            join_with=join,
-            overwrite=overwrite,
-            missing_page_number=missing,
-            add_last_space=blank,
+        re_numbering_cache = (
+            open_cache(dir_cache, add_last_space=blank, on_disorder=on_disorder) if cache and not pipe else None
         )
+        results: list[Re_Numbering_Result] = []
+        stats = Run_Stats(profile=profile)
+        with contextlib.ExitStack() as stack:
+            issue_report: Re_Numbering_Report | None = None
+            if report is not None and Path(report).suffix in NDJSON_SUFFIXES:
+                issue_report = Re_Numbering_Report(ndjson=stack.enter_context(open(report, mode="w")))
+            elif report is not None:
+                issue_report = Re_Numbering_Report()
+                # saved even when aborted on disorder
+                stack.callback(issue_report.save, Path(report))
+            elif on_disorder == "report":
+                issue_report = Re_Numbering_Report(ndjson=ndjson_out)
+            if profile or stats_json is not None:
+                stack.enter_context(stats)
+            if pipe:
+                results = [
+                    _re_numbering_pipe(
+                        sys.stdin,
+                        sys.stdout,
+                        missing_page_number=missing,
+                        add_last_space=blank,
+                        on_disorder=on_disorder,
+                        report=issue_report,
+                    )
+                ]
+                if not results[0].ok:
+                    click.echo(f"failed -: {results[0].error}", err=True)
+            elif manifest:
+                results = _re_numbering_files(
+                    files=iter_manifest(path, support=[".txt"], include=list(include), exclude=list(exclude)),
+                    dir_out=dirout,
+                    prefix=pre,
+                    suffix=suf,
+                    join_with=join,
+                    overwrite=overwrite,
+                    missing_page_number=missing,
+                    add_last_space=blank,
+                    stream=stream,
+                    jobs=jobs,
+                    cache=re_numbering_cache,
+                    buffer_size=buffer_size,
+                    fsync=fsync,
+                    mapped=mmap,
+                    on_disorder=on_disorder,
+                    report=issue_report,
+                    unmapped=unmapped,
+                    in_flight=pipeline,
+                    base_dir=path.parent,
+                )
+            elif path.is_file():
+                results = _re_numbering_files(
+                    files=[path],
+                    dir_out=dirout,
+                    prefix=pre,
+                    suffix=suf,
+                    join_with=join,
+                    overwrite=overwrite,
+                    missing_page_number=missing,
+                    add_last_space=blank,
+                    support=[".txt", ".yaml", "yml"],
+                    stream=stream,
+                    cache=re_numbering_cache,
+                    buffer_size=buffer_size,
+                    fsync=fsync,
+                    mapped=mmap,
+                    on_disorder=on_disorder,
+                    report=issue_report,
+                    unmapped=unmapped,
+                )
+            elif path.is_dir():
+                results = _re_numbering_all(
+                    dir=path,
+                    dir_out=dirout,
+                    prefix=pre,
+                    suffix=suf,
+                    join_with=join,
+                    overwrite=overwrite,
+                    missing_page_number=missing,
+                    add_last_space=blank,
+                    stream=stream,
+                    jobs=jobs,
+                    recursive=recursive,
+                    include=list(include),
+                    exclude=list(exclude),
+                    cache=re_numbering_cache,
+                    buffer_size=buffer_size,
+                    fsync=fsync,
+                    mapped=mmap,
+                    on_disorder=on_disorder,
+                    report=issue_report,
+                    unmapped=unmapped,
+                    in_flight=pipeline,
+                )
+        if re_numbering_cache is not None:
+            print(re_numbering_cache.summary())
+        if report is not None and issue_report is not None:
+            print(issue_report.summary(), file=info)
+        if unmapped != "process" and not pipe:
+            n_unmapped: int = len([result for result in results if result.unmapped])
+            print(
+                f"{n_unmapped} of {len(results)} files had no page order and were passed over by --unmapped={unmapped}."
+            )
+        if profile:
+            # plain echo, so that rich neither wraps nor marks up the table of cProfile
+            click.echo(stats.format(), file=info)
+        if stats_json is not None:
+            stats.save_json(Path(stats_json))
+        if not all(result.ok for result in results):
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import json
+import sys
+from pathlib import Path
+
+import click
+
+from Re_Numbering_Server import DEFAULT_SOCKET, Job, run_jobs
+
+# this file is for turning Re_Numbering_Server.py into command line tool by click package.
+# main.py is imported only when no server is running and files are re-numbered in this process.
+
+
+@click.command(
+    help="re-number files by the running server of renumbering_server.py, or in this process if no server is running."
+)
+@click.argument("paths", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option("-d", "--dirout", type=click.Path(file_okay=False), help="directory where output text files are saved.")
+@click.option("-p", "--pre", default="", type=str, help="prefix for the stem-name of output text files.")
+@click.option("-s", "--suf", default="_renumbered", type=str, help="suffix for the stem-name of output text files.")
+@click.option(
+    "-j", "--join", default="", type=str, help="the character with which prefix, file name and suffix are combined."
+)
+@click.option("-o", "--overwrite", type=bool, is_flag=True, help="overwrite input files with outputs.")
+@click.option("-m", "--missing", type=bool, is_flag=True, help="point out rows with no page number.")
+@click.option(
+    "-b", "--blank", type=bool, is_flag=True, help="add blank line at the end of the text if there is not the one."
+)
+@click.option(
+    "--on-disorder",
+    default="abort",
+    type=click.Choice(["abort", "warn", "ignore", "report"]),
+    help="what to do when page numbers decrease after re-numbering, see renumbering.py. the default is 'abort'.",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    default=str(DEFAULT_SOCKET),
+    type=click.Path(dir_okay=False),
+    help=f"Unix socket of the server. the default is {DEFAULT_SOCKET}.",
+)
+@click.option("--local", type=bool, is_flag=True, help="re-number files in this process without looking for a server.")
+@click.option(
+    "--json", "as_json", type=bool, is_flag=True, help="print replies of the server as they are, one per row."
+)
+def client(
+    paths: tuple[str, ...],
+    dirout: str | None,
+    pre: str,
+    suf: str,
+    join: str,
+    overwrite: bool,
+    missing: bool,
+    blank: bool,
+    on_disorder: str,
+    socket_path: str,
+    local: bool,
+    as_json: bool,
+) -> None:
+    # paths are resolved here, since the server resolves relative ones against its own working directory
+    options = dict(
+        dir_out=None if dirout is None else str(Path(dirout).resolve()),
+        prefix=pre,
+        suffix=suf,
+        join_with=join,
+        overwrite=overwrite,
+        missing_page_number=missing,
+        add_last_space=blank,
+        on_disorder=on_disorder,
+    )
+    jobs: list[Job] = [{"id": i, "path": str(Path(path).resolve()), "options": options} for i, path in enumerate(paths)]
+    n_failed: int = 0
+    for reply in run_jobs(jobs, None if local else Path(socket_path)):
+        n_failed += not reply["ok"]
+        if as_json:
+            click.echo(json.dumps(reply, ensure_ascii=False))
+            continue
+        click.echo(reply["output"], nl=False)
+        if reply["ok"]:
+            click.echo(f"done {paths[reply['id']]} -> {reply['saved_file']}")
+        else:
+            click.echo(f"failed {paths[reply['id']]}: {reply['error']}")
+    if n_failed > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    client()
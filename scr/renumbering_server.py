@@ -0,0 +1,40 @@
+import sys
+from pathlib import Path
+
+import click
+
+from Re_Numbering_Server import DEFAULT_SOCKET, Re_Numbering_Server, serve_stream, warm_up
+
+# this file is for turning Re_Numbering_Server.py into command line tool by click package.
+
+
+@click.command(
+    help="serve re-numbering jobs, one JSON object per row, keeping the parser loaded between jobs. each job is "
+    '{"path": FILE} or {"text": TEXT}, with "options" and "id", and is replied with a JSON object per row in the same order.'
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help=f"listen on the Unix socket at the path instead of reading stdin. the default path of clients is {DEFAULT_SOCKET}.",
+)
+@click.option(
+    "--default-socket",
+    type=bool,
+    is_flag=True,
+    help="listen on the default Unix socket, where clients look for a server unless told otherwise.",
+)
+def serve(socket_path: str | None, default_socket: bool) -> None:
+    if socket_path is None and not default_socket:
+        warm_up()
+        serve_stream(sys.stdin, sys.stdout)
+        return
+    with Re_Numbering_Server(DEFAULT_SOCKET if socket_path is None else Path(socket_path)) as server:
+        try:
+            server.serve()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    serve()
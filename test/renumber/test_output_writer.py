@@ -0,0 +1,41 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(".", "scr"))
+from Output_Writer import Output_Writer  # type: ignore
+
+
+def test_failed_write_leaves_target_untouched(tmp_path):
+    target = tmp_path / "toc.txt"
+    target.write_text("original")
+
+    def lines():
+        yield "a 1"
+        raise RuntimeError("crash")
+
+    with pytest.raises(RuntimeError):
+        Output_Writer().write_lines(lines(), target)
+    assert target.read_text() == "original"
+    assert os.listdir(tmp_path) == ["toc.txt"]
+
+
+@pytest.mark.parametrize("fsync", ["none", "file"])
+def test_write_keeps_mode(tmp_path, fsync):
+    target = tmp_path / "toc.txt"
+    target.write_text("original")
+    target.chmod(0o640)
+    Output_Writer(buffer_size=4, fsync=fsync).write_lines(["a 1", "b 2"], target, add_last_space=True)
+    assert target.read_text() == "a 1\nb 2\n"
+    assert target.stat().st_mode & 0o777 == 0o640
+
+
+def test_batch_commits_on_flush(tmp_path):
+    with Output_Writer(fsync="batch", batch_size=3) as writer:
+        for i in range(4):
+            writer.write_text(f"a {i}", tmp_path / f"{i}.txt")
+        # the first batch is committed, the rest waits for flush
+        assert sorted(p.name for p in tmp_path.glob("*.txt")) == ["0.txt", "1.txt", "2.txt"]
+    assert (tmp_path / "3.txt").read_text() == "a 3"
+    assert sorted(os.listdir(tmp_path)) == ["0.txt", "1.txt", "2.txt", "3.txt"]
@@ -5,6 +5,7 @@ from typing import Optional
 import pytest
 
 sys.path.append(os.path.join(".", "scr"))
+from Columnar_Text_Lines import Columnar_Paged_Text_Lines  # type: ignore
 from Re_Numbering import Re_Numbering  # type: ignore
 
 # from scr.Re_Numbering import Re_Numbering
@@ -39,3 +40,40 @@ def test_get_order_disturbing_rows_found(data_get_order_disturbing_rows_found):
         ptls = Paged_Text_Lines(data)
         print(ptls)
         assert renumbering._get_order_disturbing_rows(ptls) != []
+
+
+def test_get_new_numbers_batch(data_get_new_numbers):
+    for data, ans in data_get_new_numbers:
+        for ptls in (Paged_Text_Lines(data), Columnar_Paged_Text_Lines(data)):
+            renumbering = Re_Numbering(ptls, kernel="batch")
+            assert renumbering._get_new_numbers_batch() == ans
+
+
+def test_batch_kernel_matches_loop():
+    for sample in ["sample1.txt", "trivial_mapping.txt"]:
+        with open(os.path.join(".", "sample", sample)) as f:
+            text: str = f.read()
+        for ptls in (Paged_Text_Lines(text), Columnar_Paged_Text_Lines(text)):
+            loop = Re_Numbering(ptls).re_numbering()
+            batch = Re_Numbering(ptls, kernel="batch").re_numbering()
+            assert batch.to_text() == loop.to_text()
+
+
+def test_get_order_disturbing_rows_batch(data_get_order_disturbing_rows_found):
+    renumbering = Re_Numbering(Paged_Text_Lines(), kernel="batch")
+    for data in data_get_order_disturbing_rows_found:
+        ptls = Paged_Text_Lines(data)
+        assert [line.idx for line in renumbering._get_order_disturbing_rows_batch(ptls)] == [
+            line.idx for line in renumbering._get_order_disturbing_rows(ptls)
+        ]
+
+
+def test_re_numbering_keeps_text():
+    # numbers and roman numbers in text are not parsed again after re-numbering
+    data = ["text2 203 204", "text 5 iv", "hoge 3->5", "hoge 4"]
+    for lines in [Paged_Text_Lines(data), Columnar_Paged_Text_Lines(data)]:
+        updated = Re_Numbering(lines, on_disorder="warn").re_numbering()
+        assert updated.to_list_str() == ["text2 203 204", "text 5 iv", "hoge 5", "hoge 6"]
+        assert [line.page_order.set for line in updated] == [False] * 4
+        # the original is left as it was
+        assert lines.to_list_str() == ["text2 203 204", "text 5 iv", "hoge 5", "hoge 4"]
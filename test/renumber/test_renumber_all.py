@@ -0,0 +1,100 @@
+import os
+import shutil
+import sys
+
+sys.path.append(os.path.join(".", "scr"))
+from main import _re_numbering_all, _re_numbering_files, iter_manifest  # type: ignore
+
+
+def test_re_numbering_all_in_parallel(tmp_path):
+    for i in range(4):
+        shutil.copy(os.path.join(".", "sample", "sample1.txt"), tmp_path / f"toc{i}.txt")
+    (tmp_path / "disordered.txt").write_text("a 5\nb 3\n")
+    dir_out = tmp_path / "out"
+    results = _re_numbering_all(dir=tmp_path, dir_out=dir_out, suffix="_renumbered", jobs=2)
+    assert [result.file.name for result in results] == ["disordered.txt"] + [f"toc{i}.txt" for i in range(4)]
+    assert [result.ok for result in results] == [False, True, True, True, True]
+    assert not (dir_out / "disordered_renumbered.txt").exists()
+    with open(os.path.join(".", "sample", "sample1_renumbered.txt")) as f:
+        expected: str = f.read()
+    for i in range(4):
+        assert (dir_out / f"toc{i}_renumbered.txt").read_text() == expected
+
+
+def test_re_numbering_all_recursive_with_filters(tmp_path):
+    (tmp_path / "sub" / "deep").mkdir(parents=True)
+    for rel in ["a.txt", "skip.txt", "sub/a.txt", "sub/deep/c.txt", "sub/note.md"]:
+        (tmp_path / rel).write_text("a 1\nb 2\n")
+    dir_out = tmp_path / "out"
+    results = _re_numbering_all(dir=tmp_path, dir_out=dir_out, suffix="_renumbered", recursive=True, exclude=["skip*"])
+    assert [result.file.relative_to(tmp_path).as_posix() for result in results] == [
+        "a.txt",
+        "sub/a.txt",
+        "sub/deep/c.txt",
+    ]
+    # outputs mirror the tree, so files of the same name do not collide
+    assert (dir_out / "a_renumbered.txt").exists()
+    assert (dir_out / "sub" / "a_renumbered.txt").exists()
+    assert (dir_out / "sub" / "deep" / "c_renumbered.txt").exists()
+    results = _re_numbering_all(dir=tmp_path, dir_out=dir_out, suffix="_renumbered", include=["a.txt"])
+    assert [result.file.name for result in results] == ["a.txt"]
+
+
+def test_re_numbering_manifest(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.txt").write_text("b 3\n")
+    (tmp_path / "a.txt").write_text("a 1\n")
+    (tmp_path / "files.lst").write_text("# comment\nsub/b.txt\n\na.txt\nignored.md\n")
+    assert list(iter_manifest(tmp_path / "files.lst", support=[".txt"])) == [
+        tmp_path / "sub" / "b.txt",
+        tmp_path / "a.txt",
+    ]
+    results = _re_numbering_files(iter_manifest(tmp_path / "files.lst", support=[".txt"]), dir_out=None, suffix="_r")
+    assert all(result.ok for result in results)
+    assert (tmp_path / "sub" / "b_r.txt").exists()
+
+
+def test_re_numbering_manifest_mirrored(tmp_path):
+    manifest = tmp_path / "list" / "files.lst"
+    for rel in ["list/a/ch1.txt", "list/b/ch1.txt", "c/ch1.txt", "d/ch1.txt"]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text(f"{rel} 1\n")
+    manifest.write_text(f"a/ch1.txt\nb/ch1.txt\n../c/ch1.txt\n{tmp_path / 'd' / 'ch1.txt'}\n")
+    dir_out = tmp_path / "out"
+    for options in [{}, {"jobs": 2}, {"in_flight": 2}]:
+        results = _re_numbering_files(
+            iter_manifest(manifest, support=[".txt"]), dir_out=dir_out, suffix="_r", base_dir=manifest.parent, **options
+        )
+        # files under the manifest are mirrored, and the others are put in dir_out itself, where one of them collides
+        assert [result.saved_file for result in results] == [
+            dir_out / "a" / "ch1_r.txt",
+            dir_out / "b" / "ch1_r.txt",
+            dir_out / "ch1_r.txt",
+            None,
+        ]
+        assert [result.ok for result in results] == [True, True, True, False]
+        assert (dir_out / "b" / "ch1_r.txt").read_text() == "list/b/ch1.txt 1"
+        assert (dir_out / "ch1_r.txt").read_text() == "c/ch1.txt 1"
+
+
+def test_re_numbering_all_pipelined(tmp_path):
+    for i in range(6):
+        shutil.copy(os.path.join(".", "sample", "sample1.txt"), tmp_path / f"toc{i}.txt")
+    (tmp_path / "disordered.txt").write_text("a 5 -> 5\nb 3\n")
+    (tmp_path / "plain.txt").write_text("a 1\nb 2\n")
+    dir_out = tmp_path / "out"
+    results = _re_numbering_all(
+        dir=tmp_path, dir_out=dir_out, suffix="_renumbered", in_flight=2, unmapped="skip", on_disorder="ask"
+    )
+    assert [result.file.name for result in results] == ["disordered.txt", "plain.txt"] + [
+        f"toc{i}.txt" for i in range(6)
+    ]
+    # "ask" falls back to "abort", and files with no page order are passed over
+    assert [result.ok for result in results] == [False] + [True] * 7
+    assert results[1].unmapped and results[1].saved_file is None
+    assert not (dir_out / "disordered_renumbered.txt").exists()
+    with open(os.path.join(".", "sample", "sample1_renumbered.txt")) as f:
+        expected: str = f.read()
+    for i in range(6):
+        assert results[i + 2].saved_file == dir_out / f"toc{i}_renumbered.txt"
+        assert (dir_out / f"toc{i}_renumbered.txt").read_text() == expected
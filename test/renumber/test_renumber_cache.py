@@ -0,0 +1,70 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(".", "scr"))
+from main import _re_numbering_all, open_cache  # type: ignore
+from Re_Numbering_Cache import CACHE_FILE_NAME  # type: ignore
+
+
+def run(dir_in, dir_out, add_last_space=False):
+    cache = open_cache(dir_out, add_last_space=add_last_space)
+    results = _re_numbering_all(dir=dir_in, dir_out=dir_out, suffix="_r", add_last_space=add_last_space, cache=cache)
+    return cache, results
+
+
+def test_cache_hits_and_invalidation(tmp_path):
+    dir_in, dir_out = tmp_path / "in", tmp_path / "out"
+    dir_in.mkdir()
+    for name in ["a", "b", "c"]:
+        (dir_in / f"{name}.txt").write_text("x 1\ny 2\n")
+    cache, _ = run(dir_in, dir_out)
+    assert (cache.hits, cache.misses) == (0, 3)
+    cache, results = run(dir_in, dir_out)
+    assert (cache.hits, cache.misses) == (3, 0)
+    assert all(result.cached for result in results)
+    # changed input and tampered output are re-numbered again
+    (dir_in / "a.txt").write_text("x 1\ny 3\n")
+    (dir_out / "b_r.txt").write_text("tampered")
+    cache, results = run(dir_in, dir_out)
+    assert [result.cached for result in results] == [False, False, True]
+    assert (dir_out / "b_r.txt").read_text() == "x 1\ny 2"
+    # other options miss
+    cache, _ = run(dir_in, dir_out, add_last_space=True)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_cache_of_overwritten_files(tmp_path):
+    (tmp_path / "a.txt").write_text("x 1\ny 2 -> 5\n")
+    misses = []
+    for _ in range(3):
+        cache = open_cache(tmp_path)
+        _re_numbering_all(dir=tmp_path, dir_out=None, overwrite=True, cache=cache)
+        misses.append(cache.misses)
+    assert misses == [1, 0, 0]
+    assert (tmp_path / "a.txt").read_text() == "x 1\ny 5"
+
+
+def test_cache_of_other_tool_is_ignored(tmp_path):
+    (tmp_path / "a.txt").write_text("x 1\n")
+    dir_out = tmp_path / "out"
+    run(tmp_path, dir_out)
+    data = json.loads((dir_out / CACHE_FILE_NAME).read_text())
+    data["tool"] = "old"
+    (dir_out / CACHE_FILE_NAME).write_text(json.dumps(data))
+    cache, _ = run(tmp_path, dir_out)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_cache_eviction(tmp_path):
+    for name in ["a", "b", "c"]:
+        (tmp_path / f"{name}.txt").write_text("x 1\n")
+    dir_out = tmp_path / "out"
+    run(tmp_path, dir_out)
+    os.remove(tmp_path / "a.txt")
+    cache = open_cache(dir_out)
+    cache.max_entries = 1
+    cache.lookup(tmp_path / "c.txt", dir_out / "c_r.txt")
+    cache.save()
+    entries = json.loads((dir_out / CACHE_FILE_NAME).read_text())["entries"]
+    assert list(entries) == [str((tmp_path / "c.txt").resolve())]
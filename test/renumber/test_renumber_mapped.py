@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(".", "scr"))
+from main import _re_numbering  # type: ignore
+from Mapped_Text import Mapped_Text  # type: ignore
+from Re_Numbering import Order_Disturbed  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        "hoge 1\nhoge 2->5\nhoge 3\n",
+        "第一章　序論 1\r\nhoge２ 2->5\r\n\r\nhoge 3  iv\r\n",
+        "CHAPTER I\nhoge ١٢->11\n§1 10 -> 20\nhoge 30",
+        "1\n2\n",
+    ],
+)
+def test_mapped_matches_re_numbering(tmp_path, data):
+    file = tmp_path / "toc.txt"
+    file.write_bytes(data.encode())
+    assert Mapped_Text.can_map(file)
+    for add_last_space in [False, True]:
+        expected = _re_numbering(file, tmp_path / "read", add_last_space=add_last_space, on_disorder="warn")
+        mapped = _re_numbering(
+            file, tmp_path / "mapped", add_last_space=add_last_space, on_disorder="warn", mapped=True
+        )
+        assert mapped.read_bytes() == expected.read_bytes()
+
+
+def test_mapped_tail(tmp_path):
+    file = tmp_path / "toc.txt"
+    file.write_bytes("Section 1.2 Long title 12 -> 14\nxiv".encode())
+    with Mapped_Text(file) as text:
+        assert [text.get_tail_text(i) for i in range(len(text))] == ["e 12 -> 14", "xiv"]
+        assert bytes(text.get_head(0)) == b"Section 1.2 Long titl"
+
+
+def test_unusual_line_breaks_are_not_mapped(tmp_path):
+    file = tmp_path / "toc.txt"
+    file.write_bytes(b"hoge 1\rhoge 2")
+    assert not Mapped_Text.can_map(file)
+    assert _re_numbering(file, tmp_path / "out", mapped=True).read_text() == "hoge 1\nhoge 2"
+
+
+def test_mapped_shows_whole_rows(tmp_path):
+    file = tmp_path / "toc.txt"
+    file.write_text("long title 5\nanother title 3\n")
+    with pytest.raises(Order_Disturbed, match="another title 3"):
+        _re_numbering(file, tmp_path / "out", on_disorder="abort", mapped=True)
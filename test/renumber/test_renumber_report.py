@@ -0,0 +1,95 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(".", "scr"))
+from main import _re_numbering, _re_numbering_all  # type: ignore
+from Re_Numbering import Order_Disturbed, Re_Numbering, Re_Numbering_Stream  # type: ignore
+from Re_Numbering_Report import Re_Numbering_Report  # type: ignore
+from Text_Lines import Paged_Text_Lines  # type: ignore
+
+DATA = ["Preface iv", "CH", "sec 1 3", "sec 2 5->5", "sec 3 8->6", "sec 4 9", "sec 5 4", "sec 6 3 -> 2"]
+
+
+def test_issues():
+    re_numberer = Re_Numbering(Paged_Text_Lines(DATA), on_disorder="ignore")
+    re_numberer.re_numbering()
+    assert [(issue.kind, issue.line, issue.page) for issue in re_numberer.issues] == [
+        ("missing", 1, None),
+        ("missing", 2, None),
+        ("mapping", 4, 5),
+        ("disorder", 7, 2),
+        ("mapping", 8, 2),
+    ]
+    assert re_numberer.issues[2].detail == "5->5 changes nothing"
+    assert re_numberer.issues[4].detail == "old page 3 is less than 4 above"
+    assert re_numberer.issues[3].text == "sec 5 2"
+
+
+def test_trivial_mapping_resetting_slide_is_not_an_issue():
+    re_numberer = Re_Numbering(Paged_Text_Lines(["a 1->3", "b 2", "c 4->4", "d 5"]), on_disorder="ignore")
+    re_numberer.re_numbering()
+    assert re_numberer.issues == []
+
+
+def test_kernels_find_the_same_issues():
+    loop = Re_Numbering(Paged_Text_Lines(DATA), on_disorder="ignore")
+    batch = Re_Numbering(Paged_Text_Lines(DATA), kernel="batch", on_disorder="ignore")
+    stream = Re_Numbering_Stream([f"{row}\n" for row in DATA], on_disorder="ignore", collect_issues=True)
+    loop.re_numbering()
+    batch.re_numbering()
+    list(stream.re_numbering_stream())
+    assert loop.issues == batch.issues == stream.issues
+    # issues of a stream are collected only when asked, so that memory stays flat
+    stream = Re_Numbering_Stream([f"{row}\n" for row in DATA], on_disorder="ignore")
+    list(stream.re_numbering_stream())
+    assert stream.issues == [] and len(stream.bad_rows) == len(
+        [issue for issue in loop.issues if issue.kind == "disorder"]
+    )
+
+
+@pytest.mark.parametrize("on_disorder", ["ignore", "report"])
+def test_silent_policies(tmp_path, capsys, on_disorder):
+    file = tmp_path / "toc.txt"
+    file.write_text("\n".join(DATA))
+    report = Re_Numbering_Report()
+    _re_numbering(file, tmp_path / "out", on_disorder=on_disorder, report=report)
+    assert capsys.readouterr().out == ""
+    assert report.counts == {"disorder": 1, "missing": 2, "mapping": 2}
+
+
+@pytest.mark.parametrize("options", [dict(), dict(stream=True), dict(mapped=True)])
+def test_aborted_file_is_reported(tmp_path, options):
+    file = tmp_path / "toc.txt"
+    file.write_text("\n".join(DATA))
+    report = Re_Numbering_Report()
+    with pytest.raises(Order_Disturbed):
+        _re_numbering(file, tmp_path / "out", on_disorder="abort", report=report, **options)
+    assert [issue.text for issue in report.files[str(file)] if issue.kind == "disorder"] == ["sec 5 2"]
+    assert not (tmp_path / "out" / "toc.txt").exists()
+
+
+def test_report_of_workers(tmp_path):
+    for name in ["a", "b"]:
+        (tmp_path / f"{name}.txt").write_text("\n".join(DATA))
+    out = io.StringIO()
+    report = Re_Numbering_Report(ndjson=out)
+    results = _re_numbering_all(tmp_path, tmp_path / "out", on_disorder="abort", jobs=2, report=report)
+    assert [result.ok for result in results] == [False, False]
+    rows = [json.loads(row) for row in out.getvalue().splitlines()]
+    assert [row["file"] for row in rows] == [str(tmp_path / "a.txt")] * 5 + [str(tmp_path / "b.txt")] * 5
+    assert report.files == {}
+
+
+def test_save(tmp_path):
+    report = Re_Numbering_Report()
+    re_numberer = Re_Numbering(Paged_Text_Lines(DATA), on_disorder="ignore")
+    re_numberer.re_numbering()
+    report.add(tmp_path / "toc.txt", re_numberer.issues)
+    report.save(tmp_path / "report.json")
+    saved = json.loads((tmp_path / "report.json").read_text())
+    assert saved["counts"]["missing"] == 2
+    assert saved["files"][0]["issues"][0] == dict(kind="missing", line=1, page=None, text="Preface iv", detail="")
@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(".", "scr"))
+import Re_Numbering_Server as Re_Numbering_Server_module  # type: ignore
+from Re_Numbering_Server import Re_Numbering_Server, is_serving, run_job, run_jobs, serve_stream  # type: ignore
+
+DATA: str = "a 1\nb\nc 2 -> 5\nd 3\n"
+
+
+def test_run_job(tmp_path):
+    reply = run_job({"id": 7, "text": DATA, "options": {"missing_page_number": True}})
+    assert reply["id"] == 7 and reply["ok"]
+    assert reply["text"] == "a 1\nb\nc 5\nd 6"
+    assert [(issue["kind"], issue["line"]) for issue in reply["issues"]] == [("missing", 2)]
+    assert "b" in reply["output"]
+    (tmp_path / "toc.txt").write_text(DATA)
+    reply = run_job({"path": str(tmp_path / "toc.txt"), "options": {"dir_out": str(tmp_path / "out"), "suffix": "_r"}})
+    assert reply["ok"] and reply["saved_file"] == str(tmp_path / "out" / "toc_r.txt")
+    assert (tmp_path / "out" / "toc_r.txt").read_text() == "a 1\nb\nc 5\nd 6"
+    # "ask" is taken as "abort", since jobs cannot ask
+    reply = run_job({"text": "a 5\nb 3 -> 3\n", "options": {"on_disorder": "ask"}})
+    assert not reply["ok"] and reply["issues"][0]["kind"] == "mapping"
+    assert not run_job({"text": DATA, "options": {"colour": True}})["ok"]
+    assert not run_job({"text": DATA, "path": "toc.txt"})["ok"]
+
+
+def test_bad_jobs_are_replied(tmp_path):
+    for job in [
+        {"text": "a 1", "options": 5},
+        {"path": 5},
+        {"text": ["a 1"]},
+        {"op": "compile", "text": DATA},
+        {"path": str(tmp_path / "toc.txt"), "options": {"dir_out": 5}},
+    ]:
+        reply = run_job(dict(job, id=3))
+        assert reply["id"] == 3 and not reply["ok"] and reply["error"]
+    inp = io.StringIO("\n".join([json.dumps({"text": "a 1", "options": 5}), json.dumps({"id": 1, "text": DATA})]))
+    out = io.StringIO()
+    assert not serve_stream(inp, out)
+    assert [json.loads(row)["ok"] for row in out.getvalue().splitlines()] == [False, True]
+
+
+def test_serve_stream():
+    inp = io.StringIO(
+        "\n".join([json.dumps({"id": 1, "text": DATA}), "not json", json.dumps({"op": "shutdown"}), json.dumps({})])
+    )
+    out = io.StringIO()
+    assert serve_stream(inp, out)
+    replies = [json.loads(row) for row in out.getvalue().splitlines()]
+    assert [(reply["id"], reply["ok"]) for reply in replies] == [(1, True), (None, False), (None, True)]
+
+
+def test_server_and_client(tmp_path):
+    path = tmp_path / "s.sock"
+    # no server, so that jobs run in this process
+    assert [reply["text"] for reply in run_jobs([{"text": DATA}], path)] == ["a 1\nb\nc 5\nd 6"]
+    with Re_Numbering_Server(path) as server:
+        thread = threading.Thread(target=server.serve)
+        thread.start()
+        assert is_serving(path)
+        replies = list(run_jobs([{"op": "ping"}, {"id": 2, "text": DATA}, {"op": "shutdown"}], path))
+        thread.join(timeout=10)
+    assert replies[0]["pid"] == os.getpid() and replies[1]["text"] == "a 1\nb\nc 5\nd 6"
+    assert not thread.is_alive() and not path.exists()
+
+
+def test_sockets_of_other_users_are_refused(tmp_path, monkeypatch):
+    path = tmp_path / "s.sock"
+    with Re_Numbering_Server(path):
+        assert is_serving(path)
+        monkeypatch.setattr(Re_Numbering_Server_module, "_UID", os.stat(path).st_uid + 1)
+        assert not is_serving(path)
+        # jobs are not sent to the socket, but run in this process
+        assert [reply["text"] for reply in run_jobs([{"text": DATA}], path)] == ["a 1\nb\nc 5\nd 6"]
+        with pytest.raises(PermissionError):
+            Re_Numbering_Server(path)
+        monkeypatch.undo()
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        Re_Numbering_Server(shared / "s.sock")
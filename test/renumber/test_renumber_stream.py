@@ -0,0 +1,57 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(".", "scr"))
+from main import _re_numbering_pipe  # type: ignore
+from Re_Numbering import Re_Numbering, Re_Numbering_Stream  # type: ignore
+from Text_Lines import Paged_Text_Lines  # type: ignore
+
+
+@pytest.fixture
+def data_stream() -> list[list[str]]:
+    return [
+        ["hoge 1", "hoge 2->5", "hoge 3", "hoge 4->10", "hoge 5"],
+        ["hoge 1", "hoge 2->5", "", "hoge 4->10", "hoge 5"],
+        ["hoge 1->8", "hoge 2", "hoge 10", "hoge 20->20", "hoge 30"],
+        ["CHAPTER I", "hoge 1->11", "", "hoge 10", "hoge xi"],
+        [],
+    ]
+
+
+@pytest.fixture
+def data_stream_order_disturbing() -> list[list[str]]:
+    return [["1", "2", "1"], ["-9", "-10", "1"], ["-3", "-1", "0"]]
+
+
+def test_stream_matches_re_numbering(data_stream):
+    for data in data_stream:
+        expected = Re_Numbering(Paged_Text_Lines(data)).re_numbering()
+        # rows come with trailing newline when read from a file
+        streamed = list(Re_Numbering_Stream([f"{row}\n" for row in data]).re_numbering_stream())
+        print(streamed)
+        assert [line.to_text() for line in streamed] == expected.to_list_str()
+
+
+def test_stream_collects_order_disturbing_rows(data_stream_order_disturbing):
+    for data in data_stream_order_disturbing:
+        re_numberer = Re_Numbering_Stream(data)
+        for _ in re_numberer.re_numbering_stream():
+            pass
+        assert re_numberer.bad_rows != []
+
+
+def test_re_numbering_pipe(capsys):
+    rows: list[str] = [f"hoge {i}" for i in range(1, 3001)] + ["hoge 3001->5000", "fuga", "hoge 3002"]
+    out = io.StringIO()
+    result = _re_numbering_pipe(io.StringIO("\n".join(rows) + "\n"), out, missing_page_number=True, chunk_size=1000)
+    assert result.ok
+    assert out.getvalue() == "\n".join(rows[:3000] + ["hoge 5000", "fuga", "hoge 5001"])
+    # rows with no page number are printed apart from the output
+    assert "fuga" in capsys.readouterr().err
+    out = io.StringIO()
+    result = _re_numbering_pipe(io.StringIO("a 5\nb 3\n"), out, add_last_space=True)
+    # rows are written, and the result fails since "ask" cannot ask user
+    assert out.getvalue() == "a 5\nb 3\n" and not result.ok
@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.append(os.path.join(".", "scr"))
+from main import _re_numbering_all, _re_numbering_files, has_page_order  # type: ignore
+
+
+def test_has_page_order(tmp_path):
+    file = tmp_path / "toc.txt"
+    for text, expected in [
+        ("", False),
+        ("a 1\nb 2\n", False),
+        ("a -> b 1\nc 2\n", False),
+        ("a -> b 1\nc 2 -> 3\n", True),
+        ("a 1\r\nb 5->7", True),
+        ("a 1\rb 2 -> 4\rc 5", True),
+    ]:
+        file.write_bytes(text.encode())
+        assert has_page_order(file) == expected, text
+
+
+def test_unmapped_policies(tmp_path):
+    (tmp_path / "mapped.txt").write_text("a 1\nb 2 -> 5\nc 3\n")
+    (tmp_path / "plain.txt").write_bytes(b"a 1\r\nb 2\r\n")
+    for unmapped in ["copy", "link", "skip"]:
+        dir_out = tmp_path / unmapped
+        results = _re_numbering_all(dir=tmp_path, dir_out=dir_out, suffix="_r", unmapped=unmapped)
+        assert [(result.file.name, result.unmapped) for result in results] == [
+            ("mapped.txt", False),
+            ("plain.txt", True),
+        ]
+        assert (dir_out / "mapped_r.txt").read_text() == "a 1\nb 5\nc 6"
+        if unmapped == "skip":
+            assert results[1].saved_file is None
+            assert not (dir_out / "plain_r.txt").exists()
+        else:
+            # bytes are kept as they are, line breaks included
+            assert (dir_out / "plain_r.txt").read_bytes() == b"a 1\r\nb 2\r\n"
+    assert (tmp_path / "link" / "plain_r.txt").samefile(tmp_path / "plain.txt")
+    assert not (tmp_path / "copy" / "plain_r.txt").samefile(tmp_path / "plain.txt")
+
+
+def test_unmapped_in_parallel_and_with_missing(tmp_path):
+    (tmp_path / "a.txt").write_text("a 1\nb 2 -> 5\n")
+    (tmp_path / "b.txt").write_text("a 1\nb\n")
+    results = _re_numbering_all(dir=tmp_path, dir_out=tmp_path / "out", suffix="_r", unmapped="copy", jobs=2)
+    assert [result.unmapped for result in results] == [False, True]
+    assert (tmp_path / "out" / "b_r.txt").read_text() == "a 1\nb\n"
+    # rows with no page number are pointed out only by parsing, so that no file is passed over
+    results = _re_numbering_files(
+        [tmp_path / "b.txt"], dir_out=tmp_path / "out", suffix="_m", missing_page_number=True, unmapped="skip"
+    )
+    assert not results[0].unmapped
+    assert (tmp_path / "out" / "b_m.txt").exists()
@@ -0,0 +1,88 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(".", "scr"))
+from main import _re_numbering, _re_numbering_all, _re_numbering_files  # type: ignore
+from Run_Stats import Run_Stats, count, get_current, stage  # type: ignore
+
+TEXT = "hoge 1\nhoge 2->5\nhoge 3\n"
+
+
+def test_stages_and_counters(tmp_path):
+    file = tmp_path / "toc.txt"
+    file.write_text(TEXT)
+    with Run_Stats() as stats:
+        saved = _re_numbering(file, tmp_path / "out", on_disorder="warn")
+    assert {"read", "parse", "sort", "renumber", "format", "write"} <= set(stats.seconds)
+    assert stats.counters == {"files": 1, "bytes_in": len(TEXT), "lines": 3, "bytes_out": saved.stat().st_size}
+    assert stats.wall_seconds >= stats.seconds["parse"]
+    assert get_current() is None
+
+
+def test_disabled_records_nothing():
+    stats = Run_Stats()
+    with stage("parse"):
+        count("lines")
+    assert get_current() is None
+    assert stats.seconds == {} and stats.counters == {}
+
+
+def test_hooks_and_nesting():
+    seen = []
+    with Run_Stats(hooks=[lambda name, seconds: seen.append(name)]) as outer:
+        with Run_Stats() as inner:
+            with stage("inner"):
+                pass
+        assert get_current() is outer
+        with stage("outer"):
+            pass
+    assert seen == ["outer"]
+    assert set(inner.seconds) == {"inner"} and set(outer.seconds) == {"outer"}
+
+
+def test_stream_and_mapped(tmp_path):
+    file = tmp_path / "toc.txt"
+    file.write_text(TEXT)
+    for options, stages in [(dict(stream=True), {"stream"}), (dict(mapped=True), {"map", "parse", "renumber"})]:
+        with Run_Stats() as stats:
+            _re_numbering(file, tmp_path / "out", on_disorder="warn", **options)
+        assert stages <= set(stats.seconds)
+        assert stats.counters["lines"] == 3
+
+
+def test_workers_are_merged(tmp_path):
+    for i in range(3):
+        (tmp_path / f"toc{i}.txt").write_text(TEXT)
+    with Run_Stats() as stats:
+        _re_numbering_all(tmp_path, tmp_path / "out", on_disorder="warn", jobs=2)
+    assert stats.counters["files"] == 3 and stats.counters["lines"] == 9
+    assert stats.calls["parse"] == 3
+
+
+def test_json_and_profile(tmp_path):
+    file = tmp_path / "toc.txt"
+    file.write_text(TEXT)
+    with Run_Stats(profile=True) as stats:
+        _re_numbering(file, tmp_path / "out", on_disorder="warn")
+    stats.save_json(tmp_path / "stats.json")
+    saved = json.loads((tmp_path / "stats.json").read_text())
+    assert saved["counters"]["lines"] == 3 and saved["stages"]["parse"]["calls"] == 1
+    assert "_re_numbering" in stats.format()
+
+
+def test_bytes_out_of_batched_outputs(tmp_path):
+    for i in range(3):
+        (tmp_path / f"toc{i}.txt").write_text(TEXT)
+    # a stale output of another size is replaced only when the batch is committed
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "toc0_r.txt").write_text("stale")
+    files = [tmp_path / f"toc{i}.txt" for i in range(3)]
+    for options in [dict(), dict(stream=True), dict(mapped=True), dict(jobs=2), dict(in_flight=2)]:
+        with Run_Stats() as stats:
+            results = _re_numbering_files(
+                files, tmp_path / "out", suffix="_r", fsync="batch", on_disorder="warn", **options
+            )
+        assert all(result.ok for result in results), options
+        sizes = [(tmp_path / "out" / f"toc{i}_r.txt").stat().st_size for i in range(3)]
+        assert stats.counters["bytes_out"] == sum(sizes), options
@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(".", "scr"))
+from Columnar_Text_Lines import Columnar_Paged_Text_Lines  # type: ignore
+from Text_Lines import Paged_Text_Lines  # type: ignore
+
+
+@pytest.fixture
+def data_text() -> list[str]:
+    return [
+        "CHAPTER I",
+        "front xi",
+        "§1. Elementary Properties 1->11",
+        "",
+        "§3. The Riesz Representation Theorem 10",
+        "too large 99999999999999999999999",
+        "§4. Orthonormal Sets 20 -> 23",
+    ]
+
+
+@pytest.fixture
+def data_rows() -> list[tuple[list[int], list[int]]]:
+    return [([1, 2, 3], [2, 3]), ([5], [2, 3]), ([], [1]), ([0, 6], [0, 6, 7]), ([], [])]
+
+
+def assert_same(columnar: Columnar_Paged_Text_Lines, lines: Paged_Text_Lines) -> None:
+    assert columnar.get_index() == lines.get_index()
+    assert [repr(line) for line in columnar] == [repr(line) for line in lines]
+    assert columnar.to_text() == lines.to_text()
+
+
+def test_columnar_parses_like_paged_text_lines(data_text):
+    assert_same(Columnar_Paged_Text_Lines(data_text), Paged_Text_Lines(data_text))
+    assert_same(Columnar_Paged_Text_Lines("\n".join(data_text)), Paged_Text_Lines("\n".join(data_text)))
+
+
+def test_columnar_set_operations(data_text, data_rows):
+    columnar = Columnar_Paged_Text_Lines(data_text)
+    lines = Paged_Text_Lines(data_text)
+    for rows1, rows2 in data_rows:
+        assert_same(columnar.select(rows1), lines.select(rows1))
+        assert_same(columnar.exclude(rows1), lines.exclude(rows1))
+        assert_same(columnar.select(rows1) + columnar.select(rows2), lines.select(rows1) + lines.select(rows2))
+        assert_same(columnar.select(rows1) - columnar.select(rows2), lines.select(rows1) - lines.select(rows2))
+        assert_same(
+            columnar.select(rows1).overwrite(columnar.select(rows2)), lines.select(rows1).overwrite(lines.select(rows2))
+        )
+
+
+def test_columnar_search(data_text):
+    columnar = Columnar_Paged_Text_Lines(data_text)
+    for row in range(-1, len(data_text) + 1):
+        assert columnar.search(row) == Paged_Text_Lines(data_text).search(row)
+
+
+def test_columnar_slices_and_assignment(data_text):
+    columnar = Columnar_Paged_Text_Lines(data_text)
+    lines = Paged_Text_Lines(data_text)
+    for key in (slice(1, 5), slice(None, None, -1), slice(5, 0, -2)):
+        assert_same(columnar[key], lines[key])
+        for row in range(len(data_text)):
+            assert columnar[key].search(row) == lines[key].search(row)
+    columnar.lines = lines.lines[3::-1]
+    lines.lines = lines.lines[:4]
+    assert_same(columnar, lines)
+    assert columnar.search(3) == 3 and columnar.search(5) == -1
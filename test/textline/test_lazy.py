@@ -0,0 +1,79 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(".", "scr"))
+from Lazy_Text_Lines import Lazy_Paged_Text_Lines  # type: ignore
+from Re_Numbering import Re_Numbering  # type: ignore
+from Text_Lines import Paged_Text_Lines, Texts_Printer  # type: ignore
+
+
+@pytest.fixture
+def data_text() -> list[str]:
+    return [
+        "CHAPTER I",
+        "front xi",
+        "§1. Elementary Properties 1->11",
+        "",
+        "§3. The Riesz Representation Theorem 10",
+        "§4. Orthonormal Sets 20 -> 23",
+        "§5. Trigonometric Series 25",
+    ]
+
+
+def n_parsed(lines: Lazy_Paged_Text_Lines) -> int:
+    return len(lines) if lines.is_parsed() else len([line for line in lines._parsed if line is not None])
+
+
+def assert_same(lazy: Lazy_Paged_Text_Lines, lines: Paged_Text_Lines) -> None:
+    assert len(lazy) == len(lines)
+    assert lazy.get_index() == lines.get_index()
+    assert [repr(line) for line in lazy] == [repr(line) for line in lines]
+    assert lazy.to_text() == lines.to_text()
+
+
+def test_lazy_parses_like_paged_text_lines(data_text):
+    assert_same(Lazy_Paged_Text_Lines(data_text), Paged_Text_Lines(data_text))
+    assert_same(Lazy_Paged_Text_Lines("\n".join(data_text)), Paged_Text_Lines("\n".join(data_text)))
+    assert_same(Lazy_Paged_Text_Lines(Paged_Text_Lines(data_text).lines), Paged_Text_Lines(data_text))
+    with pytest.raises(ValueError):
+        Lazy_Paged_Text_Lines(["a\nb"])
+
+
+def test_rows_are_parsed_on_demand(data_text):
+    lazy = Lazy_Paged_Text_Lines("\n".join(data_text))
+    assert n_parsed(lazy) == 0
+    assert lazy.search(4) == 4 and lazy.has_row(6) and not lazy.has_row(7)
+    assert lazy.get_line(4).page_number == 10
+    assert [line.idx for line in lazy.get_rows_around(lazy[4], 1)] == [3, 5]
+    Texts_Printer().print_around(lazy, 4)
+    assert n_parsed(lazy) == 3
+    assert lazy[4] is lazy.get_line(4)
+
+
+def test_has_page_order(data_text):
+    lazy = Lazy_Paged_Text_Lines(data_text)
+    assert lazy.has_page_order() and n_parsed(lazy) == 1
+    assert not Lazy_Paged_Text_Lines(["a -> b", "c 1"]).has_page_order()
+    assert Paged_Text_Lines(data_text).has_page_order()
+
+
+def test_search_parts(data_text):
+    lazy = Lazy_Paged_Text_Lines(data_text)
+    lines = Paged_Text_Lines(data_text)
+    for row in range(-1, len(data_text) + 1):
+        for left, right in [(0, -1), (2, 4), (3, 6)]:
+            assert lazy.search(row, left, right) == lines.search(row, left, right)
+
+
+def test_lazy_set_operations_and_re_numbering(data_text):
+    lazy = Lazy_Paged_Text_Lines(data_text)
+    lines = Paged_Text_Lines(data_text)
+    assert_same(lazy[1:5] + lazy[3:], lines[1:5] + lines[3:])
+    assert_same(lazy.select([0, 2, 4]) - lazy[::2], lines.select([0, 2, 4]) - lines[::2])
+    assert_same(lazy[::-1], lines[::-1])
+    lazy[2]
+    updated = Re_Numbering(lazy, on_disorder="ignore").re_numbering()
+    assert lazy.is_parsed()
+    assert updated.to_text() == Re_Numbering(lines, on_disorder="ignore").re_numbering().to_text()
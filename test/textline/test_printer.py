@@ -0,0 +1,33 @@
+import io
+import os
+import sys
+
+import rich
+from rich.console import Console
+
+sys.path.append(os.path.join(".", "scr"))
+from Text_Lines import Paged_Text_Lines, Texts_Printer  # type: ignore
+
+DATA: str = "a [red] 1\nb 2\nc 3\nd 4\ne 5"
+
+
+def test_print_plain(capsys):
+    lines = Paged_Text_Lines(DATA)
+    Texts_Printer(window=2).print(lines, start=1, end=3, with_blank_line=False)
+    assert capsys.readouterr().out == "N | Row | Text\n0 | 1 | b 2\n1 | 2 | c 3\n2 | 3 | d 4\n"
+    Texts_Printer().print(lines, end=1, with_page_idx=False, with_def=False, with_blank_line=False)
+    assert capsys.readouterr().out == "0 | a [red] 1\n1 | b 2\n"
+    Texts_Printer().print_around(lines, 4, N_around=2, with_blank_line=False)
+    assert capsys.readouterr().out == "c 3\nd 4\ne 5\n"
+
+
+def test_print_on_terminal(monkeypatch):
+    out = io.StringIO()
+    console = Console(file=out, force_terminal=True, color_system="standard", width=100)
+    monkeypatch.setattr(rich, "get_console", lambda: console)
+    lines = Paged_Text_Lines(DATA)
+    Texts_Printer(window=2).print_around(lines, 1, N_around=1, coloring_at=[-1, 0], with_blank_line=False)
+    rendered: str = out.getvalue()
+    # texts of rows are never taken as markup
+    assert "a [red] 1" in rendered
+    assert [row.endswith("\x1b[0m") for row in rendered.splitlines()] == [True, True, False]
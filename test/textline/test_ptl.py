@@ -1,3 +1,4 @@
+import dataclasses
 import os
 import re
 import sys
@@ -7,7 +8,7 @@ import pytest
 
 sys.path.append(os.path.join(".", "scr"))
 # from scr.Text_Line import Paged_Text_Line
-from Text_Line import Paged_Text_Line, Text_Line  # type: ignore
+from Text_Line import NO_PAGE_ORDER, Paged_Text_Line, Text_Line  # type: ignore
 
 
 @pytest.fixture
@@ -137,3 +138,63 @@ def test_get_text_without_page(text_get_text_without_page):
         ptl = Paged_Text_Line(text=text)
         print(ptl)
         assert ptl.text == ans
+
+
+def test_from_text_matches_constructor(
+    text_with_arabic_page, text_with_roman_page, text_page_order_ok, text_page_order_ng, text_get_text_without_page
+):
+    texts: list[str] = (
+        [text for text, *_ in text_with_arabic_page]
+        + [text for text, *_ in text_with_roman_page]
+        + [text for text, *_ in text_page_order_ok]
+        + text_page_order_ng
+        + [text for text, _ in text_get_text_without_page]
+    )
+    for text in texts:
+        ptl = Paged_Text_Line(idx=3, text=text)
+        parsed = Paged_Text_Line.from_text(idx=3, text=text)
+        print(ptl, parsed)
+        assert (parsed.idx, parsed.text, parsed.page_number, parsed.roman_page_number, parsed.page_order) == (
+            ptl.idx,
+            ptl.text,
+            ptl.page_number,
+            ptl.roman_page_number,
+            ptl.page_order,
+        )
+
+
+def test_from_text_rejects_newline():
+    with pytest.raises(ValueError):
+        Paged_Text_Line.from_text(idx=0, text="text\n1")
+
+
+def test_find_tail():
+    for text, tail in [
+        ("a title 12", "e 12"),
+        ("a title 3 -> 5", "e 3 -> 5"),
+        ("a title xiv", "e xiv"),
+        ("第1章　12", "章　12"),
+        ("xiv", "xiv"),
+        ("12 3", "12 3"),
+        ("", ""),
+    ]:
+        assert text[Paged_Text_Line.find_tail(text) :] == tail
+
+
+def test_from_text_keeps_text_as_prefix():
+    text = "a long title 12"
+    line = Paged_Text_Line.from_text(idx=0, text=text)
+    assert line._text is text
+    assert line.text == "a long title"
+    # no copy is made if there is no page number
+    line = Paged_Text_Line.from_text(idx=0, text="no page")
+    assert line.text is line._text
+
+
+def test_lines_are_compact():
+    line = Paged_Text_Line.from_text(idx=0, text="text 1")
+    assert not hasattr(line, "__dict__")
+    assert line.page_order is NO_PAGE_ORDER
+    assert Paged_Text_Line(text="text 1").page_order is NO_PAGE_ORDER
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        NO_PAGE_ORDER.before = 1  # type: ignore[misc]
@@ -0,0 +1,92 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.join(".", "scr"))
+import Sidecar_Index as Sidecar_Index_module  # type: ignore
+from Sidecar_Index import Indexed_Paged_Text_Lines, Sidecar_Index, get_index_file, load_lines  # type: ignore
+from Text_Lines import Paged_Text_Lines  # type: ignore
+
+
+@pytest.fixture
+def data_text() -> str:
+    return "\n".join(
+        [
+            "CHAPTER I",
+            "front xi",
+            "§1. Elementary Properties 1->11",
+            "",
+            "§3. The Riesz Representation Theorem 10",
+            "§4. Orthonormal Sets 20 -> 23",
+            "§5. Trigonometric Series  25",
+            "appendix ４２",
+        ]
+    )
+
+
+def assert_same(indexed: Paged_Text_Lines, lines: Paged_Text_Lines) -> None:
+    assert len(indexed) == len(lines)
+    assert [repr(indexed[pos]) for pos in range(len(lines))] == [repr(line) for line in lines]
+    assert [indexed[pos].text for pos in range(len(lines))] == [line.text for line in lines]
+    assert indexed.to_text() == lines.to_text()
+
+
+def test_index_builds_same_lines(tmp_path: Path, data_text):
+    file = tmp_path / "toc.txt"
+    file.write_text(data_text, encoding="utf-8")
+    with Sidecar_Index(file) as index:
+        assert index.rebuilt and get_index_file(file).exists()
+        lines = index.get_lines()
+        assert isinstance(lines, Indexed_Paged_Text_Lines) and lines.has_page_order() and not lines.is_parsed()
+        assert_same(lines, Paged_Text_Lines(data_text))
+    with Sidecar_Index(file) as index:
+        assert not index.rebuilt
+        assert_same(index.get_lines(), Paged_Text_Lines(data_text))
+        # all rows at once
+        assert [repr(line) for line in index.get_lines()] == [repr(line) for line in Paged_Text_Lines(data_text)]
+
+
+def test_stale_index_is_rebuilt(tmp_path: Path, data_text, monkeypatch):
+    file = tmp_path / "toc.txt"
+    file.write_text(data_text, encoding="utf-8")
+    Sidecar_Index(file).close()
+    # same size and content but a new mtime: the index is kept after hashing
+    stat = file.stat()
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with Sidecar_Index(file) as index:
+        assert not index.rebuilt
+    # the new mtime is recorded, so that the file is not hashed again
+    monkeypatch.setattr(Sidecar_Index_module, "hash_file", None)
+    with Sidecar_Index(file) as index:
+        assert not index.rebuilt
+    monkeypatch.undo()
+    # same size but new content: rebuilt
+    changed = data_text.replace("20 -> 23", "21 -> 23")
+    file.write_text(changed, encoding="utf-8")
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    with Sidecar_Index(file) as index:
+        assert index.rebuilt
+        assert_same(index.get_lines(), Paged_Text_Lines(changed))
+    # broken index: rebuilt
+    get_index_file(file).write_bytes(b"broken")
+    with Sidecar_Index(file) as index:
+        assert index.rebuilt and len(index) == len(changed.splitlines())
+
+
+def test_load_lines(tmp_path: Path, data_text):
+    file = tmp_path / "toc.txt"
+    file.write_text(data_text, encoding="utf-8")
+    load_lines(file)
+    n_open = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else 0
+    lines = load_lines(file)
+    # nothing is left open
+    assert n_open == (len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else 0)
+    assert not isinstance(lines, Indexed_Paged_Text_Lines)
+    assert_same(lines, Paged_Text_Lines(data_text))
+    file = tmp_path / "toc_cr.txt"
+    file.write_text("a 1\rb 2", encoding="utf-8", newline="")
+    lines = load_lines(file)
+    assert not isinstance(lines, Indexed_Paged_Text_Lines) and not get_index_file(file).exists()
+    assert lines.to_text() == Paged_Text_Lines("a 1\rb 2").to_text()
@@ -135,3 +135,37 @@ def test_exclude_textlines(data_exclude):
         idx_calc: list[int] = tls_after.get_index()
         print(tls)
         assert idx_calc == ans
+
+
+def test_search_follows_mutation():
+    tls = to_textlines(idx=[1, 2, 3])
+    assert tls.search(2) == 1 and not tls.has_row(5)
+    tls.lines.append(Text_Line(idx=5, text="text"))
+    assert tls.has_row(5) and tls.get_line(5).idx == 5
+    tls.lines[0].idx = 9
+    tls.get_sorted()
+    assert tls.get_index() == [2, 3, 5, 9]
+    assert tls.search(9) == 3 and not tls.has_row(1)
+    del tls.lines[0]
+    assert tls.search(3) == 0
+    tls.lines[0] = Text_Line(idx=4, text="text")
+    tls.lines.insert(0, Text_Line(idx=0, text="text"))
+    assert tls.search(4) == 1 and tls.search(0) == 0
+
+
+def test_lines_are_not_copied():
+    tls = to_textlines(idx=[3, 1, 2])
+    lines = tls.lines
+    assert tls.exclude([1]).lines is not lines
+    tls.lines = lines
+    assert tls.lines is lines
+
+
+def test_get_rows_around():
+    tls = to_textlines(idx=[1, 2, 3, 5, 8])
+    assert tls.get_rows_around(tls.get_line(3), radius=1).get_index() == [2, 5]
+    assert tls.get_rows_around(tls.get_line(1), radius=2).get_index() == [2, 3]
+    assert tls.get_line_next_to(tls.get_line(5), move=1).idx == 8
+    assert not tls.has_row_at(tls.get_line(8), move=1)
+    with pytest.raises(IndexError):
+        tls.get_line_next_to(tls.get_line(8), move=1)